@@ -0,0 +1,25 @@
+"""
+    benchmarks
+
+    Misure delle prestazioni dei moduli di scr (non fanno parte dell'applicazione).
+
+    Path:
+        benchmarks/
+
+    Descrizione:
+        Ogni modulo bench_*.py si esegue dalla cartella del progetto, es. `python -m benchmarks.bench_sqlite_profiles`,
+        e stampa i propri risultati. Tutte le misure usano database temporanei con dati sintetici.
+
+    Note:
+        - scr.db e utyls.logger aprono il database e il file di log nella cartella corrente all'importazione:
+          il pacchetto si sposta in una cartella temporanea prima che vengano importati, così il database
+          dell'applicazione non viene mai toccato.
+
+"""
+
+# lib
+import os, tempfile
+
+_work_dir = tempfile.mkdtemp(prefix="hdm-bench-")
+os.makedirs(os.path.join(_work_dir, "logs"))
+os.chdir(_work_dir)
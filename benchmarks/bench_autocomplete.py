@@ -0,0 +1,63 @@
+"""
+    bench_autocomplete.py
+
+    Misura l'indice dei suggerimenti per prefisso (scr.autocomplete).
+
+    Path:
+        benchmarks/bench_autocomplete.py
+
+    Descrizione:
+        Su nomi sintetici misura la costruzione dell'indice, i suggerimenti per alcuni prefissi
+        e gli aggiornamenti incrementali (un nome aggiunto e poi rimosso).
+
+"""
+
+# lib
+import random, time
+from scr.autocomplete import PrefixIndex
+from .common import best_time
+
+
+
+def benchmark_autocomplete(size=50000, prefixes=("r", "ra", "rag", "drago d", "fuoco", "zzz"), repeat=200):
+    """
+    Returns:
+        dict: Numero di nomi, ms di costruzione, µs per suggerimento (migliore e peggiore dei prefissi)
+              e µs per aggiungere e rimuovere un nome.
+    """
+
+    random_gen = random.Random(42)
+    words = [
+        "ragnaros", "signore", "del", "fuoco", "drago", "elise", "cercastelle", "gul'dan", "antico", "guardiano",
+        "lama", "ombra", "sacerdotessa", "lupo", "spettrale", "golem", "arcano", "mietitore", "tempesta", "gelo"
+    ]
+    names = [" ".join(random_gen.choices(words, k=random_gen.randint(1, 4))).title() + f" {i}" for i in range(size)]
+
+    build_ms, index = best_time(lambda: PrefixIndex(names), 1)
+
+    timings = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            index.suggest(prefix)
+        timings.append((time.perf_counter() - start) / repeat * 1e6)
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        index.update(added=[f"Carta Nuova {i}"])
+    for i in range(repeat):
+        index.update(removed=[f"Carta Nuova {i}"])
+    update_us = (time.perf_counter() - start) / (2 * repeat) * 1e6
+
+    return {
+        "names": size,
+        "build_ms": round(build_ms, 1),
+        "best_suggest_us": round(min(timings), 1),
+        "worst_suggest_us": round(max(timings), 1),
+        "update_us": round(update_us, 1),
+    }
+
+
+
+if __name__ == "__main__":
+    print(benchmark_autocomplete())
@@ -0,0 +1,61 @@
+"""
+    bench_card_importer.py
+
+    Misura l'importazione di un archivio di carte HearthstoneJSON (scr.card_importer).
+
+    Path:
+        benchmarks/bench_card_importer.py
+
+    Descrizione:
+        Su un database temporaneo importa un archivio sintetico da 30k carte due volte: la prima importazione
+        inserisce le carte, la riesecuzione le trova tutte con la stessa impronta e non scrive nulla.
+
+"""
+
+# lib
+import io, json, random
+from sqlalchemy.orm import sessionmaker
+from scr.card_importer import CARD_TYPES, CLASS_NAMES, RARITIES, EXPANSIONS, import_card_records, iter_json_array
+from .common import best_time, temporary_database
+
+
+
+def benchmark_card_import(size=30000):
+    """
+    Returns:
+        dict: Carte, ms della prima importazione e della riesecuzione, con i rispettivi conteggi.
+    """
+
+    random_gen = random.Random(42)
+    records = [
+        {
+            "dbfId": 1000 + i, "id": f"SYN_{i:05d}", "name": {"itIT": f"Carta {i}", "enUS": f"Card {i}"},
+            "collectible": i % 10 != 0, "type": random_gen.choice(list(CARD_TYPES)),
+            "cardClass": random_gen.choice(list(CLASS_NAMES)), "cost": random_gen.randint(0, 10),
+            "attack": random_gen.randint(0, 12), "health": random_gen.randint(1, 12),
+            "rarity": random_gen.choice(list(RARITIES)), "set": random_gen.choice(list(EXPANSIONS)),
+            "races": ["DRAGON"] if i % 7 == 0 else [], "mechanics": ["SECRET"] if i % 11 == 0 else [],
+        }
+        for i in range(size)
+    ]
+    text = json.dumps(records, ensure_ascii=False)
+
+    results = {"records": size}
+    with temporary_database() as engine:
+        make_session = sessionmaker(bind=engine)
+
+        def run_import():
+            with make_session() as session, session.begin():
+                return import_card_records(session, iter_json_array(io.StringIO(text)))
+
+        for run in ("first", "rerun"):
+            elapsed_ms, report = best_time(run_import, 1)
+            results[f"{run}_ms"] = round(elapsed_ms, 1)
+            results[f"{run}_report"] = report._asdict()
+
+    return results
+
+
+
+if __name__ == "__main__":
+    print(benchmark_card_import())
@@ -0,0 +1,77 @@
+"""
+    bench_card_store.py
+
+    Confronta l'archivio colonnare della collezione (scr.card_store) con il percorso SQL.
+
+    Path:
+        benchmarks/bench_card_store.py
+
+    Descrizione:
+        Su database temporanei da 1k, 10k e 100k carte sintetiche misura i filtri del FilterDialog
+        con query_cards (SQL) e con un'istantanea CardColumns (maschere e argsort NumPy).
+
+"""
+
+# lib
+import random
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from scr.db import Card
+from scr.card_store import CardColumnStore
+from scr.models import query_cards
+from .common import best_time, temporary_database
+
+
+
+def benchmark_collection_store(sizes=(1000, 10000, 100000), repeat=5):
+    """
+    Args:
+        sizes (tuple): Numero di carte per ciascun database.
+        repeat (int): Ripetizioni per ogni filtro (si considera il tempo minimo).
+
+    Returns:
+        list: Righe (carte, filtro, ms SQL, ms colonnare).
+    """
+
+    random_gen = random.Random(42)
+    types = ["Creatura", "Magia", "Arma", "Luogo"]
+    rarities = ["Base", "Comune", "Rara", "Epica", "Leggendaria"]
+    expansions = [f"Espansione {i}" for i in range(30)]
+    classes = ["Mago", "Cacciatore", "Sacerdote", "Guerriero", "Neutrale"]
+    scenarios = [
+        ("nessuno", {}),
+        ("tipo+rarità", {"card_type": "Creatura", "rarity": "Epica"}),
+        ("mana+espansione", {"mana_cost": "3", "expansion": "Espansione 7"}),
+        ("attacco+vita", {"attack": "2", "health": "3"}),
+    ]
+
+    results = []
+    for size in sizes:
+        with temporary_database() as engine:
+            with engine.begin() as connection:
+                connection.execute(insert(Card), [{
+                    "name": f"Carta {i:06d}",
+                    "class_name": random_gen.choice(classes),
+                    "mana_cost": random_gen.randint(0, 10),
+                    "card_type": random_gen.choice(types),
+                    "attack": random_gen.randint(0, 8),
+                    "health": random_gen.randint(1, 8),
+                    "rarity": random_gen.choice(rarities),
+                    "expansion": random_gen.choice(expansions),
+                } for i in range(size)])
+
+            with sessionmaker(bind=engine)() as session:
+                snapshot = CardColumnStore().refresh(session)
+                for label, filters in scenarios:
+                    sql_ms, _ = best_time(lambda: query_cards(session, filters), repeat)
+                    store_ms, _ = best_time(lambda: snapshot.rows_at(snapshot.query(filters)), repeat)
+                    results.append((size, label, sql_ms, store_ms))
+
+    return results
+
+
+
+if __name__ == "__main__":
+    print(f"{'carte':>8} {'filtro':<18} {'SQL ms':>9} {'NumPy ms':>9}")
+    for size, label, sql_ms, store_ms in benchmark_collection_store():
+        print(f"{size:>8} {label:<18} {sql_ms:>9.2f} {store_ms:>9.2f}")
@@ -0,0 +1,61 @@
+"""
+    bench_deck_archetypes.py
+
+    Misura il riconoscimento degli archetipi dei mazzi (scr.deck_archetypes).
+
+    Path:
+        benchmarks/bench_deck_archetypes.py
+
+    Descrizione:
+        Raggruppa mazzi sintetici (varianti di liste base, 3 carte cambiate su 15) e misura tempo e qualità:
+        la purezza è la quota di mazzi nel gruppo in cui prevale la loro lista base.
+
+"""
+
+# lib
+import random
+from collections import Counter
+from scr.deck_archetypes import KMEANS_SEED, find_archetypes
+from scr.deck_similarity import DeckSimilarityIndex
+from .common import best_time
+
+
+
+def benchmark_deck_archetypes(decks=10000, classes=10, bases_per_class=6, cards_per_deck=15, card_pool=3000):
+    """
+    Returns:
+        dict: ms del raggruppamento, archetipi trovati e purezza.
+    """
+
+    random_gen = random.Random(KMEANS_SEED)
+    bases = [random_gen.sample(range(1, card_pool + 1), cards_per_deck) for _ in range(classes * bases_per_class)]
+
+    rows, deck_classes, deck_bases = [], {}, {}
+    for deck_id in range(1, decks + 1):
+        base = random_gen.randrange(len(bases))
+        cards = list(bases[base])
+        for position in random_gen.sample(range(cards_per_deck), 3):
+            cards[position] = random_gen.randint(1, card_pool)
+        rows.extend((deck_id, card_id, 1 + card_id % 2) for card_id in sorted(set(cards)))
+        deck_classes[deck_id] = f"Classe {base // bases_per_class}"
+        deck_bases[deck_id] = base
+
+    index = DeckSimilarityIndex()
+    index.append_rows(rows)
+    matrix = index.snapshot()
+
+    elapsed_ms, archetypes = best_time(lambda: find_archetypes(matrix, deck_classes), 1)
+
+    pure = sum(Counter(deck_bases[deck_id] for deck_id in archetype.deck_ids).most_common(1)[0][1] for archetype in archetypes)
+    return {
+        "decks": decks,
+        "base_lists": len(bases),
+        "archetypes": len(archetypes),
+        "ms": round(elapsed_ms, 1),
+        "purity": round(pure / decks, 3),
+    }
+
+
+
+if __name__ == "__main__":
+    print(benchmark_deck_archetypes())
@@ -0,0 +1,87 @@
+"""
+    bench_deck_buildability.py
+
+    Misura la verifica dei mazzi costruibili con le carte possedute (scr.deck_buildability).
+
+    Path:
+        benchmarks/bench_deck_buildability.py
+
+    Descrizione:
+        Su un database temporaneo di 5k mazzi sintetici misura la prima valutazione (lettura di mazzi e collezione
+        compresa), il risultato in cache, la rivalutazione dopo la modifica di una carta e la stessa valutazione in SQL.
+
+"""
+
+# lib
+import random
+from sqlalchemy import insert, update
+from sqlalchemy.orm import sessionmaker
+from scr.db import Card, Deck, DeckCard
+from scr.deck_buildability import BuildabilityEvaluator, query_missing_copies, query_missing_cards
+from scr.deck_similarity import DeckSimilarityIndex
+from .common import best_time, temporary_database
+
+
+
+def benchmark_deck_buildability(decks=5000, cards_per_deck=15, card_pool=3000, repeat=20):
+    """
+    Returns:
+        dict: ms della prima valutazione, del risultato in cache, della rivalutazione dopo la modifica
+              di una carta e della stessa valutazione in SQL.
+    """
+
+    random_gen = random.Random(42)
+
+    with temporary_database() as engine:
+        with engine.begin() as connection:
+            connection.execute(insert(Card), [
+                {"id": i, "name": f"Carta {i}", "mana_cost": i % 10, "card_type": "Creatura", "owned_quantity": random_gen.choice((0, 1, 2, 2, 2))}
+                for i in range(1, card_pool + 1)
+            ])
+            connection.execute(insert(Deck), [
+                {"id": i, "name": f"Mazzo {i}", "player_class": "Mago", "game_format": "Standard"} for i in range(1, decks + 1)
+            ])
+            connection.execute(insert(DeckCard), [
+                {"deck_id": i, "card_id": card_id, "quantity": 1 + card_id % 2}
+                for i in range(1, decks + 1) for card_id in random_gen.sample(range(1, card_pool + 1), cards_per_deck)
+            ])
+
+        with sessionmaker(bind=engine)() as session:
+            index = DeckSimilarityIndex()
+            evaluator = BuildabilityEvaluator(index)
+
+            def first_evaluation():
+                index.refresh(session)
+                evaluator.load_owned(session)
+                return evaluator.evaluate(index.snapshot())
+
+            first_ms, report = best_time(first_evaluation, 1)
+            cached_ms, _ = best_time(lambda: evaluator.evaluate(index.snapshot()), repeat)
+
+            card_id = int(report.card_ids[0])       # Una carta mancante diventa posseduta
+            session.execute(update(Card).where(Card.id == card_id).values(owned_quantity=2))
+
+            def card_change():
+                evaluator.update_owned(session, [card_id])
+                return evaluator.evaluate(index.snapshot())
+
+            card_change_ms, report = best_time(card_change, 1)
+
+            sql_ms, sql_missing = best_time(lambda: query_missing_copies(session), repeat)
+            assert report.missing_by_deck() == sql_missing
+            deck_id = next(iter(sql_missing))
+            assert report.missing_cards(deck_id) == query_missing_cards(session, deck_id)
+
+    return {
+        "decks": decks,
+        "buildable": decks - len(sql_missing),
+        "first_ms": round(first_ms, 1),
+        "cached_ms": round(cached_ms, 3),
+        "card_change_ms": round(card_change_ms, 2),
+        "sql_ms": round(sql_ms, 1),
+    }
+
+
+
+if __name__ == "__main__":
+    print(benchmark_deck_buildability())
@@ -0,0 +1,71 @@
+"""
+    bench_deck_export.py
+
+    Misura l'esportazione in streaming dei mazzi (scr.deck_export).
+
+    Path:
+        benchmarks/bench_deck_export.py
+
+    Descrizione:
+        Su database temporanei di varie dimensioni misura tempo e memoria massima (tracemalloc) di ogni formato:
+        se la lettura è davvero in streaming, la memoria non cresce con il numero di mazzi.
+
+"""
+
+# lib
+import io, tracemalloc
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from scr.db import Card, Deck, DeckCard
+from scr.deck_export import WRITERS, iter_exported_decks
+from .common import best_time, temporary_database
+
+
+
+class NullStream(io.TextIOBase):
+    """ Scarta il testo scritto: si misura solo la memoria usata dall'esportazione. """
+
+    def write(self, text):
+        return len(text)
+
+
+
+def benchmark_deck_export(sizes=(1000, 10000), cards_per_deck=15):
+    """
+    Returns:
+        dict: Per ogni numero di mazzi e formato, ms e KiB di memoria massima allocata durante la scrittura.
+    """
+
+    results = {}
+    for size in sizes:
+        with temporary_database() as engine:
+            with engine.begin() as connection:
+                connection.execute(insert(Card), [
+                    {"id": i, "name": f"Carta {i}", "mana_cost": i % 10, "card_type": "Creatura", "dbf_id": 1000 + i}
+                    for i in range(1, 3001)
+                ])
+                connection.execute(insert(Deck), [
+                    {"id": i, "name": f"Mazzo {i}", "player_class": "Mago", "game_format": "Standard"}
+                    for i in range(1, size + 1)
+                ])
+                connection.execute(insert(DeckCard), [
+                    {"deck_id": i, "card_id": 1 + (i * 7 + card * 13) % 3000, "quantity": 1 + card % 2}
+                    for i in range(1, size + 1) for card in range(cards_per_deck)
+                ])
+
+            with sessionmaker(bind=engine)() as session:
+                for export_format, writer in WRITERS.items():
+                    elapsed_ms, _ = best_time(lambda: writer(iter_exported_decks(session), NullStream()), 1)
+
+                    tracemalloc.start()         # Seconda esecuzione: tracemalloc rallenta, quindi non si misura il tempo
+                    writer(iter_exported_decks(session), NullStream())
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    results[f"{size}_{export_format}"] = {"ms": round(elapsed_ms, 1), "peak_kib": round(peak / 1024)}
+
+    return results
+
+
+
+if __name__ == "__main__":
+    print(benchmark_deck_export())
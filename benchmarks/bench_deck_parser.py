@@ -0,0 +1,58 @@
+"""
+    bench_deck_parser.py
+
+    Misura la lettura di molti mazzi concatenati (scr.deck_parser.iter_decks).
+
+    Path:
+        benchmarks/bench_deck_parser.py
+
+    Descrizione:
+        Il testo di 10k mazzi sintetici viene letto come stringa e come file a blocchi; uno ogni 100 è incompleto.
+
+"""
+
+# lib
+import io
+from scr.deck_parser import iter_decks, DECK_FOOTER
+from .common import best_time
+
+
+
+def benchmark_deck_parser(decks=10000, cards_per_deck=15, repeat=3):
+    """
+    Args:
+        decks (int): Numero di mazzi sintetici.
+        cards_per_deck (int): Righe di carte per mazzo.
+        repeat (int): Ripetizioni (si considera il tempo minimo).
+
+    Returns:
+        dict: Mazzi e righe lette, ms totali (stringa e file), µs per mazzo e mazzi con errori.
+    """
+
+    blocks = []
+    for index in range(decks):
+        lines = [f"### Mazzo {index}", "# Classe: Mago", "# Formato: Standard", "#"]
+        lines += [f"# {1 + card % 2}x ({card % 10}) Carta {index % 500}-{card}" for card in range(cards_per_deck)]
+        lines += ["#", "AAECAf0EBu0F7AeWBLsC", "#"]
+        if index % 100:
+            lines.append(DECK_FOOTER)
+        blocks.append("\n".join(lines))
+    text = "\n\n".join(blocks)
+
+    text_ms, parsed = best_time(lambda: list(iter_decks(text)), repeat)
+    file_ms, file_parsed = best_time(lambda: list(iter_decks(io.StringIO(text))), repeat)
+    assert file_parsed == parsed
+
+    return {
+        "decks": len(parsed),
+        "lines": text.count("\n") + 1,
+        "text_ms": round(text_ms, 1),
+        "file_ms": round(file_ms, 1),
+        "us_per_deck": round(text_ms / max(len(parsed), 1) * 1000, 2),
+        "invalid_decks": sum(1 for deck in parsed if not deck.valid),
+    }
+
+
+
+if __name__ == "__main__":
+    print(benchmark_deck_parser())
@@ -0,0 +1,86 @@
+"""
+    bench_deck_similarity.py
+
+    Misura l'indice di somiglianza dei mazzi (scr.deck_similarity).
+
+    Path:
+        benchmarks/bench_deck_similarity.py
+
+    Descrizione:
+        Su un database temporaneo di mazzi sintetici (varianti di 200 liste base) misura il caricamento completo,
+        l'aggiornamento incrementale di 10 mazzi e una ricerca dei mazzi simili, confrontata con la stessa ricerca in SQL.
+
+"""
+
+# lib
+import random
+from sqlalchemy import insert, delete
+from sqlalchemy.orm import sessionmaker
+from scr.db import Card, Deck, DeckCard
+from scr.deck_similarity import DeckSimilarityIndex, SIMILAR_DECKS_LIMIT, _top_matches, query_similar_decks
+from .common import best_time, temporary_database
+
+
+
+def benchmark_deck_similarity(decks=10000, cards_per_deck=15, card_pool=3000, repeat=20):
+    """
+    Returns:
+        dict: ms del caricamento completo, dell'aggiornamento incrementale di 10 mazzi, di una ricerca
+              (coseno e Jaccard, tempo minimo) e della stessa ricerca in SQL.
+    """
+
+    random_gen = random.Random(42)
+    bases = [random_gen.sample(range(1, card_pool + 1), cards_per_deck) for _ in range(200)]
+
+    def deck_cards(deck_id):
+        cards = list(bases[deck_id % len(bases)])
+        for position in random_gen.sample(range(cards_per_deck), 3):     # Ogni variante cambia 3 carte
+            cards[position] = random_gen.randint(1, card_pool)
+        return {card_id: 1 + card_id % 2 for card_id in cards}
+
+    with temporary_database() as engine:
+        with engine.begin() as connection:
+            connection.execute(insert(Card), [
+                {"id": i, "name": f"Carta {i}", "mana_cost": i % 10, "card_type": "Creatura"} for i in range(1, card_pool + 1)
+            ])
+            connection.execute(insert(Deck), [
+                {"id": i, "name": f"Mazzo {i}", "player_class": "Mago", "game_format": "Standard"} for i in range(1, decks + 1)
+            ])
+            connection.execute(insert(DeckCard), [
+                {"deck_id": i, "card_id": card_id, "quantity": quantity}
+                for i in range(1, decks + 1) for card_id, quantity in deck_cards(i).items()
+            ])
+
+        with sessionmaker(bind=engine)() as session:
+            index = DeckSimilarityIndex()
+            load_ms, _ = best_time(lambda: index.refresh(session), 1)
+
+            changed = random_gen.sample(range(1, decks + 1), 10)
+            session.execute(delete(DeckCard).where(DeckCard.deck_id.in_(changed)))
+            session.execute(insert(DeckCard), [
+                {"deck_id": i, "card_id": card_id, "quantity": quantity} for i in changed for card_id, quantity in deck_cards(i).items()
+            ])
+            update_ms, _ = best_time(lambda: index.update_decks(session, changed), 1)
+
+            deck_id = changed[0]
+            cosine_ms, cosine = best_time(lambda: _top_matches(index.deck_ids, index.scores(deck_id, "cosine"), SIMILAR_DECKS_LIMIT), repeat)
+            jaccard_ms, jaccard = best_time(lambda: _top_matches(index.deck_ids, index.scores(deck_id, "jaccard"), SIMILAR_DECKS_LIMIT), repeat)
+            sql_ms, sql_cosine = best_time(lambda: query_similar_decks(session, deck_id, metric="cosine"), repeat)
+
+            assert [match.deck_id for match in cosine] == [match.deck_id for match in sql_cosine]
+            assert query_similar_decks(session, deck_id, metric="jaccard") == jaccard
+
+    return {
+        "decks": decks,
+        "entries": len(index.entry_rows),
+        "load_ms": round(load_ms, 1),
+        "update_10_decks_ms": round(update_ms, 2),
+        "cosine_ms": round(cosine_ms, 2),
+        "jaccard_ms": round(jaccard_ms, 2),
+        "sql_cosine_ms": round(sql_ms, 2),
+    }
+
+
+
+if __name__ == "__main__":
+    print(benchmark_deck_similarity())
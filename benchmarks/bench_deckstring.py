@@ -0,0 +1,48 @@
+"""
+    bench_deckstring.py
+
+    Misura codifica e decodifica dei deckstring (scr.deckstring).
+
+    Path:
+        benchmarks/bench_deckstring.py
+
+    Descrizione:
+        Codifica e decodifica 10k mazzi sintetici (metà delle carte in doppia copia) e verifica che il giro completo
+        restituisca le stesse carte.
+
+"""
+
+# lib
+import random
+from scr.deckstring import encode_deckstring, decode_deckstring, HERO_DBF_IDS
+from .common import best_time
+
+
+
+def benchmark_deckstring(decks=10000, cards_per_deck=15, repeat=3):
+    """
+    Returns:
+        dict: Mazzi, ms totali per codificarli e decodificarli, µs per mazzo.
+    """
+
+    random_gen = random.Random(42)
+    samples = [
+        {random_gen.randint(1, 120000): 1 + card % 2 for card in range(cards_per_deck)}
+        for _ in range(decks)
+    ]
+
+    encode_ms, encoded = best_time(lambda: [encode_deckstring(cards, HERO_DBF_IDS["mago"]) for cards in samples], repeat)
+    decode_ms, decoded = best_time(lambda: [decode_deckstring(deckstring) for deckstring in encoded], repeat)
+    assert [deck.cards for deck in decoded] == samples
+
+    return {
+        "decks": decks,
+        "encode_ms": round(encode_ms, 1),
+        "decode_ms": round(decode_ms, 1),
+        "encode_us_per_deck": round(encode_ms / decks * 1000, 2),
+    }
+
+
+
+if __name__ == "__main__":
+    print(benchmark_deckstring())
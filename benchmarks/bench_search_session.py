@@ -0,0 +1,69 @@
+"""
+    bench_search_session.py
+
+    Misura la ricerca incrementale (scr.search_session) durante la digitazione di un nome.
+
+    Path:
+        benchmarks/bench_search_session.py
+
+    Descrizione:
+        Il testo viene digitato un carattere alla volta su un archivio colonnare di carte sintetiche:
+        a ogni carattere si confronta la query completa con la SearchSession, che restringe i risultati precedenti.
+
+"""
+
+# lib
+import random
+import numpy as np
+from scr.card_store import CardColumnStore
+from scr.search_session import SearchSession
+from .common import best_time
+
+
+
+def benchmark_incremental_search(size=50000, query="ragnaros 0", repeat=5):
+    """
+    Args:
+        size (int): Numero di carte.
+        query (str): Testo digitato.
+        repeat (int): Ripetizioni (si considera il tempo minimo).
+
+    Returns:
+        dict: Millisecondi totali con la query completa a ogni carattere e con la SearchSession,
+              più il numero di query complete eseguite dalla sessione.
+    """
+
+    random_gen = random.Random(42)
+    syllables = ["ra", "gna", "ros", "tir", "ion", "jai", "na", "ke", "el", "thas", "mal", "go"]
+    snapshot = CardColumnStore().load_rows([
+        (i, f"{''.join(random_gen.choices(syllables, k=3))} {i}", None, 1, "Creatura", None, None, 1, 1, None, "Comune", "Base")
+        for i in range(size)
+    ])
+
+    full_scan = lambda text: np.flatnonzero(snapshot.mask({"name": text}))
+    prefixes = [query[:length] for length in range(1, len(query) + 1)]
+
+    def type_query():
+        session = SearchSession()
+        results = [
+            session.search(text, full_query=lambda: full_scan(text), narrow=lambda previous: snapshot.filter_by_name(previous, text))
+            for text in prefixes
+        ]
+        return session, results
+
+    full_ms, expected = best_time(lambda: [full_scan(text) for text in prefixes], repeat)
+    session_ms, (session, results) = best_time(type_query, repeat)
+    assert all(np.array_equal(a, b) for a, b in zip(expected, results))
+
+    return {
+        "cards": size,
+        "keystrokes": len(prefixes),
+        "full_ms": round(full_ms, 2),
+        "session_ms": round(session_ms, 2),
+        "full_queries": session.full_queries,
+    }
+
+
+
+if __name__ == "__main__":
+    print(benchmark_incremental_search())
@@ -0,0 +1,62 @@
+"""
+    bench_sqlite_profiles.py
+
+    Confronta i profili prestazionali di SQLite (scr.db.SQLITE_PROFILES).
+
+    Path:
+        benchmarks/bench_sqlite_profiles.py
+
+    Descrizione:
+        Per ogni profilo misura, su un database temporaneo, il numero di commit di una sola riga al secondo
+        (il caso delle modifiche dall'interfaccia) e di letture filtrate della collezione al secondo.
+
+"""
+
+# lib
+import random, time
+from sqlalchemy import insert, select
+from sqlalchemy.orm import sessionmaker
+from scr.db import SQLITE_PROFILES, Card, Deck
+from .common import temporary_database
+
+
+
+def benchmark_sqlite_profiles(commits=300, reads=300, cards=5000):
+    """
+    Returns:
+        dict: Per ogni profilo, commit al secondo e letture al secondo.
+    """
+
+    random_gen = random.Random(42)
+    rarities = ["Comune", "Rara", "Epica", "Leggendaria"]
+
+    results = {}
+    for profile in SQLITE_PROFILES:
+        with temporary_database(profile) as engine:
+            with engine.begin() as connection:
+                connection.execute(insert(Card), [
+                    {"name": f"Carta {i}", "mana_cost": i % 10, "card_type": "Creatura", "rarity": random_gen.choice(rarities)}
+                    for i in range(cards)
+                ])
+
+            make_session = sessionmaker(bind=engine)
+            start = time.perf_counter()
+            for i in range(commits):
+                with make_session() as session, session.begin():
+                    session.add(Deck(name=f"Mazzo {i}", player_class="Mago", game_format="Standard"))
+            commit_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with make_session() as session:
+                for i in range(reads):
+                    session.execute(select(Card.id, Card.name).where(Card.rarity == rarities[i % 4], Card.mana_cost == i % 10)).all()
+            read_time = time.perf_counter() - start
+
+        results[profile] = {"commits_per_s": round(commits / commit_time), "reads_per_s": round(reads / read_time)}
+    return results
+
+
+
+if __name__ == "__main__":
+    for profile, result in benchmark_sqlite_profiles().items():
+        print(f"{profile:<14} {result['commits_per_s']:>7} commit/s {result['reads_per_s']:>7} letture/s")
@@ -0,0 +1,48 @@
+"""
+    bench_trigram_index.py
+
+    Misura l'indice a trigrammi per la ricerca approssimata dei nomi (scr.trigram_index).
+
+    Path:
+        benchmarks/bench_trigram_index.py
+
+    Descrizione:
+        Costruisce l'indice su nomi sintetici e misura le ricerche top-10 di alcuni nomi con errori di battitura.
+
+"""
+
+# lib
+import random
+from scr.trigram_index import TrigramIndex
+from .common import best_time
+
+
+
+def benchmark_trigram_index(size=50000, queries=("Ragnarox", "ragnaros signore", "Gul'dan", "Elise Cercastelle", "drago di fuoco"), repeat=5):
+    """
+    Returns:
+        dict: Numero di nomi, ms di costruzione, ms per ricerca (migliore e peggiore delle query).
+    """
+
+    random_gen = random.Random(42)
+    words = [
+        "ragnaros", "signore", "del", "fuoco", "drago", "elise", "cercastelle", "gul'dan", "antico", "guardiano",
+        "lama", "ombra", "sacerdotessa", "lupo", "spettrale", "golem", "arcano", "mietitore", "tempesta", "gelo",
+        "fenice", "nano", "elementale", "sciamano", "totem", "pirata", "murloc", "bestia", "demone", "angelo"
+    ]
+    names = [" ".join(random_gen.choices(words, k=random_gen.randint(1, 4))) + f" {i}" for i in range(size)]
+
+    build_ms, index = best_time(lambda: TrigramIndex(enumerate(names)), 1)
+    timings = [best_time(lambda: index.search(query, limit=10), repeat)[0] for query in queries]
+
+    return {
+        "names": size,
+        "build_ms": round(build_ms, 1),
+        "best_query_ms": round(min(timings), 2),
+        "worst_query_ms": round(max(timings), 2),
+    }
+
+
+
+if __name__ == "__main__":
+    print(benchmark_trigram_index())
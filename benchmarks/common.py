@@ -0,0 +1,54 @@
+"""
+    common.py
+
+    Funzioni condivise dai benchmark.
+
+    Path:
+        benchmarks/common.py
+
+"""
+
+# lib
+import os, tempfile, time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from scr.db import Base, apply_sqlite_profile, active_sqlite_profile
+
+
+
+def best_time(run, repeat):
+    """
+    Esegue `run` più volte e restituisce il tempo minimo.
+
+    Returns:
+        tuple: (ms del tempo minimo, risultato dell'ultima esecuzione).
+    """
+
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+@contextmanager
+def temporary_database(profile=active_sqlite_profile):
+    """
+    Database SQLite temporaneo con tutte le tabelle, eliminato all'uscita.
+
+    Args:
+        profile (str): Profilo prestazionale applicato alle connessioni (vedi scr.db.SQLITE_PROFILES).
+
+    Yields:
+        Engine: Motore del database.
+    """
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+        event.listen(engine, "connect", lambda connection, record: apply_sqlite_profile(connection, profile))
+        Base.metadata.create_all(engine)
+        try:
+            yield engine
+        finally:
+            engine.dispose()
@@ -25,6 +25,14 @@ target_metadata = Base.metadata
 # target_metadata = mymodel.Base.metadata
 #target_metadata = None
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    """ Esclude dall'autogenerate la tabella virtuale FTS5 `cards_fts` e le sue tabelle ombra. """
+    if type_ == "table" and name.startswith("cards_fts"):
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -49,6 +57,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -70,7 +79,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,38 @@
+"""Add card dbf_id
+
+Revision ID: 3c9b7e2f41d6
+Revises: efe867bb27b4
+Create Date: 2026-10-17 15:02:18.904317
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9b7e2f41d6'
+down_revision: Union[str, None] = 'efe867bb27b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nota: niente batch mode, ricreerebbe le tabelle eliminando i trigger dell'indice full-text.
+    # La colonna resta NULL per le carte inserite a mano: il database non contiene dati da cui ricavare i DBF id.
+    op.add_column('cards', sa.Column('dbf_id', sa.Integer(), nullable=True))
+    op.create_index('idx_card_dbf_id', 'cards', ['dbf_id'], unique=False)
+
+    cards = op.get_bind().execute(sa.text("SELECT COUNT(*) FROM cards")).scalar()
+    if cards:
+        logging.getLogger("alembic.runtime.migration").warning(
+            f"{cards} carte senza dbf_id: i deckstring dei mazzi restano disponibili solo dopo l'importazione "
+            f"dell'archivio delle carte (python -m scr.card_importer cards.collectible.json)."
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_card_dbf_id', table_name='cards')
+    op.drop_column('cards', 'dbf_id')
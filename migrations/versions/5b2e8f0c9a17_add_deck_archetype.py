@@ -0,0 +1,37 @@
+"""Add deck_archetype
+
+Revision ID: 5b2e8f0c9a17
+Revises: 8d41c07a5e93
+Create Date: 2026-10-17 23:05:12.481530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e8f0c9a17'
+down_revision: Union[str, None] = '8d41c07a5e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Le righe vengono calcolate dall'applicazione all'avvio (scr/deck_archetypes.py)
+    op.create_table('deck_archetype',
+    sa.Column('deck_id', sa.Integer(), nullable=False),
+    sa.Column('archetype', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('core_cards', sa.String(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['deck_id'], ['decks.id'], ),
+    sa.PrimaryKeyConstraint('deck_id')
+    )
+    op.create_index('idx_deck_archetype_name', 'deck_archetype', ['name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_deck_archetype_name', table_name='deck_archetype')
+    op.drop_table('deck_archetype')
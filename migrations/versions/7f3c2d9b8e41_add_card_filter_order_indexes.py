@@ -0,0 +1,39 @@
+"""Add card filter order indexes
+
+Revision ID: 7f3c2d9b8e41
+Revises: c2a7d94e6b38
+Create Date: 2026-10-17 23:57:09.214836
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3c2d9b8e41'
+down_revision: Union[str, None] = 'c2a7d94e6b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # La collezione filtrata per tipo, rarità o espansione è ordinata per (mana_cost, name): gli indici composti
+    # servono filtro e ordinamento insieme (niente TEMP B-TREE) e coprono le ricerche sulla sola prima colonna.
+    # Nota: niente batch mode, ricreerebbe le tabelle eliminando i trigger dell'indice full-text
+    op.create_index('idx_card_type_mana_name', 'cards', ['card_type', 'mana_cost', 'name'], unique=False)
+    op.create_index('idx_card_rarity_mana_name', 'cards', ['rarity', 'mana_cost', 'name'], unique=False)
+    op.create_index('idx_card_expansion_mana_name', 'cards', ['expansion', 'mana_cost', 'name'], unique=False)
+    op.drop_index('idx_card_type', table_name='cards')
+    op.drop_index('idx_card_rarity', table_name='cards')
+    op.drop_index('idx_card_expansion', table_name='cards')
+
+
+def downgrade() -> None:
+    op.create_index('idx_card_expansion', 'cards', ['expansion'], unique=False)
+    op.create_index('idx_card_rarity', 'cards', ['rarity'], unique=False)
+    op.create_index('idx_card_type', 'cards', ['card_type'], unique=False)
+    op.drop_index('idx_card_expansion_mana_name', table_name='cards')
+    op.drop_index('idx_card_rarity_mana_name', table_name='cards')
+    op.drop_index('idx_card_type_mana_name', table_name='cards')
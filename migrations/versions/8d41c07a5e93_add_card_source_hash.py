@@ -0,0 +1,27 @@
+"""Add card source_hash
+
+Revision ID: 8d41c07a5e93
+Revises: 3c9b7e2f41d6
+Create Date: 2026-10-17 16:20:47.115902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41c07a5e93'
+down_revision: Union[str, None] = '3c9b7e2f41d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nota: niente batch mode, ricreerebbe le tabelle eliminando i trigger dell'indice full-text
+    op.add_column('cards', sa.Column('source_hash', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('cards', 'source_hash')
@@ -0,0 +1,62 @@
+"""Add lookup indexes
+
+Revision ID: a51ec49de196
+Revises: 339629e8ca50
+Create Date: 2026-10-17 10:12:41.530118
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a51ec49de196'
+down_revision: Union[str, None] = '339629e8ca50'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def rename_duplicate_decks(connection) -> None:
+    """ Rinomina i mazzi con un nome già usato da un mazzo precedente (" (2)", " (3)", ...): l'indice su decks.name è univoco. """
+
+    rows = connection.execute(sa.text("SELECT id, name FROM decks ORDER BY id")).all()
+    used = {name for _, name in rows}
+    seen = set()
+    for deck_id, name in rows:
+        if name not in seen:
+            seen.add(name)
+            continue
+
+        number = 2
+        while f"{name} ({number})" in used:
+            number += 1
+        new_name = f"{name} ({number})"
+        used.add(new_name)
+        connection.execute(sa.text("UPDATE decks SET name = :name WHERE id = :id"), {"name": new_name, "id": deck_id})
+        logging.getLogger("alembic.runtime.migration").warning(f"Mazzo {deck_id} rinominato da '{name}' a '{new_name}' (nome duplicato).")
+
+
+def upgrade() -> None:
+    # Indice duplicato sul nome (creato da index=True oltre a idx_card_name): presente solo nei db creati con create_all
+    op.execute("DROP INDEX IF EXISTS ix_cards_name")
+
+    # Nota: niente batch mode, ricreerebbe le tabelle eliminando i trigger dell'indice full-text
+    op.create_index('idx_card_mana_name', 'cards', ['mana_cost', 'name'], unique=False)
+    op.create_index('idx_card_type', 'cards', ['card_type'], unique=False)
+    op.create_index('idx_card_rarity', 'cards', ['rarity'], unique=False)
+    op.create_index('idx_card_expansion', 'cards', ['expansion'], unique=False)
+    rename_duplicate_decks(op.get_bind())
+    op.create_index('idx_deck_name', 'decks', ['name'], unique=True)
+    op.create_index('idx_deck_card_card_id', 'deck_cards', ['card_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_deck_card_card_id', table_name='deck_cards')
+    op.drop_index('idx_deck_name', table_name='decks')
+    op.drop_index('idx_card_expansion', table_name='cards')
+    op.drop_index('idx_card_rarity', table_name='cards')
+    op.drop_index('idx_card_type', table_name='cards')
+    op.drop_index('idx_card_mana_name', table_name='cards')
@@ -0,0 +1,27 @@
+"""Add card owned_quantity
+
+Revision ID: c2a7d94e6b38
+Revises: 5b2e8f0c9a17
+Create Date: 2026-10-17 23:48:31.602174
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2a7d94e6b38'
+down_revision: Union[str, None] = '5b2e8f0c9a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nota: niente batch mode, ricreerebbe le tabelle eliminando i trigger dell'indice full-text
+    op.add_column('cards', sa.Column('owned_quantity', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('cards', 'owned_quantity')
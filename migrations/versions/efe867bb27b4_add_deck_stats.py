@@ -0,0 +1,63 @@
+"""Add deck_stats
+
+Revision ID: efe867bb27b4
+Revises: a51ec49de196
+Create Date: 2026-10-17 11:04:27.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'efe867bb27b4'
+down_revision: Union[str, None] = 'a51ec49de196'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+STAT_COLUMNS = (
+    'total_cards', 'creatures', 'spells', 'weapons', 'locations', 'heroes', 'mana_sum',
+    'curve_0', 'curve_1', 'curve_2', 'curve_3', 'curve_4', 'curve_5', 'curve_6', 'curve_7',
+    'common', 'rare', 'epic', 'legendary'
+)
+
+
+def upgrade() -> None:
+    op.create_table('deck_stats',
+    sa.Column('deck_id', sa.Integer(), nullable=False),
+    *[sa.Column(name, sa.Integer(), nullable=False) for name in STAT_COLUMNS],
+    sa.ForeignKeyConstraint(['deck_id'], ['decks.id'], ),
+    sa.PrimaryKeyConstraint('deck_id')
+    )
+
+    # Popola le statistiche dei mazzi esistenti (stessa logica di refresh_deck_stats in scr/models.py)
+    def count_if(condition):
+        return f"COALESCE(SUM(CASE WHEN {condition} THEN deck_cards.quantity ELSE 0 END), 0)"
+
+    op.execute(f"""
+        INSERT INTO deck_stats (deck_id, {', '.join(STAT_COLUMNS)})
+        SELECT decks.id,
+            COALESCE(SUM(deck_cards.quantity), 0),
+            {count_if("lower(cards.card_type) = 'creatura'")},
+            {count_if("lower(cards.card_type) = 'magia'")},
+            {count_if("lower(cards.card_type) = 'arma'")},
+            {count_if("lower(cards.card_type) = 'luogo'")},
+            {count_if("lower(cards.card_type) = 'eroe'")},
+            COALESCE(SUM(cards.mana_cost * deck_cards.quantity), 0),
+            {', '.join(count_if(f"cards.mana_cost = {mana}") for mana in range(7))},
+            {count_if("cards.mana_cost >= 7")},
+            {count_if("lower(cards.rarity) = 'comune'")},
+            {count_if("lower(cards.rarity) = 'rara'")},
+            {count_if("lower(cards.rarity) = 'epica'")},
+            {count_if("lower(cards.rarity) = 'leggendaria'")}
+        FROM decks
+        LEFT OUTER JOIN (deck_cards JOIN cards ON cards.id = deck_cards.card_id) ON deck_cards.deck_id = decks.id
+        GROUP BY decks.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('deck_stats')
@@ -0,0 +1,57 @@
+"""
+    conftest.py
+
+    Configurazione comune dei test.
+
+    Path:
+        pytests/conftest.py
+
+    Descrizione:
+        scr.db e utyls.logger aprono il database e il file di log nella cartella corrente all'importazione:
+        i test vengono eseguiti in una cartella temporanea, così il database dell'applicazione non viene mai toccato.
+        La fixture `database` collega le sessioni di scr.db a un database SQLite temporaneo con tutte le tabelle.
+
+"""
+
+# lib
+import os, tempfile
+import pytest
+
+_work_dir = tempfile.mkdtemp(prefix="hdm-tests-")
+os.makedirs(os.path.join(_work_dir, "logs"))
+os.chdir(_work_dir)
+
+from sqlalchemy import create_engine, event
+from scr import db, models
+
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """
+    Database SQLite temporaneo usato da db_session() per la durata del test.
+
+    Le cache basate sulle generazioni di scrittura (catalogo, archivio colonnare, indice dei mazzi)
+    vengono invalidate prima e dopo il test. La ricerca FTS5 è disattivata: la tabella virtuale
+    viene creata solo sul database dell'applicazione.
+
+    Yields:
+        Engine: Motore del database temporaneo (es. per contare le istruzioni SQL).
+    """
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    event.listen(engine, "connect", lambda connection, record: db.apply_sqlite_profile(connection, db.active_sqlite_profile))
+    db.Base.metadata.create_all(engine)
+
+    monkeypatch.setattr(models, "card_search_available", False)
+    db.Session.configure(bind=engine)
+    db.bump_card_generation()
+    db.bump_deck_generation()
+    try:
+        yield engine
+    finally:
+        db.ScopedSession.remove()
+        db.Session.configure(bind=db.engine)
+        db.bump_card_generation()       # Le cache non devono conservare i dati del database temporaneo
+        db.bump_deck_generation()
+        engine.dispose()
@@ -0,0 +1,82 @@
+"""
+    test_card_matching.py
+
+    Test delle sostituzioni con nomi simili durante l'importazione dei mazzi.
+
+    Path:
+        pytests/test_card_matching.py
+
+    Descrizione:
+        Una riga con un nome quasi uguale a una carta esistente (stesso costo) viene associata a quella carta:
+        la sostituzione deve essere elencata prima della conferma e registrata nel log come avviso.
+        Se due righe si risolvono nella stessa carta, le loro quantità vengono sommate.
+
+"""
+
+# lib
+import pytest
+from sqlalchemy import insert, select
+from scr.db import Card, Deck, DeckCard
+from scr import models
+from scr.models import DbManager
+
+DECK = "\n".join([
+    "### Mazzo importato", "# Classe: Mago", "# Formato: Standard", "#",
+    "# 2x (4) Palla di fuocco",
+    "# 2x (1) Carta nuova",
+    "#", "AAE=", "#",
+    "# Per utilizzare questo mazzo, copialo negli appunti e crea un nuovo mazzo in Hearthstone",
+])
+
+# Due righe (nome esatto e nome con un refuso) che si risolvono nella stessa carta
+SAME_CARD_DECK = DECK.replace("# 2x (1) Carta nuova", "# 1x (4) Palla di fuoco").replace("# 2x (4) Palla di fuocco", "# 1x (4) Palla di fuocco")
+
+
+
+@pytest.fixture
+def cards(database):
+    with database.begin() as connection:
+        connection.execute(insert(Card), [{"id": 1, "name": "Palla di fuoco", "mana_cost": 4, "card_type": "Magia", "rarity": "Comune"}])
+
+
+def test_preview_lists_similar_names(cards):
+    db_manager = DbManager()
+    parsed_deck = db_manager.parse_valid_deck(DECK)
+
+    assert db_manager.preview_card_matches(parsed_deck) == [("Palla di fuocco", "Palla di fuoco")]
+
+
+def test_substitution_is_logged_as_warning(database, cards, caplog):
+    db_manager = DbManager()
+    with caplog.at_level("WARNING"):
+        assert db_manager.add_deck_from_clipboard(DECK)
+
+    with database.connect() as connection:
+        card_ids = connection.execute(
+            select(DeckCard.card_id).join(Deck).where(Deck.name == "Mazzo importato").order_by(DeckCard.card_id)
+        ).scalars().all()
+
+    assert card_ids[0] == 1 and len(card_ids) == 2
+    assert any("Palla di fuocco" in message and "Palla di fuoco" in message for message in caplog.messages)
+
+
+def deck_quantities(database, deck_name):
+    with database.connect() as connection:
+        return dict(connection.execute(select(DeckCard.card_id, DeckCard.quantity).join(Deck).where(Deck.name == deck_name)).all())
+
+
+def test_lines_resolving_to_same_card_are_summed(database, cards):
+    assert DbManager().add_deck_from_clipboard(SAME_CARD_DECK)
+
+    assert deck_quantities(database, "Mazzo importato") == {1: 2}
+
+
+def test_upgrade_sums_lines_resolving_to_same_card(database, cards, monkeypatch):
+    db_manager = DbManager()
+    assert db_manager.add_deck_from_clipboard(DECK)
+    monkeypatch.setattr(models.pyperclip, "paste", lambda: SAME_CARD_DECK)
+
+    changes = db_manager.upgrade_deck("Mazzo importato")
+
+    assert deck_quantities(database, "Mazzo importato") == {1: 2}
+    assert changes["updated"] == []
@@ -0,0 +1,57 @@
+"""
+    test_card_store.py
+
+    Test dell'archivio colonnare della collezione.
+
+    Path:
+        pytests/test_card_store.py
+
+    Descrizione:
+        Le ricerche per nome dell'archivio ignorano accenti e maiuscole come l'indice FTS5, e un
+        ricaricamento sostituisce l'istantanea senza modificare quella già catturata da una lettura.
+
+"""
+
+# lib
+import pytest
+from sqlalchemy import insert
+from scr.db import Card, bump_card_generation
+from scr import card_store
+
+pytestmark = pytest.mark.skipif(not card_store.NUMPY_AVAILABLE, reason="NumPy non installato")
+
+CARDS = ["Élite Tauren", "Elfa dei boschi", "Palla di fuoco", "Guardiano di Ragnaros"]
+
+
+
+@pytest.fixture
+def store(database):
+    with database.begin() as connection:
+        connection.execute(insert(Card), [
+            {"id": i, "name": name, "mana_cost": i, "card_type": "Creatura", "rarity": "Comune"}
+            for i, name in enumerate(CARDS, start=1)
+        ])
+    return card_store.CardColumnStore()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("elite", ["Élite Tauren"]),
+    ("ÉLITE tau", ["Élite Tauren"]),
+    ("el", ["Élite Tauren", "Elfa dei boschi"]),
+    ("di", ["Palla di fuoco", "Guardiano di Ragnaros"]),
+])
+def test_name_filter_ignores_accents(store, text, expected):
+    assert [card["name"] for card in store.load({"name": text})] == expected
+
+
+def test_reload_replaces_snapshot(database, store):
+    snapshot = store.snapshot()
+    with database.begin() as connection:
+        connection.execute(insert(Card), [{"id": 5, "name": "Nuova carta", "mana_cost": 0, "card_type": "Magia", "rarity": "Rara"}])
+    bump_card_generation([5])
+
+    fresh = store.snapshot()
+    assert fresh is not snapshot
+    assert fresh.generation != snapshot.generation
+    assert (snapshot.size, fresh.size) == (len(CARDS), len(CARDS) + 1)
+    assert len(snapshot.query()) == len(snapshot.all_rows()) == len(CARDS)
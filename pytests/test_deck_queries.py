@@ -0,0 +1,119 @@
+"""
+    test_deck_queries.py
+
+    Test di regressione sul numero di istruzioni SQL usate per caricare un mazzo.
+
+    Path:
+        pytests/test_deck_queries.py
+
+    Descrizione:
+        Un mazzo e le sue carte devono essere letti con al massimo 2 istruzioni SQL, indipendentemente
+        dal numero di carte (nessun caricamento pigro carta per carta); il riepilogo dei mazzi con una sola.
+        Il calcolo delle statistiche mancanti durante le letture non cambia la generazione dei mazzi.
+
+"""
+
+# lib
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event, insert
+from scr.db import Card, Deck, DeckCard, get_deck_generation
+from scr.models import DbManager, load_deck_from_db
+
+MAX_STATEMENTS = 2
+DECK_CARDS = 15
+
+
+
+class RowCollector(list):
+    """ Raccoglie le righe aggiunte da load_deck_from_db al posto della ListCtrl. """
+
+    def Append(self, row):
+        self.append(row)
+
+
+
+@contextmanager
+def count_statements(engine):
+    """ Conta le istruzioni SQL eseguite sul motore indicato all'interno del blocco. """
+
+    statements = []
+    listener = lambda connection, cursor, statement, parameters, context, executemany: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+@pytest.fixture
+def deck(database):
+    """ Mazzo di prova con DECK_CARDS carte diverse (2 copie ciascuna). """
+
+    with database.begin() as connection:
+        connection.execute(insert(Card), [
+            {"id": i, "name": f"Carta {i}", "mana_cost": i % 10, "card_type": "Creatura", "rarity": "Comune"}
+            for i in range(1, DECK_CARDS + 1)
+        ])
+        connection.execute(insert(Deck), [{"id": 1, "name": "Mazzo di prova", "player_class": "Mago", "game_format": "Standard"}])
+        connection.execute(insert(DeckCard), [{"deck_id": 1, "card_id": i, "quantity": 2} for i in range(1, DECK_CARDS + 1)])
+    return {"id": 1, "name": "Mazzo di prova"}
+
+
+def test_get_deck(database, deck):
+    with count_statements(database) as statements:
+        result = DbManager().get_deck(deck["name"])
+
+    assert len(result["cards"]) == DECK_CARDS
+    assert len(statements) <= MAX_STATEMENTS, statements
+
+
+def test_get_deck_details(database, deck):
+    with count_statements(database) as statements:
+        result = DbManager().get_deck_details(deck["name"])
+
+    assert len(result["cards"]) == DECK_CARDS
+    assert len(statements) <= MAX_STATEMENTS, statements
+
+
+def test_get_deck_cards(database, deck):
+    with count_statements(database) as statements:
+        cards = DbManager().get_deck_cards(deck["id"])
+
+    assert len(cards) == DECK_CARDS
+    assert len(statements) <= MAX_STATEMENTS, statements
+
+
+def test_load_deck_from_db(database, deck):
+    rows = RowCollector()
+    with count_statements(database) as statements:
+        load_deck_from_db(deck_name=deck["name"], deck_content=deck, card_list=rows)
+
+    assert len(rows) == DECK_CARDS
+    assert len(statements) <= MAX_STATEMENTS, statements
+
+
+def test_get_deck_summaries(database, deck):
+    db_manager = DbManager()
+    db_manager.get_deck_summaries()         # Il primo caricamento calcola le statistiche mancanti
+
+    with count_statements(database) as statements:
+        summaries = db_manager.get_deck_summaries()
+
+    assert summaries[0]["total_cards"] == 2 * DECK_CARDS
+    assert len(statements) == 1, statements
+
+
+def test_get_missing_copies_by_deck(database, deck):
+    assert DbManager().get_missing_copies_by_deck() == {deck["name"]: 2 * DECK_CARDS}
+
+
+def test_stats_backfill_keeps_deck_generation(database, deck):
+    generation = get_deck_generation()
+
+    DbManager().get_deck_statistics(deck["name"])      # Mazzo senza riga in deck_stats
+    with database.begin() as connection:
+        connection.exec_driver_sql("DELETE FROM deck_stats")
+    DbManager().get_deck_summaries()
+
+    assert get_deck_generation() == generation
@@ -0,0 +1,52 @@
+"""
+    test_deckstring.py
+
+    Test della codifica e decodifica dei deckstring.
+
+    Path:
+        pytests/test_deckstring.py
+
+    Descrizione:
+        I deckstring di riferimento sono quelli della suite di test di python-hearthstone (HearthSim):
+        un mazzo generato dal gioco con le sideboard di E.T.C., Band Manager e un mazzo con carte in più copie
+        e in sideboard da più copie, dove l'ordine dei campi è `dbf_id, quantità, carta proprietaria`.
+
+"""
+
+# lib
+from scr.deckstring import DecodedDeck, FORMAT_STANDARD, FORMAT_WILD, encode_deckstring, decode_deckstring
+
+# Mazzo generato dal gioco (eroe Hedanis, formato Selvaggio) con tre carte nella sideboard di E.T.C. (DBF id 90749)
+SIDEBOARD_DECKSTRING = (
+    "AAEBAZCaBgjlsASotgSX7wTvkQXipAX9xAXPxgXGxwUQvp8EobYElrcE+dsEuNwEutwE9v"
+    "AEhoMFopkF4KQFlMQFu8QFu8cFuJ4Gz54G0Z4GAAED8J8E/cQFuNkE/cQF/+EE/cQFAAA="
+)
+SIDEBOARD_DECK = DecodedDeck(
+    cards={
+        71781: 1, 72488: 1, 79767: 1, 84207: 1, 86626: 1, 90749: 1, 90959: 1, 91078: 1,
+        69566: 2, 72481: 2, 72598: 2, 77305: 2, 77368: 2, 77370: 2, 79990: 2, 82310: 2,
+        85154: 2, 86624: 2, 90644: 2, 90683: 2, 91067: 2, 102200: 2, 102223: 2, 102225: 2,
+    },
+    heroes=(101648,),
+    game_format=FORMAT_WILD,
+    sideboards={(69616, 90749): 1, (76984, 90749): 1, (78079, 90749): 1},
+)
+
+# Mago, Standard: una carta e una sideboard con carte da una, due e tre copie (DBF id 80, 70 e 90, proprietaria 5)
+MULTI_COPY_SIDEBOARD_DECKSTRING = "AAECAf0EAQEAAAEBUAUBRgUBWgMF"
+MULTI_COPY_SIDEBOARD = {(80, 5): 1, (70, 5): 2, (90, 5): 3}
+
+
+
+def test_decode_game_deckstring_with_sideboard():
+    assert decode_deckstring(SIDEBOARD_DECKSTRING) == SIDEBOARD_DECK
+
+
+def test_encode_game_deckstring_with_sideboard():
+    deck = SIDEBOARD_DECK
+    assert encode_deckstring(deck.cards, deck.heroes[0], deck.game_format, deck.sideboards) == SIDEBOARD_DECKSTRING
+
+
+def test_multi_copy_sideboard_field_order():
+    assert encode_deckstring({1: 1}, 637, FORMAT_STANDARD, MULTI_COPY_SIDEBOARD) == MULTI_COPY_SIDEBOARD_DECKSTRING
+    assert decode_deckstring(MULTI_COPY_SIDEBOARD_DECKSTRING).sideboards == MULTI_COPY_SIDEBOARD
@@ -0,0 +1,42 @@
+"""
+    test_deckstring_import.py
+
+    Test dell'importazione dei mazzi tramite deckstring.
+
+    Path:
+        pytests/test_deckstring_import.py
+
+    Descrizione:
+        Un deckstring valido ma senza carte non deve produrre un mazzo vuoto: le carte vengono lette dalle righe del mazzo.
+
+"""
+
+# lib
+from sqlalchemy import func, select
+from scr.db import Deck, DeckCard, db_session
+from scr.models import DbManager
+
+EMPTY_DECKSTRING = "AAECAf0EAAAA"       # Mago, formato Standard, nessuna carta
+
+
+
+def deck_text(lines):
+    return "\n".join([
+        "### Mazzo vuoto", "# Classe: Mago", "# Formato: Standard", "#", *lines, "#", EMPTY_DECKSTRING, "#",
+        "# Per utilizzare questo mazzo, copialo negli appunti e crea un nuovo mazzo in Hearthstone",
+    ])
+
+
+def test_empty_deckstring_is_not_resolved(database):
+    with db_session() as session:
+        assert DbManager().resolve_deckstring(session, EMPTY_DECKSTRING) is None
+
+
+def test_empty_deckstring_uses_card_lines(database):
+    assert DbManager().add_deck_from_clipboard(deck_text(["# 2x (1) Carta A", "# 1x (3) Carta B"]))
+
+    with database.connect() as connection:
+        quantity = connection.execute(
+            select(func.sum(DeckCard.quantity)).join(Deck).where(Deck.name == "Mazzo vuoto")
+        ).scalar()
+    assert quantity == 3
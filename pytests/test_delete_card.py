@@ -0,0 +1,61 @@
+"""
+    test_delete_card.py
+
+    Test sull'eliminazione delle carte e sulla coerenza del catalogo in memoria.
+
+    Path:
+        pytests/test_delete_card.py
+
+    Descrizione:
+        L'eliminazione di una carta non deve lasciare righe orfane in deck_cards, e il catalogo delle carte
+        non deve mai caricare righe non ancora confermate dall'unità di lavoro aperta nel thread.
+
+"""
+
+# lib
+import pytest
+from sqlalchemy import func, insert, select
+from scr.db import Card, Deck, DeckCard, db_session, get_deck_generation
+from scr.card_catalog import CardCatalog
+from scr.models import DbManager
+
+
+
+@pytest.fixture
+def deck(database):
+    """ Mazzo con due carte, 2 copie ciascuna. """
+
+    with database.begin() as connection:
+        connection.execute(insert(Card), [
+            {"id": 1, "name": "Carta A", "mana_cost": 1, "card_type": "Creatura", "rarity": "Comune"},
+            {"id": 2, "name": "Carta B", "mana_cost": 2, "card_type": "Magia", "rarity": "Rara"},
+        ])
+        connection.execute(insert(Deck), [{"id": 1, "name": "Mazzo", "player_class": "Mago", "game_format": "Standard"}])
+        connection.execute(insert(DeckCard), [{"deck_id": 1, "card_id": 1, "quantity": 2}, {"deck_id": 1, "card_id": 2, "quantity": 2}])
+    return 1
+
+
+def test_delete_card_removes_deck_cards(database, deck):
+    generation = get_deck_generation()
+
+    DbManager().delete_card("Carta A")
+
+    with database.connect() as connection:
+        card_ids = connection.execute(select(DeckCard.card_id).where(DeckCard.deck_id == deck)).scalars().all()
+        orphans = connection.execute(select(func.count()).select_from(DeckCard).where(DeckCard.card_id.not_in(select(Card.id)))).scalar()
+
+    assert card_ids == [2]
+    assert orphans == 0
+    assert get_deck_generation() > generation
+
+
+def test_catalog_ignores_uncommitted_cards(database, deck):
+    catalog = CardCatalog()
+    with db_session() as session:
+        session.add(Card(name="Carta C", mana_cost=3, card_type="Creatura", rarity="Comune"))
+        session.flush()
+        assert catalog.get_by_name("Carta C") is None
+        session.rollback()
+
+    assert catalog.get_by_name("Carta C") is None
+    assert catalog.get_by_name("Carta A") is not None
@@ -0,0 +1,176 @@
+"""
+    test_indexes.py
+
+    Test degli indici di ricerca (revisioni a51ec49de196 e 7f3c2d9b8e41).
+
+    Path:
+        pytests/test_indexes.py
+
+    Descrizione:
+        Le istruzioni SQL emesse da query_cards, DbManager.get_deck e DbManager.delete_deck vengono catturate
+        (evento before_cursor_execute) e passate a EXPLAIN QUERY PLAN con i loro parametri: ogni tabella deve
+        essere letta tramite un indice, senza TEMP B-TREE per l'ordinamento.
+        La migrazione a51ec49de196 viene inoltre applicata a un database con nomi di mazzi duplicati.
+
+"""
+
+# lib
+import importlib.util
+from pathlib import Path
+import pytest
+from sqlalchemy import create_engine, event, insert, text
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from scr.db import Base, Card, Deck, DeckCard, db_session
+from scr.models import DbManager, query_cards
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations" / "versions"
+
+# Indici creati dalla revisione a51ec49de196
+LOOKUP_INDEXES = ["idx_card_mana_name", "idx_card_type", "idx_card_rarity", "idx_card_expansion", "idx_deck_name", "idx_deck_card_card_id"]
+
+# Indici composti della revisione 7f3c2d9b8e41 (sostituiscono idx_card_type, idx_card_rarity e idx_card_expansion)
+FILTER_ORDER_INDEXES = ["idx_card_type_mana_name", "idx_card_rarity_mana_name", "idx_card_expansion_mana_name"]
+
+# (filtri di query_cards, indice atteso)
+CARD_FILTER_INDEXES = [
+    ({}, "idx_card_mana_name"),
+    ({"card_type": "Creatura"}, "idx_card_type_mana_name"),
+    ({"rarity": "Rara"}, "idx_card_rarity_mana_name"),
+    ({"expansion": "Base"}, "idx_card_expansion_mana_name"),
+]
+
+
+
+def load_migration(revision_file):
+    """ Importa il modulo di una revisione dalla cartella migrations/versions. """
+
+    spec = importlib.util.spec_from_file_location(revision_file, MIGRATIONS_DIR / f"{revision_file}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def index_names(connection):
+    """ Nomi degli indici presenti nel database. """
+    return {row[0] for row in connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+
+
+@pytest.fixture
+def deck(database):
+    """ Collezione di 30 carte e un mazzo con due carte. """
+
+    with database.begin() as connection:
+        connection.execute(insert(Card), [
+            {"id": card_id, "name": f"Carta {card_id}", "mana_cost": card_id % 10, "card_type": "Creatura" if card_id % 2 else "Magia",
+             "rarity": "Rara" if card_id % 3 else "Comune", "expansion": "Base" if card_id % 5 else "Classico"}
+            for card_id in range(1, 31)
+        ])
+        connection.execute(insert(Deck), [{"id": 1, "name": "Mazzo", "player_class": "Mago", "game_format": "Standard"}])
+        connection.execute(insert(DeckCard), [{"deck_id": 1, "card_id": 1, "quantity": 2}, {"deck_id": 1, "card_id": 2, "quantity": 1}])
+    return "Mazzo"
+
+
+def query_plans(engine, action):
+    """
+    Esegue `action` e restituisce il piano di esecuzione di ogni istruzione SQL emessa.
+
+    Returns:
+        list: Coppie (istruzione, righe di EXPLAIN QUERY PLAN).
+    """
+
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        action()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as connection:
+        return [
+            (statement, [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)])
+            for statement, parameters in statements
+        ]
+
+
+def assert_indexed(plans):
+    """ Ogni tabella è letta tramite un indice (o la chiave primaria) e nessun ordinamento usa un TEMP B-TREE. """
+
+    assert plans
+    for statement, plan in plans:
+        for step in plan:
+            assert "TEMP B-TREE" not in step, (statement, plan)
+            assert not step.startswith("SCAN ") or " USING " in step or step.startswith("SCAN anon_"), (statement, plan)
+
+
+@pytest.mark.parametrize("filters, index_name", CARD_FILTER_INDEXES)
+def test_query_cards_uses_index(database, deck, filters, index_name):
+    def action():
+        with db_session() as session:
+            query_cards(session, filters)
+
+    plans = query_plans(database, action)
+
+    assert_indexed(plans)
+    assert any(f"INDEX {index_name}" in step for _, plan in plans for step in plan), plans
+
+
+def test_get_deck_uses_index(database, deck):
+    plans = query_plans(database, lambda: DbManager().get_deck(deck))
+
+    assert_indexed(plans)
+    assert any("INDEX idx_deck_name" in step for _, plan in plans for step in plan), plans
+
+
+def test_delete_deck_uses_index(database, deck):
+    plans = query_plans(database, lambda: DbManager().delete_deck(deck))
+
+    assert_indexed(plans)
+    assert any("INDEX idx_deck_name" in step for _, plan in plans for step in plan), plans
+    assert any(statement.startswith("DELETE FROM deck_cards") for statement, _ in plans), plans
+
+
+def test_upgrade_renames_duplicate_deck_names(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for index_name in LOOKUP_INDEXES + FILTER_ORDER_INDEXES:    # Schema della revisione precedente
+            connection.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        connection.execute(insert(Deck), [
+            {"id": deck_id, "name": name, "player_class": "Mago", "game_format": "Standard"}
+            for deck_id, name in [(1, "Mazzo"), (2, "Mazzo"), (3, "Mazzo (2)"), (4, "Mazzo"), (5, "Altro")]
+        ])
+
+        with Operations.context(MigrationContext.configure(connection)):
+            load_migration("a51ec49de196_add_lookup_indexes").upgrade()
+
+        names = dict(connection.execute(text("SELECT id, name FROM decks")).all())
+        indexes = index_names(connection)
+    engine.dispose()
+
+    assert names == {1: "Mazzo", 2: "Mazzo (3)", 3: "Mazzo (2)", 4: "Mazzo (4)", 5: "Altro"}
+    assert set(LOOKUP_INDEXES) <= indexes
+
+
+def test_upgrade_replaces_filter_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for index_name in FILTER_ORDER_INDEXES:     # Schema della revisione precedente
+            connection.execute(text(f"DROP INDEX {index_name}"))
+        for index_name, column_name in [("idx_card_type", "card_type"), ("idx_card_rarity", "rarity"), ("idx_card_expansion", "expansion")]:
+            connection.execute(text(f"CREATE INDEX {index_name} ON cards ({column_name})"))
+
+        with Operations.context(MigrationContext.configure(connection)):
+            load_migration("7f3c2d9b8e41_add_card_filter_order_indexes").upgrade()
+
+        indexes = index_names(connection)
+    engine.dispose()
+
+    assert set(FILTER_ORDER_INDEXES) <= indexes
+    assert not {"idx_card_type", "idx_card_rarity", "idx_card_expansion"} & indexes
@@ -0,0 +1,76 @@
+"""
+    test_sessions_stress.py
+
+    Verifica di concorrenza delle unità di lavoro per thread (db_session).
+
+    Path:
+        pytests/test_sessions_stress.py
+
+    Descrizione:
+        Più thread importano, leggono, modificano ed eliminano i propri mazzi tramite DbManager nello stesso momento.
+        Al termine nessun thread deve avere errori o sessioni ancora aperte, e il pool non deve avere connessioni in uso.
+
+"""
+
+# lib
+from concurrent.futures import ThreadPoolExecutor
+from scr.db import ScopedSession
+from scr.models import DbManager, load_cards_from_db
+
+THREADS = 8
+ITERATIONS = 25
+
+
+
+def deck_string(name, worker):
+    """ Mazzo di 17 carte: 8 carte condivise da tutti i thread e una propria del thread. """
+
+    lines = [f"### {name}", "# Classe: Mago", "# Formato: Standard", "#"]
+    lines += [f"# 2x ({mana}) Carta condivisa {mana}" for mana in range(8)]
+    lines += [f"# 1x (3) Carta del thread {worker}", "#", "AAE=", "#",
+              "# Per utilizzare questo mazzo, copialo negli appunti e crea un nuovo mazzo in Hearthstone"]
+    return "\n".join(lines)
+
+
+def run_worker(index):
+    """
+    Esegue ITERATIONS cicli di lettura/scrittura.
+
+    Returns:
+        tuple: (errori, True se al thread è rimasta una sessione registrata).
+    """
+
+    db_manager = DbManager()
+    errors = []
+    for iteration in range(ITERATIONS):
+        name = f"Stress {index}-{iteration}"
+        try:
+            if not db_manager.add_deck_from_clipboard(deck_string(name, index)):
+                raise RuntimeError(f"importazione di '{name}' fallita")
+
+            stats = db_manager.get_deck_statistics(name)
+            if stats["Numero Carte"] != 17:
+                raise RuntimeError(f"statistiche errate per '{name}': {stats['Numero Carte']}")
+
+            db_manager.get_deck_summaries()
+            card = db_manager.get_card_by_name(f"Carta del thread {index}")
+            db_manager.save_card({"rarity": "Rara"}, card_id=card["id"])
+            load_cards_from_db({"rarity": "Rara"})
+
+            if iteration % 2 and not db_manager.delete_deck(name):
+                raise RuntimeError(f"eliminazione di '{name}' fallita")
+
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+
+    return errors, ScopedSession.registry.has()
+
+
+def test_concurrent_units_of_work(database):
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        results = list(executor.map(run_worker, range(THREADS)))
+
+    assert [error for errors, _ in results for error in errors] == []
+    assert not any(leaked for _, leaked in results)
+    assert database.pool.checkedout() == 0
+    assert len(DbManager().get_deck_summaries()) == THREADS * (ITERATIONS - ITERATIONS // 2)
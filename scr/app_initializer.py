@@ -16,7 +16,11 @@ from scr.views.deck_view import DeckViewFrame
 
 from scr.views.view_manager import WinController
 from scr.controller import MainController
-from scr.models import DbManager
+from scr.models import DbManager, get_deck_similarity_index
+from scr.deck_archetypes import ArchetypeWorker
+from scr.card_catalog import CardCatalog
+from scr.data_service import DataService
+from scr.autocomplete import AutocompleteService
 from scr.views.main_views import HearthstoneAppFrame
 from scr.views.builder.color_system import ColorTheme
 from utyls.screen_reader import ScreenReader
@@ -73,14 +77,48 @@ class AppInitializer:
         else:
             log.debug("ColorManager e WidgetFactory registrati correttamente.")
 
+        # Catalogo delle carte in memoria (condiviso da DbManager e finestre)
+        card_catalog = CardCatalog()
+        self.container.register("card_catalog", lambda: card_catalog)
+        if not self.container.has("card_catalog"):
+            log.error("CardCatalog non registrato correttamente.")
+        else:
+            log.debug("CardCatalog registrato correttamente.")
+
         # Gestione del database
-        db_manager = DbManager()
+        db_manager = DbManager(catalog=card_catalog)
         self.container.register("db_manager", lambda: db_manager)
         if not self.container.has("db_manager"):
             log.error("DbManager non registrato correttamente.")
         else:
             log.debug("DbManager registrato correttamente.")
 
+        # Servizio per i caricamenti in background (risultati consegnati con wx.CallAfter)
+        data_service = DataService()
+        self.container.register("data_service", lambda: data_service)
+        if not self.container.has("data_service"):
+            log.error("DataService non registrato correttamente.")
+        else:
+            log.debug("DataService registrato correttamente.")
+
+        # Ricalcolo in background degli archetipi dei mazzi (richiede NumPy)
+        index = get_deck_similarity_index()
+        if index is not None:
+            archetype_worker = ArchetypeWorker(index)
+            self.container.register("archetype_worker", lambda: archetype_worker)
+            archetype_worker.start()
+            log.debug("ArchetypeWorker registrato e avviato.")
+        else:
+            log.warning("NumPy non disponibile: archetipi dei mazzi non calcolati.")
+
+        # Suggerimenti per le barre di ricerca (nomi di carte e mazzi)
+        autocomplete = AutocompleteService(catalog=card_catalog)
+        self.container.register("autocomplete", lambda: autocomplete)
+        if not self.container.has("autocomplete"):
+            log.error("AutocompleteService non registrato correttamente.")
+        else:
+            log.debug("AutocompleteService registrato correttamente.")
+
         # Registra ScreenReader
         self.container.register("vocalizer", lambda: ScreenReader())
         if not self.container.has("vocalizer"):
@@ -144,6 +182,11 @@ class AppInitializer:
         log.info("Avvio istanziazione dei controller dell'applicazione.")
         self.main_controller.start_app()
 
+        # Il ciclo degli eventi è terminato: ferma i caricamenti in background
+        self.container.resolve("data_service").shutdown()
+        if self.container.has("archetype_worker"):
+            self.container.resolve("archetype_worker").stop()
+
 
 
 if __name__ == "__main__":
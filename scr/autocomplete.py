@@ -0,0 +1,223 @@
+"""
+    autocomplete.py
+
+    Modulo per i suggerimenti delle barre di ricerca (completamento dei nomi di carte e mazzi).
+
+    Path:
+        scr/autocomplete.py
+
+    Descrizione:
+        PrefixIndex mantiene i nomi normalizzati con fold_text in due array ordinati: i nomi interi e le loro
+        code a partire da ogni parola successiva (così "fuoco" suggerisce anche "Drago di Fuoco").
+        Un suggerimento è una ricerca binaria (bisect) seguita dalla lettura dei soli nomi con il prefisso,
+        quindi costa microsecondi anche con decine di migliaia di nomi.
+        AutocompleteService raccoglie gli indici delle carte e dei mazzi: quello delle carte segue le
+        modifiche del CardCatalog (nomi aggiunti e rimossi a ogni ricaricamento), quello dei mazzi
+        viene allineato all'elenco caricato dalla finestra dei mazzi.
+
+    Note:
+        - Gli aggiornamenti inseriscono o rimuovono solo i nomi cambiati; oltre REBUILD_RATIO l'indice
+          viene riordinato da capo, che per modifiche estese costa meno degli inserimenti singoli.
+        - I tempi di costruzione, suggerimento e aggiornamento su 50k nomi sintetici sono misurati da benchmarks/bench_autocomplete.py.
+
+"""
+
+# lib
+from bisect import bisect_left, insort
+from collections import Counter
+from threading import Lock
+from .card_catalog import fold_text
+from utyls import logger as log
+
+
+MAX_SUGGESTIONS = 8         # Suggerimenti restituiti per ogni ricerca
+REBUILD_RATIO = 8           # Oltre 1/8 dei nomi modificati l'indice viene riordinato da capo
+
+
+
+def name_entries(name):
+    """ Restituisce la voce del nome intero e le voci delle code che iniziano da ogni parola successiva. """
+
+    words = fold_text(name).split(" ")
+    full = (" ".join(words), name)
+    tails = [(" ".join(words[i:]), name) for i in range(1, len(words))]
+    return full, tails
+
+
+
+class PrefixIndex:
+    """
+    Indice dei nomi per prefisso (array ordinati e ricerca binaria).
+
+    Args:
+        names (iterable): Nomi iniziali (i duplicati sono contati una volta sola nei suggerimenti).
+    """
+
+    def __init__(self, names=()):
+        self._counts = Counter()        # nome -> occorrenze (un nome resta finché ne esiste una)
+        self._names = []                # (nome normalizzato, nome) ordinati
+        self._tails = []                # (coda del nome da una parola successiva, nome) ordinati
+        self._lock = Lock()             # Aggiornamenti dai thread del catalogo, suggerimenti dall'interfaccia
+        self.update(added=names)
+
+
+    def __len__(self):
+        return len(self._counts)
+
+
+    def __contains__(self, name):
+        return name in self._counts
+
+
+    def _rebuild(self):
+        """ Ricostruisce gli array ordinati da tutti i nomi presenti. """
+
+        names, tails = [], []
+        for name in self._counts:
+            full, name_tails = name_entries(name)
+            names.append(full)
+            tails.extend(name_tails)
+        names.sort()
+        tails.sort()
+        self._names, self._tails = names, tails
+
+
+    @staticmethod
+    def _remove_entry(entries, entry):
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+
+    def update(self, added=(), removed=()):
+        """
+        Aggiunge e rimuove nomi dall'indice.
+
+        Args:
+            added (iterable): Nomi aggiunti (una voce per ogni occorrenza).
+            removed (iterable): Nomi rimossi (una voce per ogni occorrenza).
+        """
+
+        with self._lock:
+            new_names, old_names = [], []
+            for name in removed:
+                if self._counts[name] <= 1:
+                    if self._counts.pop(name, 0):
+                        old_names.append(name)
+                else:
+                    self._counts[name] -= 1
+
+            for name in added:
+                self._counts[name] += 1
+                if self._counts[name] == 1:
+                    new_names.append(name)
+
+            changes = len(new_names) + len(old_names)
+            if not changes:
+                return
+
+            if changes > len(self._names) // REBUILD_RATIO:
+                self._rebuild()
+            else:
+                for name in old_names:
+                    full, tails = name_entries(name)
+                    self._remove_entry(self._names, full)
+                    for tail in tails:
+                        self._remove_entry(self._tails, tail)
+
+                for name in new_names:
+                    full, tails = name_entries(name)
+                    insort(self._names, full)
+                    for tail in tails:
+                        insort(self._tails, tail)
+
+        log.debug(f"Indice dei suggerimenti aggiornato: +{len(new_names)} -{len(old_names)} nomi ({len(self._counts)} in totale).")
+
+
+    def sync(self, names):
+        """ Allinea l'indice all'elenco completo dei nomi, applicando solo le differenze. """
+
+        with self._lock:
+            current = Counter(self._counts)
+        wanted = Counter(names)
+        self.update(added=(wanted - current).elements(), removed=(current - wanted).elements())
+
+
+    def suggest(self, text, limit=MAX_SUGGESTIONS):
+        """
+        Restituisce i nomi che iniziano con il testo, poi quelli con una parola che inizia con il testo.
+
+        Args:
+            text (str): Testo digitato (maiuscole, accenti e spazi superflui sono ignorati).
+            limit (int): Numero massimo di suggerimenti.
+
+        Returns:
+            list: Nomi suggeriti, in ordine alfabetico all'interno dei due gruppi.
+        """
+
+        prefix = fold_text(text)
+        if not prefix or limit <= 0:
+            return []
+
+        suggestions, seen = [], set()
+        with self._lock:
+            for entries in (self._names, self._tails):
+                position = bisect_left(entries, (prefix,))
+                while position < len(entries):
+                    folded, name = entries[position]
+                    if not folded.startswith(prefix):
+                        break
+                    if name not in seen:
+                        seen.add(name)
+                        suggestions.append(name)
+                        if len(suggestions) == limit:
+                            return suggestions
+                    position += 1
+        return suggestions
+
+
+
+class AutocompleteService:
+    """
+    Suggerimenti per le barre di ricerca, per sorgente ("cards" o "decks").
+
+    Args:
+        catalog (CardCatalog): Catalogo da cui l'indice delle carte riceve i nomi aggiunti e rimossi (opzionale).
+    """
+
+    SOURCES = ("cards", "decks")
+
+    def __init__(self, catalog=None):
+        self.catalog = catalog
+        self.indexes = {source: PrefixIndex() for source in self.SOURCES}
+        if catalog is not None:
+            catalog.add_listener(self.on_catalog_changed)
+
+
+    def on_catalog_changed(self, added, removed):
+        """ Applica all'indice delle carte i nomi cambiati nel catalogo. """
+        self.indexes["cards"].update(added=added, removed=removed)
+
+
+    def sync(self, source, names):
+        """ Allinea l'indice della sorgente all'elenco completo dei nomi (es. i mazzi appena caricati). """
+        self.indexes[source].sync(names)
+
+
+    def suggest(self, source, text, limit=MAX_SUGGESTIONS):
+        """ Restituisce i nomi della sorgente che completano il testo. """
+
+        index = self.indexes.get(source)
+        if index is None:
+            log.warning(f"Sorgente di suggerimenti sconosciuta: {source}")
+            return []
+
+        if source == "cards" and self.catalog is not None:
+            self.catalog.refresh()      # Riporta nell'indice le scritture recenti sulle carte
+        return index.suggest(text, limit)
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
@@ -0,0 +1,248 @@
+"""
+    card_catalog.py
+
+    Modulo per la cache in memoria del catalogo delle carte.
+
+    Path:
+        scr/card_catalog.py
+
+    Descrizione:
+        Il CardCatalog mantiene un'istantanea immutabile della tabella cards, indicizzata per id
+        e per nome normalizzato, così che le ricerche frequenti (get_card_by_name, is_card_in_database,
+        controlli delle finestre) diventino accessi a dizionario invece di query SQLite.
+
+    Note:
+        - L'istantanea viene ricaricata in modo pigro quando la generazione di scrittura delle carte
+          (scr.db.card_write_generation) cambia: ogni scrittura su cards deve incrementarla.
+        - I contatori hits/misses/reloads sono esposti da get_stats() a scopo diagnostico.
+        - fuzzy_search() usa un indice per trigrammi (scr.trigram_index) costruito al primo uso
+          per ogni istantanea.
+        - Gli ascoltatori registrati con add_listener() ricevono, a ogni ricaricamento, i soli nomi
+          aggiunti e rimossi rispetto all'istantanea precedente (es. l'indice dei suggerimenti).
+
+"""
+
+# lib
+import unicodedata
+from threading import Lock
+from typing import NamedTuple, Optional
+from .db import read_session, Card, get_card_generation
+from utyls import logger as log
+
+
+
+class CardRecord(NamedTuple):
+    """ Copia immutabile di una riga della tabella cards. """
+
+    id: int
+    name: str
+    class_name: Optional[str]
+    mana_cost: int
+    card_type: str
+    spell_type: Optional[str]
+    card_subtype: Optional[str]
+    attack: Optional[int]
+    health: Optional[int]
+    durability: Optional[int]
+    rarity: Optional[str]
+    expansion: Optional[str]
+    owned_quantity: int = 0
+
+    @classmethod
+    def from_card(cls, card):
+        """ Crea il record a partire da un oggetto Card. """
+        return cls(**{field: getattr(card, field) for field in cls._fields})
+
+    def as_dict(self):
+        """ Restituisce il record nel formato di serialize_card. """
+        return self._asdict()
+
+
+def normalize_card_name(name):
+    """ Normalizza un nome di carta per le ricerche (spazi superflui e maiuscole ignorati). """
+    return " ".join(str(name).split()).casefold()
+
+
+def fold_text(text):
+    """ Normalizza un testo per confronti e ordinamenti: come normalize_card_name, ignorando anche gli accenti. """
+
+    text = str(text)
+    if text.isascii():
+        return normalize_card_name(text)
+
+    decomposed = unicodedata.normalize("NFKD", text)
+    return normalize_card_name("".join(char for char in decomposed if not unicodedata.combining(char)))
+
+
+
+class CardCatalog:
+    """
+    Cache in memoria delle carte, invalidata dalla generazione di scrittura della tabella cards.
+
+    Attributi:
+        hits (int): Ricerche che hanno trovato la carta.
+        misses (int): Ricerche senza risultato.
+        reloads (int): Numero di ricaricamenti dal database.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_name = {}
+        self._generation = None         # Generazione dell'istantanea caricata (None = mai caricata)
+        self._fuzzy_index = None        # (generazione, TrigramIndex) per la ricerca approssimata
+        self._listeners = []            # Chiamati con (nomi aggiunti, nomi rimossi) dopo ogni ricaricamento
+        self._lock = Lock()             # Per thread-safety durante il ricaricamento
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+
+    def _ensure_loaded(self):
+        """ Ricarica l'istantanea se la generazione di scrittura delle carte è cambiata. """
+
+        generation = get_card_generation()
+        if self._generation == generation:
+            return
+
+        with self._lock:
+            generation = get_card_generation()
+            if self._generation == generation:
+                return
+
+            # Sessione separata: anche se chiamato dentro un db_session() con scritture in sospeso, legge solo dati confermati
+            with read_session() as session:
+                cards = session.query(Card).order_by(Card.id).all()
+                records = [CardRecord.from_card(card) for card in cards]
+
+            by_id = {record.id: record for record in records}
+            by_name = {}
+            for record in records:
+                # A parità di nome vince la carta con l'id più basso, come con filter_by(...).first()
+                by_name.setdefault(normalize_card_name(record.name), record)
+
+            previous = self._by_id
+            self._by_id, self._by_name = by_id, by_name
+            self._generation = generation
+            self.reloads += 1
+            log.debug(f"Catalogo carte ricaricato: {len(by_id)} carte (generazione {generation}).")
+
+            if self._listeners:
+                added, removed = self._name_changes(previous, by_id)
+                if added or removed:
+                    for listener in self._listeners:
+                        listener(added, removed)
+
+
+    @staticmethod
+    def _name_changes(previous, current):
+        """ Restituisce i nomi aggiunti e rimossi tra due istantanee (una voce per carta). """
+
+        added = [record.name for card_id, record in current.items() if card_id not in previous or previous[card_id].name != record.name]
+        removed = [record.name for card_id, record in previous.items() if card_id not in current or current[card_id].name != record.name]
+        return added, removed
+
+
+    def add_listener(self, listener):
+        """
+        Registra una funzione chiamata con (nomi aggiunti, nomi rimossi) a ogni ricaricamento.
+        Se il catalogo è già caricato, la funzione riceve subito tutti i nomi presenti.
+        """
+
+        with self._lock:
+            self._listeners.append(listener)
+            if self._by_id:
+                listener([record.name for record in self._by_id.values()], [])
+
+
+    def refresh(self):
+        """ Ricarica l'istantanea (e avvisa gli ascoltatori) se le carte sono cambiate dall'ultimo caricamento. """
+        self._ensure_loaded()
+
+
+    def _count(self, record):
+        """ Aggiorna i contatori diagnostici e restituisce il record. """
+
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+
+    def get(self, card_id):
+        """ Restituisce il CardRecord con l'id indicato, oppure None. """
+
+        self._ensure_loaded()
+        return self._count(self._by_id.get(card_id))
+
+
+    def get_by_name(self, card_name):
+        """ Restituisce il CardRecord con il nome indicato (normalizzato), oppure None. """
+
+        if not card_name:
+            return None
+
+        self._ensure_loaded()
+        return self._count(self._by_name.get(normalize_card_name(card_name)))
+
+
+    def fuzzy_search(self, text, limit=10, min_score=0.3):
+        """
+        Ricerca approssimata per nome (errori di battitura, accenti e maiuscole ignorati).
+
+        Args:
+            text (str): Nome cercato.
+            limit (int): Numero massimo di risultati.
+            min_score (float): Somiglianza minima dei candidati.
+
+        Returns:
+            list: Coppie (CardRecord, somiglianza) dalla più simile.
+        """
+
+        from .trigram_index import TrigramIndex
+
+        self._ensure_loaded()
+        generation, by_id = self._generation, self._by_id
+        cached = self._fuzzy_index
+        if cached is None or cached[0] != generation:
+            with self._lock:
+                cached = self._fuzzy_index
+                if cached is None or cached[0] != generation:
+                    cached = (generation, TrigramIndex((record.id, record.name) for record in by_id.values()))
+                    self._fuzzy_index = cached
+
+        return [(by_id[match.key], match.score) for match in cached[1].search(text, limit=limit, min_score=min_score) if match.key in by_id]
+
+
+    def __contains__(self, card_name):
+        return self.get_by_name(card_name) is not None
+
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._by_id)
+
+
+    def invalidate(self):
+        """ Forza il ricaricamento dell'istantanea alla prossima ricerca. """
+        self._generation = None
+
+
+    def get_stats(self):
+        """ Restituisce i contatori diagnostici della cache. """
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "size": len(self._by_id),
+            "generation": self._generation,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
@@ -0,0 +1,382 @@
+"""
+    card_importer.py
+
+    Modulo per l'arricchimento della tabella cards da un archivio locale di carte (formato HearthstoneJSON).
+
+    Path:
+        scr/card_importer.py
+
+    Descrizione:
+        import_card_data() legge il file JSON come flusso (un oggetto alla volta, senza caricare l'intero array),
+        converte ogni carta nelle colonne di Card con i valori italiani di utyls/enu_glob.py e la salva
+        con inserimenti e aggiornamenti multipli a blocchi di BATCH_SIZE, in un'unica transazione.
+        Le carte sono identificate dal dbf_id; le carte già presenti senza dbf_id (inserite a mano o create
+        con valori "Unknown" dall'importazione dei mazzi) vengono associate per nome e completate.
+        Ogni carta salvata conserva l'impronta (source_hash) dei valori importati: alla riesecuzione le carte
+        con la stessa impronta vengono saltate senza scrivere nel database.
+
+    Note:
+        - I nomi possono essere stringhe (file di una lingua, es. itIT/cards.json) o dizionari per lingua
+          (cards.json con tutte le lingue): si usa DEFAULT_LOCALE, poi FALLBACK_LOCALE.
+        - Valori sconosciuti (nuove espansioni o tipi) restano con il codice del file, così non si perde l'informazione.
+        - Uso senza interfaccia:
+              python -m scr.card_importer cards.collectible.json
+              python -m scr.card_importer cards.json --all --locale enUS
+        - La prima importazione e la riesecuzione di un archivio sintetico sono misurate da benchmarks/bench_card_importer.py.
+
+"""
+
+# lib
+import hashlib, json, re
+from typing import NamedTuple
+from sqlalchemy import insert, update
+from .db import db_session, Card, mark_cards_changed
+from .card_catalog import normalize_card_name
+from .models import refresh_deck_stats_for_cards
+from utyls import enu_glob as eg
+from utyls import logger as log
+
+
+DEFAULT_LOCALE = "itIT"
+FALLBACK_LOCALE = "enUS"
+BATCH_SIZE = 5000               # Righe per ogni inserimento o aggiornamento multiplo
+CHUNK_SIZE = 1 << 20            # Caratteri letti per volta dal file
+
+SEPARATORS_RE = re.compile(r"[\s,]*")
+NUMBER_CHARS = "0123456789.eE+-"
+
+# Conversione dei codici HearthstoneJSON nei valori delle enumerazioni italiane
+CLASS_NAMES = {
+    "NEUTRAL": eg.EnuHero.ALLCLASS.value,
+    "DEATHKNIGHT": eg.EnuHero.KNIGHTDEATH.value,
+    "DEMONHUNTER": eg.EnuHero.SHADOHUNTER.value,
+    "DRUID": eg.EnuHero.DRUIDO.value,
+    "HUNTER": eg.EnuHero.CACCIATORE.value,
+    "MAGE": eg.EnuHero.MAGO.value,
+    "PALADIN": eg.EnuHero.PALADINO.value,
+    "PRIEST": eg.EnuHero.SACERDOTE.value,
+    "ROGUE": eg.EnuHero.LADRO.value,
+    "SHAMAN": eg.EnuHero.SCIAMANO.value,
+    "WARLOCK": eg.EnuHero.STREGONE.value,
+    "WARRIOR": eg.EnuHero.GUERRIERO.value,
+}
+
+CARD_TYPES = {
+    "MINION": eg.EnuCardType.CREATURA.value,
+    "SPELL": eg.EnuCardType.MAGIA.value,
+    "WEAPON": eg.EnuCardType.ARMA.value,
+    "HERO": eg.EnuCardType.EROE.value,
+    "LOCATION": eg.EnuCardType.LUOGO.value,
+}
+
+SPELL_SCHOOLS = {
+    "ARCANE": eg.EnuSpellSubType.ARCANO.value,
+    "FEL": eg.EnuSpellSubType.EMPIETA.value,
+    "FIRE": eg.EnuSpellSubType.FUOCO.value,
+    "FROST": eg.EnuSpellSubType.GELO.value,
+    "HOLY": eg.EnuSpellSubType.SACRO.value,
+    "NATURE": eg.EnuSpellSubType.NATURA.value,
+    "SHADOW": eg.EnuSpellSubType.OMBRA.value,
+}
+
+MINION_RACES = {
+    "BEAST": eg.EnuPetSubType.BESTIA.value,
+    "DEMON": eg.EnuPetSubType.DEMONE.value,
+    "DRAGON": eg.EnuPetSubType.DRAGO.value,
+    "ELEMENTAL": eg.EnuPetSubType.ELEMENTALE.value,
+    "MECHANICAL": eg.EnuPetSubType.MECCANICO.value,
+    "MURLOC": eg.EnuPetSubType.MURLOC.value,
+    "PIRATE": eg.EnuPetSubType.PIRATA.value,
+    "TOTEM": eg.EnuPetSubType.TOTEM.value,
+    "UNDEAD": eg.EnuPetSubType.NON_MORTO.value,
+}
+
+RARITIES = {
+    "FREE": eg.EnuRarity.COMUNE.value,
+    "COMMON": eg.EnuRarity.COMUNE.value,
+    "RARE": eg.EnuRarity.RARA.value,
+    "EPIC": eg.EnuRarity.EPICA.value,
+    "LEGENDARY": eg.EnuRarity.LEGGENDARIA.value,
+}
+
+EXPANSIONS = {
+    "CORE": eg.EnuExpansion.SET_BASE.value,
+    "EVENT": eg.EnuExpansion.EVENTO.value,
+    "NAXX": eg.EnuExpansion.MALEDIZIONE_NAXXRAMAS.value,
+    "GVG": eg.EnuExpansion.GOBLIN_VS_GNOMI.value,
+    "BRM": eg.EnuExpansion.BLACKROCK_MOUNTAIN.value,
+    "TGT": eg.EnuExpansion.GRAN_TOURNAMENT.value,
+    "LOE": eg.EnuExpansion.LEGA_DEGLI_ESPLORATORI.value,
+    "OG": eg.EnuExpansion.SUSSURRI_DEGLI_DEI_ANTICHI.value,
+    "KARA": eg.EnuExpansion.UNA_NOTTE_A_KARAZHAN.value,
+    "GANGS": eg.EnuExpansion.QUARTIERI_MALFAMATI_DI_GADGETZAN.value,
+    "UNGORO": eg.EnuExpansion.VIAGGIO_A_UNGORO.value,
+    "ICECROWN": eg.EnuExpansion.CAVALIERI_DEL_TRONO_GELATO.value,
+    "LOOTAPALOOZA": eg.EnuExpansion.KOBOLD_E_CATACOMBE.value,
+    "GILNEAS": eg.EnuExpansion.IL_BOSCO_STREGATO.value,
+    "BOOMSDAY": eg.EnuExpansion.PROGETTO_BOOMSDAY.value,
+    "TROLL": eg.EnuExpansion.RUMBLE_DI_RASTAKHAN.value,
+    "DALARAN": eg.EnuExpansion.L_ASCESA_DELLE_OMBRE.value,
+    "ULDUM": eg.EnuExpansion.I_SALVATORI_DI_ULDUM.value,
+    "DRAGONS": eg.EnuExpansion.LA_DISCESA_DEI_DRAGHI.value,
+    "BLACK_TEMPLE": eg.EnuExpansion.LE_CENERI_DI_OUTLAND.value,
+    "SCHOLOMANCE": eg.EnuExpansion.ACCADEMIA_SCHOLOMANCE.value,
+    "DARKMOON_FAIRE": eg.EnuExpansion.DARKMOON_FAIRE.value,
+    "THE_BARRENS": eg.EnuExpansion.FORGED_IN_THE_BARRENS.value,
+    "STORMWIND": eg.EnuExpansion.UNITED_IN_STORMWIND.value,
+    "ALTERAC_VALLEY": eg.EnuExpansion.FRACTURED_IN_ALTERAC_VALLEY.value,
+    "THE_SUNKEN_CITY": eg.EnuExpansion.VOYAGE_TO_THE_SUNKEN_CITY.value,
+    "REVENDRETH": eg.EnuExpansion.ASSASSINIO_AL_CASTELLO_DI_NATHRIA.value,
+    "RETURN_OF_THE_LICH_KING": eg.EnuExpansion.MARCH_OF_THE_LICH_KING.value,
+    "BATTLE_OF_THE_BANDS": eg.EnuExpansion.FESTIVAL_OF_LEGENDS.value,
+    "TITANS": eg.EnuExpansion.TITANS.value,
+    "WILD_WEST": eg.EnuExpansion.SHOWDOWN_IN_THE_BADLANDS.value,
+    "WHIZBANGS_WORKSHOP": eg.EnuExpansion.WHIZBANGS_WORKSHOP.value,
+    "ISLAND_VACATION": eg.EnuExpansion.PERILS_IN_PARADISE.value,
+    "SPACE": eg.EnuExpansion.THE_GREAT_DARK_BEYOND.value,
+}
+
+# Colonne scritte dall'importazione (nell'ordine usato per l'impronta)
+IMPORTED_COLUMNS = (
+    "dbf_id", "name", "class_name", "mana_cost", "card_type", "spell_type", "card_subtype",
+    "attack", "health", "durability", "rarity", "expansion"
+)
+
+
+
+class CardImportReport(NamedTuple):
+    """ Esito di un'importazione. """
+
+    records: int            # Oggetti letti dal file
+    ignored: int            # Carte non importabili (non collezionabili, tipo non supportato, senza nome o dbf_id)
+    inserted: int           # Nuove carte
+    updated: int            # Carte esistenti aggiornate (comprese quelle associate per nome)
+    unchanged: int          # Carte saltate perché l'impronta non è cambiata
+
+
+
+def iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """
+    Restituisce uno alla volta gli elementi di un array JSON letto da un file, a blocchi di chunk_size caratteri.
+
+    Raises:
+        ValueError: Se il file non contiene un array JSON o è troncato.
+    """
+
+    decoder = json.JSONDecoder()
+    buffer, position, eof, started = "", 0, False, False
+
+    while True:
+        position = SEPARATORS_RE.match(buffer, position).end()
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Il file non contiene un array JSON.")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == "]":
+                return
+
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # L'elemento continua nel blocco successivo
+            else:
+                # Un numero seguito solo da cifre o dalla fine del blocco potrebbe continuare nel successivo
+                number = isinstance(value, (int, float)) and not isinstance(value, bool)
+                if eof or not number or (end < len(buffer) and buffer[end] not in NUMBER_CHARS):
+                    yield value
+                    position = end
+                    continue
+
+        elif eof:
+            raise ValueError("File JSON troncato: manca la chiusura dell'array.")
+
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+
+def localized(value, locale=DEFAULT_LOCALE):
+    """ Restituisce il testo nella lingua richiesta (i dizionari per lingua usano FALLBACK_LOCALE se manca). """
+
+    if isinstance(value, dict):
+        return value.get(locale) or value.get(FALLBACK_LOCALE)
+    return value
+
+
+def _join_codes(codes, names):
+    """ Converte una lista di codici nei nomi italiani, separati da virgola (i codici sconosciuti restano invariati). """
+    return ", ".join(names.get(code, code) for code in codes) or None
+
+
+def map_card_record(record, locale=DEFAULT_LOCALE, collectible_only=True):
+    """
+    Converte una carta HearthstoneJSON nei valori delle colonne di Card.
+
+    Returns:
+        dict | None: Valori di IMPORTED_COLUMNS, oppure None se la carta non va importata.
+    """
+
+    if not isinstance(record, dict) or (collectible_only and not record.get("collectible")):
+        return None
+
+    card_type = CARD_TYPES.get(record.get("type"))
+    name = localized(record.get("name"), locale)
+    dbf_id = record.get("dbfId")
+    if card_type is None or not name or dbf_id is None:
+        return None
+
+    spell_type = card_subtype = None
+    if card_type == eg.EnuCardType.MAGIA.value:
+        secret = "SECRET" in record.get("mechanics", ())
+        spell_type = eg.EnuSpellType.SEGRETO.value if secret else eg.EnuSpellType.INCANTO.value
+        school = record.get("spellSchool")
+        card_subtype = SPELL_SCHOOLS.get(school, school)
+    elif card_type == eg.EnuCardType.CREATURA.value:
+        races = record.get("races") or ([record["race"]] if record.get("race") else [])
+        card_subtype = _join_codes(races, MINION_RACES)
+
+    classes = record.get("classes") or [record.get("cardClass", "NEUTRAL")]
+    expansion = record.get("set")
+
+    return {
+        "dbf_id": dbf_id,
+        "name": name,
+        "class_name": _join_codes(classes, CLASS_NAMES),
+        "mana_cost": record.get("cost", 0),
+        "card_type": card_type,
+        "spell_type": spell_type,
+        "card_subtype": card_subtype,
+        "attack": record.get("attack") if card_type != eg.EnuCardType.MAGIA.value else None,
+        "health": record.get("health"),
+        "durability": record.get("durability"),
+        "rarity": RARITIES.get(record.get("rarity"), record.get("rarity")),
+        "expansion": EXPANSIONS.get(expansion, expansion),
+    }
+
+
+def content_hash(values):
+    """ Impronta dei valori importati di una carta (cambia solo se cambia almeno una colonna). """
+    return hashlib.blake2b(repr(tuple(values[column] for column in IMPORTED_COLUMNS)).encode(), digest_size=8).hexdigest()
+
+
+def import_card_records(session, records, locale=DEFAULT_LOCALE, collectible_only=True, batch_size=BATCH_SIZE):
+    """
+    Salva le carte nella sessione indicata (il commit è a carico del chiamante).
+
+    Args:
+        session: Sessione del database.
+        records (iterable): Oggetti HearthstoneJSON (es. iter_json_array).
+        locale (str): Lingua dei nomi.
+        collectible_only (bool): Importa solo le carte collezionabili.
+        batch_size (int): Righe per ogni inserimento o aggiornamento multiplo.
+
+    Returns:
+        CardImportReport: Conteggi dell'importazione.
+    """
+
+    # Stato attuale: impronte delle carte con dbf_id e carte senza dbf_id da associare per nome
+    known = {}                  # dbf_id -> (id della carta o None se inserita in questa importazione, impronta)
+    unmatched = {}              # nome normalizzato -> id delle carte senza dbf_id (dal più basso)
+    for card_id, dbf_id, name, source_hash in session.query(Card.id, Card.dbf_id, Card.name, Card.source_hash).order_by(Card.id):
+        if dbf_id is None:
+            unmatched.setdefault(normalize_card_name(name), []).append(card_id)
+        else:
+            known.setdefault(dbf_id, (card_id, source_hash))
+
+    inserts, updates, updated_ids = [], [], []
+    records_count = ignored = inserted = updated = unchanged = 0
+
+    def flush(force=False):
+        nonlocal inserted, updated
+        if inserts and (force or len(inserts) >= batch_size):
+            session.execute(insert(Card), inserts)
+            inserted += len(inserts)
+            inserts.clear()
+        if updates and (force or len(updates) >= batch_size):
+            session.execute(update(Card), updates)
+            updated += len(updates)
+            updates.clear()
+
+    for record in records:
+        records_count += 1
+        values = map_card_record(record, locale, collectible_only)
+        if values is None:
+            ignored += 1
+            continue
+
+        values["source_hash"] = source_hash = content_hash(values)
+        current = known.get(values["dbf_id"])
+        if current is not None:
+            card_id, current_hash = current
+            if card_id is None or current_hash == source_hash:
+                unchanged += 1      # Impronta uguale (o dbf_id ripetuto nel file)
+                continue
+            updates.append({"id": card_id, **values})
+            updated_ids.append(card_id)
+        else:
+            candidates = unmatched.get(normalize_card_name(values["name"]))
+            if candidates:
+                card_id = candidates.pop(0)
+                updates.append({"id": card_id, **values})
+                updated_ids.append(card_id)
+            else:
+                card_id = None
+                inserts.append(values)
+
+        known[values["dbf_id"]] = (card_id, source_hash)
+        flush()
+
+    flush(force=True)
+
+    if inserted or updated:
+        mark_cards_changed(session)         # Il catalogo carte verrà ricaricato dopo il commit
+        if updated_ids:
+            refresh_deck_stats_for_cards(session, updated_ids)     # Tipo, costo e rarità cambiano le statistiche
+
+    return CardImportReport(records_count, ignored, inserted, updated, unchanged)
+
+
+def import_card_data(path, locale=DEFAULT_LOCALE, collectible_only=True, batch_size=BATCH_SIZE):
+    """
+    Importa un archivio di carte HearthstoneJSON in un'unica transazione.
+
+    Args:
+        path (str): Percorso del file JSON.
+        locale (str): Lingua dei nomi (es. "itIT").
+        collectible_only (bool): Importa solo le carte collezionabili.
+        batch_size (int): Righe per ogni inserimento o aggiornamento multiplo.
+
+    Returns:
+        CardImportReport: Conteggi dell'importazione.
+    """
+
+    with open(path, encoding="utf-8") as stream, db_session() as session:
+        report = import_card_records(session, iter_json_array(stream), locale, collectible_only, batch_size)
+
+    log.info(
+        f"Importazione carte da '{path}': {report.inserted} aggiunte, {report.updated} aggiornate, "
+        f"{report.unchanged} invariate, {report.ignored} ignorate su {report.records}."
+    )
+    return report
+
+
+
+#@@@# Start del modulo
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importa un archivio di carte HearthstoneJSON nel database.")
+    parser.add_argument("path", help="File JSON delle carte (es. cards.collectible.json)")
+    parser.add_argument("--locale", default=DEFAULT_LOCALE, help=f"Lingua dei nomi (predefinita: {DEFAULT_LOCALE})")
+    parser.add_argument("--all", action="store_true", help="Importa anche le carte non collezionabili")
+    arguments = parser.parse_args()
+
+    print(import_card_data(arguments.path, arguments.locale, collectible_only=not arguments.all))
+else:
+    log.debug(f"Carico: {__name__}")
@@ -0,0 +1,315 @@
+"""
+    card_store.py
+
+    Modulo per l'archivio colonnare (NumPy) della collezione di carte.
+
+    Path:
+        scr/card_store.py
+
+    Descrizione:
+        CardColumnStore mantiene in memoria la tabella cards in forma colonnare: costo, attacco, vita
+        e durabilità come array di interi, tipo, tipo magia, sottotipo, rarità, espansione e classe come
+        codici di dizionario. I filtri del FilterDialog e l'ordinamento della collezione (mana, nome)
+        vengono valutati come maschere booleane e argsort, senza costruire query né oggetti ORM.
+
+    Note:
+        - NumPy è opzionale: se non è installato NUMPY_AVAILABLE è False e si usa il percorso SQL.
+        - L'archivio si ricarica quando cambia la generazione di scrittura delle carte (scr.db.card_write_generation),
+          leggendo solo dati confermati (scr.db.read_session).
+        - Ogni caricamento produce un'istantanea immutabile (CardColumns) sostituita con un'unica assegnazione:
+          chi la legge la cattura una volta per chiamata, quindi posizioni, righe e generazione vengono sempre dalla stessa.
+        - La ricerca per nome ignora maiuscole e accenti (fold_text), come l'indice FTS5 del percorso SQL.
+        - Il confronto dei tempi con il percorso SQL è in benchmarks/bench_card_store.py.
+
+"""
+
+# lib
+from threading import Lock
+from typing import NamedTuple, Optional
+from .db import read_session, Card, get_card_generation
+from .card_catalog import fold_text
+from utyls import logger as log
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+CARD_FIELDS = (
+    "id", "name", "class_name", "mana_cost", "card_type", "spell_type", "card_subtype",
+    "attack", "health", "durability", "rarity", "expansion"
+)
+INT_COLUMNS = ("mana_cost", "attack", "health", "durability")                                        # Colonne intere
+CODE_COLUMNS = ("class_name", "card_type", "spell_type", "card_subtype", "rarity", "expansion")     # Colonne codificate a dizionario
+NULL_VALUE = -1                                                                                     # Valore/codice per i NULL
+
+# Opzioni dei filtri che equivalgono a "nessun filtro" (come in scr.models)
+ANY_VALUES = ("tutti", "Tutti", "qualsiasi", "Qualsiasi", "", "all", "All", None)
+
+
+
+class CardColumns(NamedTuple):
+    """
+    Istantanea immutabile dell'archivio colonnare, da non modificare (vedi CardColumnStore.snapshot).
+
+    I codici delle colonne testuali sono assegnati in ordine alfabetico dei valori, quindi
+    ordinare per codice equivale a ordinare per testo (i NULL, codice -1, vengono per primi come in SQLite).
+    """
+
+    generation: Optional[int]   # Generazione di scrittura delle carte caricate (None = da ricaricare)
+    rows: tuple                 # Righe originali (tuple nell'ordine di CARD_FIELDS)
+    columns: dict               # nome colonna -> array NumPy
+    vocabularies: dict          # nome colonna -> {valore: codice}
+    name_rank: object           # numpy.ndarray: posizione di ogni nome nell'ordinamento alfabetico
+    folded_names: object        # numpy.ndarray: nomi normalizzati con fold_text per la ricerca per sottostringa
+    position_by_id: dict        # id carta -> posizione
+
+
+    @classmethod
+    def from_rows(cls, rows, generation=None):
+        """
+        Costruisce le colonne a partire da righe nell'ordine di CARD_FIELDS.
+
+        Args:
+            rows (list): Lista di tuple (id, name, class_name, mana_cost, ...).
+            generation (int): Generazione di scrittura delle righe.
+        """
+
+        rows = tuple(tuple(row) for row in rows)
+        by_field = dict(zip(CARD_FIELDS, zip(*rows))) if rows else {field: () for field in CARD_FIELDS}
+
+        columns = {"id": np.fromiter(by_field["id"], dtype=np.int64, count=len(rows))}
+        for field in INT_COLUMNS:
+            columns[field] = np.fromiter(
+                (NULL_VALUE if value is None else value for value in by_field[field]), dtype=np.int32, count=len(rows)
+            )
+
+        vocabularies = {}
+        for field in CODE_COLUMNS:
+            values = by_field[field]
+            vocabulary = {value: code for code, value in enumerate(sorted({v for v in values if v is not None}))}
+            vocabularies[field] = vocabulary
+            columns[field] = np.fromiter(
+                (vocabulary.get(value, NULL_VALUE) for value in values), dtype=np.int32, count=len(rows)
+            )
+
+        names = by_field["name"]
+        name_rank = np.empty(len(rows), dtype=np.int64)
+        name_rank[np.argsort(np.array(names, dtype=object), kind="stable")] = np.arange(len(rows))
+
+        return cls(
+            generation=generation,
+            rows=rows,
+            columns=columns,
+            vocabularies=vocabularies,
+            name_rank=name_rank,
+            folded_names=np.array([fold_text(name) for name in names], dtype=str),
+            position_by_id=dict(zip(by_field["id"], range(len(rows)))),
+        )
+
+
+    @property
+    def size(self):
+        """ Numero di carte dell'istantanea. """
+        return len(self.rows)
+
+
+    #@@# Filtri e ordinamento
+
+    def mask(self, filters=None):
+        """
+        Valuta i filtri del FilterDialog come maschera booleana.
+
+        Args:
+            filters (dict): Filtri nel formato di load_cards_from_db.
+
+        Returns:
+            numpy.ndarray: Maschera booleana con una posizione per carta.
+        """
+
+        mask = np.ones(self.size, dtype=bool)
+        if not filters:
+            return mask
+
+        if filters.get("name"):
+            # Ogni termine deve comparire nel nome (come la ricerca FTS/LIKE)
+            for token in fold_text(filters["name"]).split():
+                mask &= np.char.find(self.folded_names, token) >= 0
+
+        for field in INT_COLUMNS:
+            value = filters.get(field)
+            if value and value not in ANY_VALUES:
+                mask &= self.columns[field] == int(value)
+
+        for field in CODE_COLUMNS:
+            value = filters.get(field)
+            if value and value not in ANY_VALUES:
+                code = self.vocabularies[field].get(value)
+                if code is None:
+                    return np.zeros(self.size, dtype=bool)
+                mask &= self.columns[field] == code
+
+        return mask
+
+
+    def filter_by_name(self, indices, text):
+        """
+        Restringe le posizioni indicate alle carte il cui nome contiene tutti i termini del testo.
+
+        L'ordine delle posizioni viene mantenuto (usato dalla ricerca incrementale, vedi scr.search_session).
+        """
+
+        indices = np.asarray(indices, dtype=np.int64)
+        mask = np.ones(len(indices), dtype=bool)
+        names = self.folded_names[indices]
+        for token in fold_text(text).split():
+            mask &= np.char.find(names, token) >= 0
+        return indices[mask]
+
+
+    def positions_for_ids(self, card_ids):
+        """ Restituisce le posizioni delle carte con gli id indicati, nello stesso ordine (gli id assenti sono ignorati). """
+
+        position_by_id = self.position_by_id
+        return np.array([position_by_id[card_id] for card_id in card_ids if card_id in position_by_id], dtype=np.int64)
+
+
+    def sort_indices(self, indices, column=None, reverse=False):
+        """
+        Ordina le posizioni indicate.
+
+        Args:
+            indices (numpy.ndarray): Posizioni delle carte da ordinare.
+            column (str): Colonna di ordinamento; None = ordine della collezione (mana, nome).
+            reverse (bool): Ordine decrescente.
+
+        Returns:
+            numpy.ndarray: Posizioni ordinate.
+        """
+
+        if column is None:
+            order = np.lexsort((self.name_rank[indices], self.columns["mana_cost"][indices]))
+        else:
+            keys = self.name_rank if column == "name" else self.columns[column]
+            order = np.argsort(keys[indices], kind="stable")
+
+        if reverse:
+            order = order[::-1]
+        return indices[order]
+
+
+    def query(self, filters=None, column=None, reverse=False):
+        """ Restituisce le posizioni delle carte che soddisfano i filtri, già ordinate. """
+        return self.sort_indices(np.flatnonzero(self.mask(filters)), column=column, reverse=reverse)
+
+
+    def rows_at(self, indices):
+        """ Restituisce le carte alle posizioni indicate come dizionari (formato di serialize_card). """
+        return [dict(zip(CARD_FIELDS, self.rows[i])) for i in indices.tolist()]
+
+
+    def all_rows(self):
+        """ Restituisce tutte le carte, nell'ordine delle posizioni dell'istantanea, come dizionari. """
+        return [dict(zip(CARD_FIELDS, row)) for row in self.rows]
+
+
+
+class CardColumnStore:
+    """
+    Archivio colonnare della tabella cards per filtri e ordinamenti vettoriali.
+
+    Contiene solo l'istantanea corrente (CardColumns): un ricaricamento ne costruisce una nuova e la
+    sostituisce con un'unica assegnazione, quindi le letture concorrenti non vedono mai dati a metà.
+    """
+
+    def __init__(self):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy non è installato: l'archivio colonnare non è disponibile.")
+
+        self._lock = Lock()
+        self._snapshot = CardColumns.from_rows([])
+
+
+    #@@# Caricamento
+
+    def load_rows(self, rows, generation=None):
+        """
+        Sostituisce l'istantanea con le righe indicate, nell'ordine di CARD_FIELDS.
+
+        Returns:
+            CardColumns: La nuova istantanea.
+        """
+
+        snapshot = CardColumns.from_rows(rows, generation)
+        self._snapshot = snapshot
+        return snapshot
+
+
+    def refresh(self, session, generation=None):
+        """ Ricarica le colonne dalla tabella cards con un'unica query. """
+
+        rows = session.query(*[getattr(Card, field) for field in CARD_FIELDS]).all()
+        snapshot = self.load_rows(rows, generation)
+        log.debug(f"Archivio colonnare delle carte ricaricato: {snapshot.size} carte.")
+        return snapshot
+
+
+    def snapshot(self):
+        """
+        Restituisce l'istantanea aggiornata, ricaricandola se la generazione di scrittura delle carte è cambiata.
+
+        Chi esegue più operazioni correlate (filtro, posizioni, righe) deve usare sempre la stessa istantanea.
+        """
+
+        snapshot = self._snapshot
+        generation = get_card_generation()
+        if snapshot.generation == generation:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            generation = get_card_generation()
+            if snapshot.generation != generation:
+                # Sessione separata: legge solo dati confermati anche dentro un db_session() con scritture in sospeso
+                with read_session() as session:
+                    snapshot = self.refresh(session, generation)
+            return snapshot
+
+
+    def ensure_fresh(self):
+        """ Ricarica l'archivio se la generazione di scrittura delle carte è cambiata. """
+        self.snapshot()
+
+
+    def invalidate(self):
+        """ Forza il ricaricamento alla prossima interrogazione. """
+        self._snapshot = self._snapshot._replace(generation=None)
+
+
+    @property
+    def generation(self):
+        """ Generazione di scrittura delle carte caricate (None = mai caricate). """
+        return self._snapshot.generation
+
+
+    #@@# Interrogazioni (ognuna su una sola istantanea)
+
+    def query(self, filters=None, column=None, reverse=False):
+        """ Restituisce le posizioni delle carte che soddisfano i filtri, già ordinate. """
+        return self.snapshot().query(filters, column=column, reverse=reverse)
+
+
+    def load(self, filters=None):
+        """ Equivalente colonnare di load_cards_from_db: carte filtrate e ordinate per mana e nome. """
+
+        snapshot = self.snapshot()
+        return snapshot.rows_at(snapshot.query(filters))
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
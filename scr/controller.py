@@ -11,7 +11,6 @@
 # lib
 import wx, pyperclip
 from sqlalchemy.exc import SQLAlchemyError
-from .models import db_session, Deck
 from utyls import enu_glob as eg
 from utyls import helper as hp
 from utyls import logger as log
@@ -62,6 +61,7 @@ class LogycBisness(DefaultController):
 
     def __init__(self, container=None, **kwargs):
         super().__init__(container, **kwargs)   
+        self.pending_deck = None        # Mazzo letto dagli appunti in attesa di conferma (vedi question_for_add_deck)
 
     def on_focus(self, event, frame):
         """
@@ -167,6 +167,10 @@ class LogycBisness(DefaultController):
         """ Restituisce le statistiche di un mazzo. """
         return self.db_manager.get_deck_statistics(deck_name)
 
+    def get_similar_decks(self, deck_name):
+        """ Restituisce i mazzi più simili a quello indicato. """
+        return self.db_manager.get_similar_decks(deck_name)
+
     def set_focus_to_list(self, frame):
         """
         Imposta il focus sulla lista dei mazzi e seleziona il primo elemento.
@@ -356,7 +360,7 @@ class LogycBisness(DefaultController):
         """Seleziona l'ultimo mazzo nella lista."""
 
         card_list = frame.card_list
-        self.update_decks_list(card_list)
+        self.refresh_frame_decks(frame)
         frame.set_focus_to_list()
         end_list = card_list.GetItemCount()
         card_list.Select(end_list-1)
@@ -404,13 +408,13 @@ class LogycBisness(DefaultController):
     def question_for_add_deck(self, parent=None):
         """ Chiede all'utente se vuole aggiungere un mazzo. """
 
-        deck_string = pyperclip.paste()
-        if not self.db_manager.is_valid_deck(deck_string):
+        # Il mazzo viene letto una sola volta: add_deck salva lo stesso ParsedDeck
+        self.pending_deck = self.db_manager.parse_valid_deck(pyperclip.paste())
+        if not self.pending_deck:
             wx.MessageBox("Il mazzo copiato non è valido.", "Errore")
             return False
 
-        # Estrae i metadati del mazzo
-        metadata = self.db_manager.parse_deck_metadata(deck_string)
+        metadata = self.pending_deck.metadata()
         deck_name = metadata["name"]
 
         # Verifica se il mazzo esiste già
@@ -425,9 +429,16 @@ class LogycBisness(DefaultController):
             f"Nome: {deck_name}\n"
             f"Classe: {metadata['player_class']}\n"
             f"Formato: {metadata['game_format']}\n\n"
-            f"Vuoi utilizzare questi dati per creare il mazzo?"
         )
 
+        # Carte non presenti nel database che verranno sostituite con quelle dal nome più simile
+        matches = self.db_manager.preview_card_matches(self.pending_deck)
+        if matches:
+            confirm_message += "Carte non trovate, verranno usate quelle con il nome più simile:\n"
+            confirm_message += "".join(f"- {match} al posto di {name}\n" for name, match in matches) + "\n"
+
+        confirm_message += "Vuoi utilizzare questi dati per creare il mazzo?"
+
         confirm_dialog = wx.MessageDialog(
             parent,
             confirm_message,
@@ -443,7 +454,8 @@ class LogycBisness(DefaultController):
     def add_deck(self):#, frame):
         """Aggiunge un mazzo utilizzando DbManager."""
 
-        if not self.db_manager.add_deck_from_clipboard():
+        parsed_deck, self.pending_deck = self.pending_deck, None
+        if not self.db_manager.add_deck_from_clipboard(parsed_deck=parsed_deck):
             log.error("Errore durante l'aggiunta del mazzo.")
             return False
 
@@ -459,8 +471,7 @@ class LogycBisness(DefaultController):
             wx.MessageBox(f"Errore durante l'eliminazione del mazzo '{deck_name}'.", "Errore")
             return False
 
-        card_list = frame.card_list
-        self.update_decks_list(card_list)
+        self.refresh_frame_decks(frame)
         self.select_last_deck(frame)
         log.info(f"Mazzo '{deck_name}' eliminato con successo.")
         wx.MessageBox(f"Mazzo '{deck_name}' eliminato con successo.", "Successo")
@@ -492,9 +503,13 @@ class LogycBisness(DefaultController):
                 "Conferma",
                 wx.YES_NO
             ) == wx.YES:
-                if self.db_manager.upgrade_deck(deck_name):
+                changes = self.db_manager.upgrade_deck(deck_name)
+                if changes:
                     #self.update_status(f"Mazzo '{deck_name}' aggiornato con successo.")
-                    wx.MessageBox(f"Mazzo '{deck_name}' aggiornato con successo.", "Successo")
+                    wx.MessageBox(
+                        f"Mazzo '{deck_name}' aggiornato con successo.\n\n{self.format_deck_changes(changes)}",
+                        "Successo"
+                    )
                     return True
 
                 else:
@@ -506,11 +521,44 @@ class LogycBisness(DefaultController):
             return False
 
 
+    def format_deck_changes(self, changes):
+        """
+        Restituisce un riepilogo testuale delle modifiche applicate a un mazzo.
+
+        Args:
+            changes (dict): Modifiche restituite da DbManager.upgrade_deck.
+
+        Returns:
+            str: Testo con le carte aggiunte, modificate e rimosse.
+        """
+
+        lines = []
+        for name, qty in changes.get("added", []):
+            lines.append(f"Aggiunta: {qty}x {name}")
+
+        for name, old, new in changes.get("updated", []):
+            lines.append(f"Modificata: {name} da {old} a {new}")
+
+        for name, qty in changes.get("removed", []):
+            lines.append(f"Rimossa: {qty}x {name}")
+
+        return "\n".join(lines) if lines else "Nessuna modifica al contenuto del mazzo."
+
+
     def update_decks_list(self, card_list =None):
         """Aggiorna la lista dei mazzi."""
         self.db_manager.update_decks_list(card_list=card_list)
 
 
+    def refresh_frame_decks(self, frame):
+        """ Ricarica la lista dei mazzi di una finestra, con i filtri propri della finestra se presenti (es. l'archetipo). """
+
+        if hasattr(frame, "refresh_decks_list"):
+            frame.refresh_decks_list()
+        else:
+            self.update_decks_list(frame.card_list)
+
+
     #@@#  sezione gestione di un singolo mazzo
 
     def add_card_to_deck(self, card_name):
@@ -534,25 +582,15 @@ class LogycBisness(DefaultController):
     #@@# sezione gestione selezione degli elementi e cambio colore
 
     def reset_focus_style_for_card_list(self, frame=None, selected_item=None):
-        """ Resetta lo stile di tutte le righe. """
-
-        card_list = frame.card_list
-        for i in range(card_list.GetItemCount()):
-            if i != selected_item:
-                frame.color_manager.apply_default_style_to_list_item(self.card_list, i)
-
-        # Forza il ridisegno della lista
-        card_list.Refresh()
+        """ Resetta lo stile di tutte le righe (solo la riga evidenziata viene ricolorata). """
+        frame.color_manager.selection_tracker(frame.card_list).clear(keep=selected_item)
 
 
     def select_element(self, frame=None, row=None):
         """ Seleziona l'elemento attivo. """
 
         if hasattr(frame, "card_list"):
-            card_list = frame.card_list
-            card_list.SetItemBackgroundColour(row, 'blue')
-            card_list.SetItemTextColour(row, 'white')
-            card_list.Refresh()
+            frame.color_manager.apply_selection_style_to_list(frame.card_list, row)
 
 
 
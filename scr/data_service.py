@@ -0,0 +1,136 @@
+"""
+    data_service.py
+
+    Modulo per l'esecuzione in background delle operazioni sul database richieste dalle finestre.
+
+    Path:
+        scr/data_service.py
+
+    Descrizione:
+        Il DataService esegue caricamenti e filtri su un pool di thread e consegna i risultati
+        al thread dell'interfaccia tramite `wx.CallAfter`, così la finestra resta reattiva
+        (e gli eventi di focus per lo screen reader non si bloccano) durante i caricamenti lunghi.
+
+    Note:
+        - Ogni richiesta appartiene a un canale (es. una finestra) e riceve un CancellationToken:
+          una nuova richiesta sullo stesso canale annulla la precedente, il cui risultato viene scartato.
+        - Le funzioni eseguite in background usano il database solo tramite db_session (una sessione per thread).
+
+"""
+
+# lib
+import wx
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock
+from utyls import logger as log
+
+
+
+class CancellationToken:
+    """ Segnala a una richiesta in corso che il suo risultato non serve più. """
+
+    def __init__(self):
+        self._event = Event()
+
+    def cancel(self):
+        """ Annulla la richiesta. """
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        """ True se la richiesta è stata annullata (o superata da una più recente). """
+        return self._event.is_set()
+
+
+
+class DataService:
+    """
+    Servizio che esegue le richieste di dati in background e ne consegna i risultati al thread dell'interfaccia.
+
+    Attributi:
+        max_workers (int): Numero di thread del pool.
+    """
+
+    def __init__(self, max_workers=2, deliver=None):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hdm-data")
+        self._deliver = deliver or wx.CallAfter     # Consegna sul thread dell'interfaccia
+        self._tokens = {}                           # canale -> token dell'ultima richiesta
+        self._lock = Lock()
+
+
+    def submit(self, channel, func, *args, on_result=None, on_error=None, **kwargs):
+        """
+        Esegue func(*args, **kwargs) in background, annullando la richiesta precedente dello stesso canale.
+
+        Args:
+            channel: Chiave della richiesta (una nuova richiesta sullo stesso canale supera la precedente).
+            func (callable): Funzione da eseguire nel thread del pool.
+            on_result (callable): Chiamata sul thread dell'interfaccia con (risultato, token).
+            on_error (callable): Chiamata sul thread dell'interfaccia con (eccezione, token).
+
+        Returns:
+            CancellationToken: Token della nuova richiesta.
+        """
+
+        token = CancellationToken()
+        with self._lock:
+            previous = self._tokens.get(channel)
+            if previous:
+                previous.cancel()
+            self._tokens[channel] = token
+
+        self._executor.submit(self._run, token, func, args, kwargs, on_result, on_error)
+        return token
+
+
+    def _run(self, token, func, args, kwargs, on_result, on_error):
+        """ Esegue la richiesta nel thread del pool e ne programma la consegna. """
+
+        if token.cancelled:
+            return
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            log.error(f"Errore durante l'esecuzione in background di {getattr(func, '__name__', func)}: {str(e)}")
+            if on_error and not token.cancelled:
+                self._deliver(self._complete, token, on_error, e)
+            return
+
+        if on_result and not token.cancelled:
+            self._deliver(self._complete, token, on_result, result)
+
+
+    @staticmethod
+    def _complete(token, callback, value):
+        """ Consegna il risultato sul thread dell'interfaccia, se la richiesta non è stata superata nel frattempo. """
+
+        if not token.cancelled:
+            callback(value, token)
+
+
+    def cancel(self, channel):
+        """ Annulla la richiesta in corso sul canale indicato (es. alla chiusura di una finestra). """
+
+        with self._lock:
+            token = self._tokens.pop(channel, None)
+        if token:
+            token.cancel()
+
+
+    def shutdown(self):
+        """ Annulla tutte le richieste e ferma il pool di thread. """
+
+        with self._lock:
+            tokens = list(self._tokens.values())
+            self._tokens.clear()
+        for token in tokens:
+            token.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
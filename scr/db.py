@@ -14,48 +14,331 @@
             - `Card`: Rappresenta una singola carta del gioco.
             - `Deck`: Rappresenta un mazzo di carte.
             - `DeckCard`: Gestisce la relazione tra mazzi e carte, inclusa la quantità di ciascuna carta in un mazzo.
+            - `DeckStats`: Statistiche materializzate di ogni mazzo, aggiornate nella stessa transazione delle modifiche.
+            - `DeckArchetype`: Archetipo di ogni mazzo, ricalcolato in background quando i mazzi cambiano.
+
+        Le relazioni `Deck.deck_cards` e `DeckCard.card` permettono di caricare un mazzo completo con una sola query.
+        La tabella virtuale FTS5 `cards_fts` (tokenizer trigram) indicizza i nomi delle carte ed è mantenuta
+        allineata alla tabella `cards` tramite trigger.
 
     Note:
         Il database viene configurato automaticamente all'importazione del modulo. Per modificare il percorso del database, aggiornare la costante `DATABASE_PATH`.
+        Le sessioni si ottengono solo tramite `db_session()`, un'unità di lavoro per thread basata su `scoped_session`
+        (non esiste più una sessione globale condivisa), o `read_session()` per le letture delle cache in memoria.
+        Ogni nuova connessione riceve i PRAGMA del profilo prestazionale attivo (`SQLITE_PROFILES`), selezionabile con
+        `DB_PERFORMANCE_PROFILE` in `scr/db_settings.py` o a runtime con `set_sqlite_profile`.
 
 """
 
 # lib
-import os
+import os, threading
 from contextlib import contextmanager
-from sqlalchemy import create_engine, Column, Integer, String, Index
+from sqlalchemy import create_engine, event, text, table, column, Column, Integer, String, Float, Index
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session, relationship
 from sqlalchemy import ForeignKey
-from utyls import helper as hp
+from .db_settings import DB_PERFORMANCE_PROFILE
 from utyls import logger as log
 #import pdb
 
+# Profili prestazionali di SQLite (PRAGMA applicati a ogni nuova connessione)
+SQLITE_PROFILES = {
+    # Massima durabilità: fsync completo a ogni commit
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,            # ~8 MB (valori negativi = KiB)
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,           # ms
+    },
+    # Uso interattivo: WAL + synchronous NORMAL, attese brevi per non bloccare l'interfaccia
+    "fast-desktop": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,           # ~32 MB
+        "mmap_size": 268435456,         # 256 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,           # Come il timeout predefinito di sqlite3 (accessi da più thread)
+    },
+    # Importazioni massive: nessun fsync, cache ampia
+    "bulk-import": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -131072,          # ~128 MB
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+}
+DEFAULT_SQLITE_PROFILE = "fast-desktop"
+
 # Configurazione del database
 DATABASE_PATH = "hearthstone_decks_storage.db"                      # Percorso del database SQLite
-engine = create_engine(f'sqlite:///{DATABASE_PATH}', echo=False, connect_args={"timeout": 30})     # Connessione al database SQLite
-Session = sessionmaker(bind=engine)                                 # Sessione del database per l'interazione con il database
-session = Session()                                                 # Sessione del database per l'interazione con il database
+engine = create_engine(f'sqlite:///{DATABASE_PATH}', echo=False)    # Connessione al database SQLite
+Session = sessionmaker(bind=engine)                                 # Fabbrica delle sessioni del database
+ScopedSession = scoped_session(Session)                             # Una sessione per thread (usata solo tramite db_session)
 Base = declarative_base()                                           # Base per i modelli SQLAlchemy
+active_sqlite_profile = DB_PERFORMANCE_PROFILE if DB_PERFORMANCE_PROFILE in SQLITE_PROFILES else DEFAULT_SQLITE_PROFILE
+
+
+
+def apply_sqlite_profile(dbapi_connection, profile_name):
+    """
+    Applica i PRAGMA di un profilo prestazionale a una connessione SQLite.
+
+    Args:
+        dbapi_connection: Connessione sqlite3 grezza.
+        profile_name (str): Nome del profilo in `SQLITE_PROFILES`.
+    """
+
+    profile = SQLITE_PROFILES[profile_name]
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in profile.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+    finally:
+        cursor.close()
+
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    """ Applica il profilo attivo a ogni nuova connessione del pool. """
+    apply_sqlite_profile(dbapi_connection, active_sqlite_profile)
+
+
+def set_sqlite_profile(profile_name):
+    """
+    Imposta il profilo prestazionale attivo e rinnova le connessioni del pool.
+
+    Args:
+        profile_name (str): Nome del profilo ("safe", "fast-desktop", "bulk-import").
+
+    Raises:
+        ValueError: Se il profilo non esiste.
+    """
 
+    global active_sqlite_profile
+    if profile_name not in SQLITE_PROFILES:
+        raise ValueError(f"Profilo SQLite sconosciuto: '{profile_name}'.")
+
+    active_sqlite_profile = profile_name
+    engine.dispose()        # Le nuove connessioni useranno il profilo aggiornato
+    log.info(f"Profilo SQLite attivo: {profile_name}")
+
+
+@contextmanager
+def sqlite_profile(profile_name):
+    """ Attiva temporaneamente un profilo (es. "bulk-import") e ripristina il precedente all'uscita. """
+
+    previous = active_sqlite_profile
+    set_sqlite_profile(profile_name)
+    try:
+        yield
+    finally:
+        set_sqlite_profile(previous)
+
+
+
+#@@# Generazione di scrittura delle carte
+
+card_write_generation = 0       # Incrementata a ogni scrittura sulla tabella cards (invalida il CardCatalog)
+_card_change_generations = {}   # id carta -> generazione dell'ultima modifica
+_card_reset_generation = 0      # Generazione dell'ultima modifica senza id delle carte (es. importazioni)
+_generation_lock = threading.Lock()
+
+
+def bump_card_generation(card_ids=None):
+    """
+    Segnala una modifica alla tabella cards: le cache basate sulla generazione si ricaricheranno.
+
+    Args:
+        card_ids (iterable): Id delle carte modificate o eliminate; None = qualsiasi carta.
+    """
+
+    global card_write_generation, _card_reset_generation
+    with _generation_lock:
+        card_write_generation += 1
+        if card_ids is None:
+            _card_reset_generation = card_write_generation
+            _card_change_generations.clear()
+        else:
+            for card_id in card_ids:
+                _card_change_generations[card_id] = card_write_generation
+        return card_write_generation
+
+
+def get_card_generation():
+    """ Restituisce la generazione di scrittura corrente delle carte. """
+    return card_write_generation
+
+
+def get_changed_cards(since):
+    """
+    Restituisce gli id delle carte modificate dopo la generazione indicata.
+
+    Returns:
+        set | None: Id delle carte; None se nel frattempo c'è stata una modifica senza id (va ricaricato tutto).
+    """
+
+    with _generation_lock:
+        if since is None or since < _card_reset_generation:
+            return None
+        return {card_id for card_id, generation in _card_change_generations.items() if generation > since}
+
+
+def mark_cards_changed(session, card_ids=None):
+    """ Segnala che la sessione ha scritto sulle carte indicate (None = qualsiasi): la generazione viene incrementata dopo il commit. """
+
+    if card_ids is None:
+        session.info["all_cards_changed"] = True
+    else:
+        session.info.setdefault("cards_changed", set()).update(card_ids)
+
+
+
+#@@# Generazione di scrittura dei mazzi
+
+deck_write_generation = 0       # Incrementata a ogni commit che modifica mazzi o carte dei mazzi
+_deck_change_generations = {}   # id mazzo -> generazione dell'ultima modifica
+_deck_reset_generation = 0      # Generazione dell'ultima modifica a tutti i mazzi
+_deck_change_listeners = []     # Funzioni chiamate dopo ogni modifica ai mazzi (es. il ricalcolo degli archetipi)
+
+
+def bump_deck_generation(deck_ids=None):
+    """
+    Segnala una modifica ai mazzi indicati: le cache dei mazzi (es. l'indice di somiglianza) li ricaricheranno.
+
+    Args:
+        deck_ids (iterable): Id dei mazzi modificati, aggiunti o eliminati; None = tutti i mazzi.
+    """
+
+    global deck_write_generation, _deck_reset_generation
+    with _generation_lock:
+        deck_write_generation += 1
+        generation = deck_write_generation
+        if deck_ids is None:
+            _deck_reset_generation = generation
+            _deck_change_generations.clear()
+        else:
+            for deck_id in deck_ids:
+                _deck_change_generations[deck_id] = generation
+
+    for listener in list(_deck_change_listeners):
+        listener(generation)
+    return generation
+
+
+def add_deck_change_listener(listener):
+    """ Registra una funzione chiamata con la nuova generazione dopo ogni modifica ai mazzi (nel thread che l'ha eseguita). """
+    _deck_change_listeners.append(listener)
+
+
+def remove_deck_change_listener(listener):
+    """ Rimuove una funzione registrata con add_deck_change_listener. """
+    if listener in _deck_change_listeners:
+        _deck_change_listeners.remove(listener)
+
+
+def get_deck_generation():
+    """ Restituisce la generazione di scrittura corrente dei mazzi. """
+    return deck_write_generation
+
+
+def get_changed_decks(since):
+    """
+    Restituisce gli id dei mazzi modificati dopo la generazione indicata.
+
+    Returns:
+        set | None: Id dei mazzi; None se nel frattempo sono cambiati tutti i mazzi (va ricaricato tutto).
+    """
+
+    with _generation_lock:
+        if since is None or since < _deck_reset_generation:
+            return None
+        return {deck_id for deck_id, generation in _deck_change_generations.items() if generation > since}
+
+
+def mark_decks_changed(session, deck_ids=None):
+    """ Segnala che la sessione ha modificato i mazzi indicati (None = tutti): la generazione viene incrementata dopo il commit. """
+
+    if deck_ids is None:
+        session.info["all_decks_changed"] = True
+    else:
+        session.info.setdefault("decks_changed", set()).update(deck_ids)
+
+
+
+#@@# Unità di lavoro
+
+_unit_of_work = threading.local()       # Profondità di annidamento di db_session per thread
 
 
 @contextmanager
 def db_session():
-    """ Gestisce la sessione del database e il commit/rollback automatico. """
-    session = Session()  # Crea una nuova sessione ogni volta
+    """
+    Unità di lavoro sulla sessione del thread corrente, con commit/rollback automatico.
+
+    Ogni thread usa la propria sessione (ScopedSession). I blocchi annidati nello stesso thread
+    condividono la sessione: il commit avviene solo all'uscita del blocco più esterno, che poi
+    rimuove la sessione liberandone la mappa delle identità. Un errore in un blocco annidato
+    annulla l'intera unità di lavoro.
+    """
+
+    depth = getattr(_unit_of_work, "depth", 0)
+    session = ScopedSession()
+    _unit_of_work.depth = depth + 1
     try:
         yield session
-        session.commit()
+        if depth == 0:
+            if session.info.pop("rollback_only", False):
+                log.warning("Unità di lavoro annullata da un errore in un blocco annidato.")
+                session.rollback()
+            else:
+                session.commit()
+                changed_cards = session.info.pop("cards_changed", None)
+                if session.info.pop("all_cards_changed", False):
+                    bump_card_generation()
+                elif changed_cards:
+                    bump_card_generation(changed_cards)
+                changed_decks = session.info.pop("decks_changed", None)
+                if session.info.pop("all_decks_changed", False):
+                    bump_deck_generation()
+                elif changed_decks:
+                    bump_deck_generation(changed_decks)
     except SQLAlchemyError as e:
-        session.rollback()
-        log.error(f"Errore del database: {str(e)}")
+        session.info["rollback_only"] = True
+        if depth == 0:
+            session.rollback()
+            log.error(f"Errore del database: {str(e)}")
         raise
     except Exception as e:
-        session.rollback()
-        log.error(f"Errore imprevisto: {str(e)}")
+        session.info["rollback_only"] = True
+        if depth == 0:
+            session.rollback()
+            log.error(f"Errore imprevisto: {str(e)}")
         raise
+    finally:
+        _unit_of_work.depth = depth
+        if depth == 0:
+            ScopedSession.remove()      # Chiude la sessione del thread
+
+
+@contextmanager
+def read_session():
+    """
+    Sessione di sola lettura, indipendente dall'unità di lavoro del thread corrente.
+
+    Usa una propria connessione, quindi vede solo i dati già confermati anche se il thread ha un
+    db_session() aperto con modifiche in sospeso: la usano le cache che si ricaricano in base alle
+    generazioni di scrittura, che non devono mai conservare righe poi annullate.
+    """
+
+    session = Session()
+    try:
+        yield session
     finally:
         session.close()
 
@@ -77,11 +360,14 @@ class Card(Base):
         durability (int): Integrità della carta (opzionale, per Armi).
         rarity (str): Rarità della carta (es. Comune, Rara, Epica, Leggendaria).
         expansion (str): Espansione a cui appartiene la carta.
+        dbf_id (int): Identificativo numerico della carta nel gioco, usato dai deckstring (opzionale).
+        source_hash (str): Impronta dei dati importati da un archivio di carte (vedi scr/card_importer.py, opzionale).
+        owned_quantity (int): Copie della carta possedute nella collezione (vedi scr/deck_buildability.py).
     """
 
     __tablename__ = 'cards'
     id = Column(Integer, primary_key=True)
-    name = Column(String, nullable=False, index=True)  # Aggiungo un indice sul campo 'name'
+    name = Column(String, nullable=False)
     class_name = Column(String)
     mana_cost = Column(Integer, nullable=False)
     card_type = Column(String, nullable=False)
@@ -92,10 +378,18 @@ class Card(Base):
     durability = Column(Integer)
     rarity = Column(String)
     expansion = Column(String)
+    dbf_id = Column(Integer)
+    source_hash = Column(String)
+    owned_quantity = Column(Integer, nullable=False, default=0)
 
-    # Aggiungi un indice sul campo `name`
+    # Indici: ricerca per nome, ordinamento della collezione (mana, nome), filtri del FilterDialog e deckstring (dbf_id)
     __table_args__ = (
         Index('idx_card_name', 'name'),
+        Index('idx_card_mana_name', 'mana_cost', 'name'),
+        Index('idx_card_type_mana_name', 'card_type', 'mana_cost', 'name'),
+        Index('idx_card_rarity_mana_name', 'rarity', 'mana_cost', 'name'),
+        Index('idx_card_expansion_mana_name', 'expansion', 'mana_cost', 'name'),
+        Index('idx_card_dbf_id', 'dbf_id'),
     )
 
     def __repr__(self):
@@ -112,6 +406,14 @@ class Deck(Base):
     player_class = Column(String, nullable=False)
     game_format = Column(String, nullable=False)
 
+    # Il nome identifica il mazzo (get_deck, add_deck, ecc.): indice univoco
+    __table_args__ = (
+        Index('idx_deck_name', 'name', unique=True),
+    )
+
+    # Carte del mazzo (caricabili in un'unica query con joinedload/selectinload)
+    deck_cards = relationship("DeckCard", back_populates="deck", cascade="all, delete-orphan")
+
     def __repr__(self):
         return f"<Deck(name='{self.name}', class='{self.player_class}', format='{self.game_format}')>"
 
@@ -125,22 +427,175 @@ class DeckCard(Base):
     card_id = Column(Integer, ForeignKey('cards.id'), primary_key=True)
     quantity = Column(Integer, nullable=False)
 
+    # La chiave primaria (deck_id, card_id) non copre le ricerche per sola carta
+    __table_args__ = (
+        Index('idx_deck_card_card_id', 'card_id'),
+    )
+
+    # Relazioni verso il mazzo e la carta
+    deck = relationship("Deck", back_populates="deck_cards")
+    card = relationship("Card")
+
     def __repr__(self):
         return f"<DeckCard(deck_id={self.deck_id}, card_id={self.card_id}, quantity={self.quantity})>"
 
 
 
+class DeckStats(Base):
+    """
+    Statistiche materializzate di un mazzo (una riga per mazzo).
+
+    Le righe vengono ricalcolate da `refresh_deck_stats` (scr/models.py) nella stessa transazione
+    di ogni modifica al mazzo o al tipo/costo/rarità di una sua carta.
+
+    Attributi:
+        deck_id (int): Chiave primaria ed esterna verso decks.
+        total_cards (int): Numero totale di carte.
+        creatures, spells, weapons, locations, heroes (int): Carte per tipo.
+        mana_sum (int): Somma dei costi in mana (per il costo medio).
+        curve_0 ... curve_7 (int): Curva del mana; curve_7 conta le carte da 7 mana in su.
+        common, rare, epic, legendary (int): Carte per rarità.
+    """
+
+    __tablename__ = 'deck_stats'
+    deck_id = Column(Integer, ForeignKey('decks.id'), primary_key=True)
+    total_cards = Column(Integer, nullable=False, default=0)
+    creatures = Column(Integer, nullable=False, default=0)
+    spells = Column(Integer, nullable=False, default=0)
+    weapons = Column(Integer, nullable=False, default=0)
+    locations = Column(Integer, nullable=False, default=0)
+    heroes = Column(Integer, nullable=False, default=0)
+    mana_sum = Column(Integer, nullable=False, default=0)
+    curve_0 = Column(Integer, nullable=False, default=0)
+    curve_1 = Column(Integer, nullable=False, default=0)
+    curve_2 = Column(Integer, nullable=False, default=0)
+    curve_3 = Column(Integer, nullable=False, default=0)
+    curve_4 = Column(Integer, nullable=False, default=0)
+    curve_5 = Column(Integer, nullable=False, default=0)
+    curve_6 = Column(Integer, nullable=False, default=0)
+    curve_7 = Column(Integer, nullable=False, default=0)
+    common = Column(Integer, nullable=False, default=0)
+    rare = Column(Integer, nullable=False, default=0)
+    epic = Column(Integer, nullable=False, default=0)
+    legendary = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DeckStats(deck_id={self.deck_id}, total_cards={self.total_cards}, mana_sum={self.mana_sum})>"
+
+
+
+class DeckArchetype(Base):
+    """
+    Archetipo di un mazzo (una riga per mazzo con almeno una carta).
+
+    Le righe vengono ricalcolate in background da scr/deck_archetypes.py quando i mazzi cambiano:
+    le finestre le leggono soltanto, senza eseguire il raggruppamento.
+
+    Attributi:
+        deck_id (int): Chiave primaria ed esterna verso decks.
+        archetype (int): Numero del gruppo (cluster) di mazzi.
+        name (str): Nome dell'archetipo (classe e prime carte caratteristiche).
+        core_cards (str): Carte caratteristiche del gruppo, separate da "; ".
+        score (float): Somiglianza del mazzo con il centro del gruppo (tra 0 e 1).
+    """
+
+    __tablename__ = 'deck_archetype'
+    deck_id = Column(Integer, ForeignKey('decks.id'), primary_key=True)
+    archetype = Column(Integer, nullable=False)
+    name = Column(String, nullable=False)
+    core_cards = Column(String, nullable=False, default="")
+    score = Column(Float, nullable=False, default=0.0)
+
+    # Raggruppamento e filtro della lista dei mazzi per archetipo
+    __table_args__ = (
+        Index('idx_deck_archetype_name', 'name'),
+    )
+
+    def __repr__(self):
+        return f"<DeckArchetype(deck_id={self.deck_id}, archetype={self.archetype}, name='{self.name}')>"
+
+
+
+#@@# Indice full-text sui nomi delle carte
+
+CARD_SEARCH_TABLE = "cards_fts"                                     # Tabella virtuale FTS5 (esclusa dai metadati SQLAlchemy)
+cards_fts = table(CARD_SEARCH_TABLE, column("rowid"))               # Riferimento leggero per le query di ricerca
+card_search_available = False                                       # True se l'indice FTS5 è disponibile
+
+# Tokenizer in ordine di preferenza: remove_diacritics per il trigram richiede SQLite >= 3.45
+CARD_SEARCH_TOKENIZERS = ("trigram remove_diacritics 1", "trigram")
+
+CARD_SEARCH_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS cards_fts_ai AFTER INSERT ON cards BEGIN
+        INSERT INTO {CARD_SEARCH_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS cards_fts_ad AFTER DELETE ON cards BEGIN
+        INSERT INTO {CARD_SEARCH_TABLE}({CARD_SEARCH_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS cards_fts_au AFTER UPDATE OF name ON cards BEGIN
+        INSERT INTO {CARD_SEARCH_TABLE}({CARD_SEARCH_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO {CARD_SEARCH_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END""",
+)
+
+
+def setup_card_search_index():
+    """
+    Crea (se manca) l'indice FTS5 sui nomi delle carte e i trigger che lo mantengono allineato.
+
+    Returns:
+        bool: True se l'indice è disponibile, False se SQLite non supporta FTS5/trigram.
+    """
+
+    try:
+        with engine.begin() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": CARD_SEARCH_TABLE}
+            ).first()
+
+            if not exists:
+                for tokenizer in CARD_SEARCH_TOKENIZERS:
+                    try:
+                        connection.execute(text(
+                            f"CREATE VIRTUAL TABLE {CARD_SEARCH_TABLE} USING fts5("
+                            f"name, content='cards', content_rowid='id', tokenize='{tokenizer}')"
+                        ))
+                        break
+                    except OperationalError:
+                        log.warning(f"Tokenizer FTS5 '{tokenizer}' non supportato.")
+                else:
+                    return False
+
+                # Indicizza le carte già presenti
+                connection.execute(text(f"INSERT INTO {CARD_SEARCH_TABLE}({CARD_SEARCH_TABLE}) VALUES ('rebuild')"))
+                log.info("Indice di ricerca delle carte creato.")
+
+            for trigger in CARD_SEARCH_TRIGGERS:
+                connection.execute(text(trigger))
+
+        return True
+
+    except OperationalError as e:
+        log.warning(f"Indice di ricerca FTS5 non disponibile, uso la ricerca LIKE: {str(e)}")
+        return False
+
+
+
 #@@# Start del modulo
 
 def setup_database():
     """Crea il database e le tabelle se non esistono già."""
 
+    global card_search_available
     if not os.path.exists(DATABASE_PATH):
         Base.metadata.create_all(engine)
         log.info(f"Database creato: {DATABASE_PATH}")
     else:
         log.info(f"Database esistente trovato: {DATABASE_PATH}")
 
+    card_search_available = setup_card_search_index()
+
 
 
 # Configura il database all'avvio del modulo
@@ -0,0 +1,32 @@
+"""
+    db_settings.py
+
+    Modulo per le configurazioni del livello dati.
+
+    Path:
+        scr/db_settings.py
+
+    Descrizione:
+        Contiene le impostazioni lette da scr.db e scr.models (profilo prestazionale di SQLite e archivio colonnare
+        della collezione). Non dipende da wxPython, così il livello dati e le utility da riga di comando
+        (scr.deck_export, scr.card_importer) si possono usare anche senza interfaccia grafica.
+
+    Note:
+        Le impostazioni sono riesportate da scr/views/builder/default_settings.py e scr/user_settings.py.
+
+"""
+
+# lib
+from utyls import logger as log
+
+
+
+# === CONFIGURAZIONI DEL DATABASE ===
+DB_PERFORMANCE_PROFILE = "fast-desktop"  # Profilo SQLite: "safe", "fast-desktop" o "bulk-import" (vedi scr/db.py)
+USE_COLUMNAR_STORE = True  # Filtri/ordinamento della collezione in memoria con NumPy (vedi scr/card_store.py)
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
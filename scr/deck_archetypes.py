@@ -0,0 +1,343 @@
+"""
+    deck_archetypes.py
+
+    Modulo per il raggruppamento dei mazzi in archetipi (mazzi della stessa classe costruiti attorno alle stesse carte).
+
+    Path:
+        scr/deck_archetypes.py
+
+    Descrizione:
+        find_archetypes() raggruppa i mazzi di ogni classe con un k-means sferico (somiglianza coseno) sulla
+        matrice mazzi x carte dell'indice di somiglianza (scr/deck_similarity.py), poi unisce i gruppi i cui
+        centri sono quasi uguali (passo agglomerativo). Ogni archetipo riceve le sue carte caratteristiche:
+        quelle presenti in almeno metà dei mazzi del gruppo, dalle più frequenti.
+        Il risultato viene salvato nella tabella deck_archetype, che la lista dei mazzi legge soltanto.
+
+        ArchetypeWorker esegue il ricalcolo in un thread in background: si attiva a ogni modifica dei mazzi
+        (scr.db.add_deck_change_listener) e attende RECOMPUTE_DELAY secondi senza altre modifiche,
+        così un'importazione di molti mazzi produce un solo ricalcolo.
+
+    Note:
+        - Richiede NumPy (come l'indice di somiglianza): senza NumPy la tabella resta vuota.
+        - Il calcolo è deterministico (seme fisso): con gli stessi mazzi si ottengono gli stessi archetipi.
+        - Tempi e qualità del raggruppamento di 10k mazzi sintetici sono misurati da benchmarks/bench_deck_archetypes.py.
+
+"""
+
+# lib
+from math import sqrt
+from threading import Event, Thread
+from typing import NamedTuple
+from sqlalchemy import insert
+from .db import db_session, Card, Deck, DeckArchetype, get_deck_generation, add_deck_change_listener, remove_deck_change_listener
+from .deck_similarity import NUMPY_AVAILABLE
+from utyls import logger as log
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+MAX_ARCHETYPES_PER_CLASS = 12       # Gruppi cercati al massimo per ogni classe
+MERGE_SIMILARITY = 0.8              # Gruppi con centri più simili di così vengono uniti
+KMEANS_ITERATIONS = 30
+KMEANS_SEED = 42
+CORE_SHARE = 0.5                    # Quota minima di mazzi del gruppo che contengono una carta caratteristica
+CORE_CARDS = 5                      # Carte caratteristiche salvate per archetipo
+NAME_CARDS = 2                      # Carte caratteristiche usate nel nome dell'archetipo
+CORE_SEPARATOR = "; "
+RECOMPUTE_DELAY = 2.0               # Secondi senza modifiche ai mazzi prima del ricalcolo
+
+
+
+class Archetype(NamedTuple):
+    """ Gruppo di mazzi della stessa classe. """
+
+    player_class: str
+    core_card_ids: tuple    # Carte caratteristiche, dalla più frequente
+    deck_ids: tuple
+    scores: tuple           # Somiglianza di ogni mazzo con il centro del gruppo
+
+
+
+def archetype_count(decks, max_archetypes=MAX_ARCHETYPES_PER_CLASS):
+    """ Numero di gruppi cercati per una classe con il numero di mazzi indicato (radice di metà dei mazzi). """
+    return max(1, min(max_archetypes, round(sqrt(decks / 2))))
+
+
+class SparseRows(NamedTuple):
+    """ Righe sparse normalizzate (norma 1) dei mazzi di una classe, con le voci ordinate per riga. """
+
+    starts: object          # numpy.ndarray: prima voce di ogni riga
+    entry_rows: object      # numpy.ndarray: riga di ogni voce
+    columns: object         # numpy.ndarray: colonna di ogni voce
+    values: object          # numpy.ndarray: valore normalizzato di ogni voce
+    width: int              # Numero di colonne
+
+
+
+def _row_products(rows, weights):
+    """ Somma per riga dei prodotti tra i valori delle voci e i pesi indicati (uno per voce, o una colonna per gruppo). """
+    return np.add.reduceat(rows.values[:, None] * weights if weights.ndim == 2 else rows.values * weights, rows.starts, axis=0)
+
+
+def _normalized(sums):
+    """ Restituisce i centri dei gruppi (somme normalizzate a norma 1). """
+
+    norms = np.linalg.norm(sums, axis=1, keepdims=True)
+    return sums / np.where(norms > 0, norms, 1)
+
+
+def spherical_kmeans(rows, k, iterations=KMEANS_ITERATIONS, seed=KMEANS_SEED):
+    """
+    Raggruppa righe sparse di norma 1 per somiglianza coseno (inizializzazione k-means++).
+
+    Somiglianze e centri sono calcolati sulle sole voci (reduceat e bincount), senza costruire la matrice densa.
+
+    Args:
+        rows (SparseRows): Righe da raggruppare.
+        k (int): Numero di gruppi.
+
+    Returns:
+        tuple: (gruppo di ogni riga, somme dei vettori di ogni gruppo); i gruppi rimasti vuoti sono eliminati.
+    """
+
+    random_gen = np.random.default_rng(seed)
+    count = len(rows.starts)
+    k = min(k, count)
+
+    def row_vector(row):
+        vector = np.zeros(rows.width)
+        end = rows.starts[row + 1] if row + 1 < count else len(rows.values)
+        vector[rows.columns[rows.starts[row]:end]] = rows.values[rows.starts[row]:end]
+        return vector
+
+    centers = [row_vector(random_gen.integers(count))]
+    distances = np.maximum(1 - _row_products(rows, centers[0][rows.columns]), 0)
+    while len(centers) < k and distances.sum() > 1e-9:
+        center = row_vector(random_gen.choice(count, p=distances / distances.sum()))
+        centers.append(center)
+        distances = np.minimum(distances, np.maximum(1 - _row_products(rows, center[rows.columns]), 0))
+    centers = np.array(centers)
+
+    labels, sums = None, None
+    for _ in range(iterations):
+        new_labels = _row_products(rows, centers.T[rows.columns]).argmax(axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        sums = np.bincount(
+            labels[rows.entry_rows] * rows.width + rows.columns, weights=rows.values, minlength=len(centers) * rows.width
+        ).reshape(len(centers), rows.width)
+        filled = sums.any(axis=1)
+        centers[filled] = _normalized(sums[filled])         # Un gruppo vuoto mantiene il centro precedente
+
+    used, labels = np.unique(labels, return_inverse=True)
+    return labels, sums[used]
+
+
+def merge_similar_groups(labels, sums, min_similarity=MERGE_SIMILARITY):
+    """ Unisce a coppie i gruppi con i centri più simili finché la somiglianza supera la soglia. """
+
+    while len(sums) > 1:
+        centers = _normalized(sums)
+        similarity = centers @ centers.T
+        np.fill_diagonal(similarity, -1)
+        first, second = np.unravel_index(similarity.argmax(), similarity.shape)
+        if similarity[first, second] < min_similarity:
+            break
+
+        sums[first] += sums[second]
+        sums = np.delete(sums, second, axis=0)
+        labels = np.where(labels == second, first, labels)
+        labels = labels - (labels > second)
+    return labels, sums
+
+
+def find_archetypes(matrix, deck_classes, max_archetypes=MAX_ARCHETYPES_PER_CLASS, seed=KMEANS_SEED):
+    """
+    Raggruppa in archetipi i mazzi di ogni classe.
+
+    Args:
+        matrix (DeckMatrix): Matrice dei mazzi (vedi DeckSimilarityIndex.matrix).
+        deck_classes (dict): {id mazzo: classe}; i mazzi assenti sono ignorati.
+
+    Returns:
+        list: Archetype ordinati per classe e numero di mazzi decrescente.
+    """
+
+    rows = len(matrix.deck_ids)
+    if not rows:
+        return []
+
+    lengths = matrix.ends - matrix.starts
+    entry_rows = np.repeat(np.arange(rows), lengths)
+    entry_norms = np.sqrt(np.add.reduceat(matrix.counts ** 2, matrix.starts))[entry_rows]
+    classes = [deck_classes.get(deck_id) for deck_id in matrix.deck_ids.tolist()]
+
+    archetypes = []
+    for player_class in sorted({player_class for player_class in classes if player_class is not None}):
+        class_rows = np.array([row for row, value in enumerate(classes) if value == player_class], dtype=np.int64)
+        local_row = np.full(rows, -1, dtype=np.int64)
+        local_row[class_rows] = np.arange(len(class_rows))
+
+        # Voci dei mazzi della classe (le righe restano ordinate), sulle sole carte usate dalla classe
+        selected = local_row[entry_rows] >= 0
+        class_columns, local_columns = np.unique(matrix.columns[selected], return_inverse=True)
+        local_entry_rows = local_row[entry_rows[selected]]
+        sparse_rows = SparseRows(
+            np.concatenate(([0], np.cumsum(lengths[class_rows])[:-1])), local_entry_rows, local_columns,
+            matrix.counts[selected] / entry_norms[selected], len(class_columns)
+        )
+
+        labels, sums = spherical_kmeans(sparse_rows, archetype_count(len(class_rows), max_archetypes), seed=seed)
+        labels, sums = merge_similar_groups(labels, sums)
+        centers = _normalized(sums)
+        scores = _row_products(sparse_rows, centers[labels[local_entry_rows], local_columns])
+
+        # Mazzi che contengono ogni carta e copie totali, per gruppo
+        cells = labels[local_entry_rows] * len(class_columns) + local_columns
+        presence = np.bincount(cells, minlength=sums.size).reshape(sums.shape)
+        copies = np.bincount(cells, weights=matrix.counts[selected], minlength=sums.size).reshape(sums.shape)
+        sizes = np.bincount(labels, minlength=len(sums))
+
+        class_archetypes = []
+        for group in range(len(sums)):
+            share = presence[group] / sizes[group]
+            order = np.lexsort((-copies[group], -share))
+            core = [column for column in order[:CORE_CARDS].tolist() if share[column] >= CORE_SHARE] or order[:1].tolist()
+            members = np.flatnonzero(labels == group)
+            class_archetypes.append(Archetype(
+                player_class,
+                tuple(matrix.card_ids[class_columns[core]].tolist()),
+                tuple(matrix.deck_ids[class_rows[members]].tolist()),
+                tuple(scores[members].tolist()),
+            ))
+
+        class_archetypes.sort(key=lambda archetype: -len(archetype.deck_ids))
+        archetypes.extend(class_archetypes)
+
+    return archetypes
+
+
+def archetype_name(player_class, core_names, used_names):
+    """ Nome dell'archetipo (classe e prime carte caratteristiche), reso univoco con un numero se necessario. """
+
+    name = f"{player_class}: {' / '.join(core_names[:NAME_CARDS])}"
+    count = used_names.get(name, 0) + 1
+    used_names[name] = count
+    return name if count == 1 else f"{name} ({count})"
+
+
+def store_archetypes(session, archetypes, deck_classes):
+    """
+    Sostituisce il contenuto di deck_archetype con gli archetipi indicati.
+
+    Returns:
+        int: Numero di mazzi con un archetipo.
+    """
+
+    card_ids = {card_id for archetype in archetypes for card_id in archetype.core_card_ids}
+    card_names = dict(session.query(Card.id, Card.name).filter(Card.id.in_(card_ids))) if card_ids else {}
+
+    rows, used_names = [], {}
+    for number, archetype in enumerate(archetypes, 1):
+        core_names = [card_names.get(card_id, str(card_id)) for card_id in archetype.core_card_ids]
+        name = archetype_name(archetype.player_class, core_names, used_names)
+        rows.extend(
+            {"deck_id": deck_id, "archetype": number, "name": name, "core_cards": CORE_SEPARATOR.join(core_names), "score": score}
+            for deck_id, score in zip(archetype.deck_ids, archetype.scores)
+            if deck_id in deck_classes       # Mazzi eliminati durante il calcolo
+        )
+
+    session.query(DeckArchetype).delete(synchronize_session=False)
+    if rows:
+        session.execute(insert(DeckArchetype), rows)
+    return len(rows)
+
+
+def recompute_archetypes(index):
+    """
+    Ricalcola e salva gli archetipi di tutti i mazzi.
+
+    Args:
+        index (DeckSimilarityIndex): Indice da cui leggere la matrice dei mazzi (aggiornata in modo incrementale).
+
+    Returns:
+        int: Numero di archetipi trovati.
+    """
+
+    matrix = index.matrix()
+    with db_session() as session:
+        deck_classes = dict(session.query(Deck.id, Deck.player_class))
+        archetypes = find_archetypes(matrix, deck_classes)
+        decks = store_archetypes(session, archetypes, deck_classes)
+
+    log.info(f"Archetipi ricalcolati: {len(archetypes)} archetipi per {decks} mazzi.")
+    return len(archetypes)
+
+
+
+class ArchetypeWorker:
+    """ Thread in background che ricalcola gli archetipi quando i mazzi cambiano. """
+
+    def __init__(self, index, delay=RECOMPUTE_DELAY):
+        self.index = index
+        self.delay = delay
+        self.computed_generation = None     # Generazione dei mazzi dell'ultimo ricalcolo
+        self._wake = Event()
+        self._stopping = Event()
+        self._thread = None
+
+
+    def start(self):
+        """ Avvia il thread e programma un primo ricalcolo. """
+
+        if self._thread is not None:
+            return
+        add_deck_change_listener(self.schedule)
+        self._thread = Thread(target=self._run, name="hdm-archetypes", daemon=True)
+        self._thread.start()
+        self.schedule()
+
+
+    def schedule(self, generation=None):
+        """ Richiede un ricalcolo (chiamata da scr.db dopo ogni modifica ai mazzi). """
+        self._wake.set()
+
+
+    def stop(self, timeout=5.0):
+        """ Ferma il thread (un ricalcolo in corso viene completato). """
+
+        remove_deck_change_listener(self.schedule)
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait()
+
+            # Attende che le modifiche si fermino per `delay` secondi
+            while self._wake.is_set() and not self._stopping.is_set():
+                self._wake.clear()
+                self._stopping.wait(self.delay)
+            if self._stopping.is_set():
+                return
+
+            generation = get_deck_generation()
+            if generation == self.computed_generation:
+                continue
+            try:
+                recompute_archetypes(self.index)
+                self.computed_generation = generation
+            except Exception as e:
+                log.error(f"Errore durante il ricalcolo degli archetipi: {str(e)}")
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
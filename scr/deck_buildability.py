@@ -0,0 +1,235 @@
+"""
+    deck_buildability.py
+
+    Modulo per la verifica dei mazzi costruibili con le carte possedute (Card.owned_quantity).
+
+    Path:
+        scr/deck_buildability.py
+
+    Descrizione:
+        BuildabilityEvaluator confronta tutti i mazzi con la collezione in un unico passaggio vettoriale
+        sulla matrice mazzi x carte dell'indice di somiglianza (scr/deck_similarity.py): per ogni voce
+        (mazzo, carta) le copie mancanti sono max(copie nel mazzo - copie possedute, 0), sommate per mazzo
+        con bincount. Un mazzo è costruibile se non gli manca nessuna copia.
+
+        Il risultato (BuildabilityReport) resta in cache finché non cambiano i mazzi o le copie possedute:
+        a ogni modifica delle carte vengono rilette dal database solo le copie delle carte modificate
+        (scr.db.get_changed_cards), e il passaggio viene ripetuto solo se qualcuna è davvero cambiata.
+
+    Note:
+        - NumPy è opzionale: senza NumPy query_missing_copies e query_missing_cards calcolano lo stesso
+          risultato con query SQL aggregate.
+        - Le carte dei mazzi non più presenti nella tabella cards contano come non possedute.
+        - La valutazione di 5k mazzi sintetici è misurata da benchmarks/bench_deck_buildability.py.
+
+"""
+
+# lib
+from threading import Lock
+from typing import NamedTuple
+from sqlalchemy import func, select
+from .db import read_session, Card, DeckCard, get_card_generation, get_changed_cards
+from .deck_similarity import NUMPY_AVAILABLE
+from utyls import logger as log
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+
+class MissingCard(NamedTuple):
+    """ Carta di un mazzo non posseduta in numero sufficiente. """
+
+    card_id: int
+    copies: int             # Copie da procurarsi
+
+
+
+class BuildabilityReport(NamedTuple):
+    """ Copie mancanti di tutti i mazzi rispetto alla collezione, da non modificare (vedi BuildabilityEvaluator.report). """
+
+    deck_ids: object        # numpy.ndarray: id del mazzo di ogni riga
+    missing: object         # numpy.ndarray: copie mancanti di ogni riga
+    missing_starts: object  # numpy.ndarray: prima voce mancante di ogni riga (più la fine dell'ultima)
+    card_ids: object        # numpy.ndarray: id della carta di ogni voce mancante
+    copies: object          # numpy.ndarray: copie mancanti di ogni voce
+    row_by_deck: dict       # id mazzo -> riga
+
+    def missing_copies(self, deck_id):
+        """ Copie mancanti per costruire il mazzo (0 per i mazzi costruibili o senza carte). """
+
+        row = self.row_by_deck.get(deck_id)
+        return 0 if row is None else int(self.missing[row])
+
+    def missing_cards(self, deck_id):
+        """ Carte mancanti del mazzo, come lista di MissingCard. """
+
+        row = self.row_by_deck.get(deck_id)
+        if row is None:
+            return []
+        start, end = self.missing_starts[row], self.missing_starts[row + 1]
+        return [MissingCard(card_id, copies) for card_id, copies in zip(self.card_ids[start:end].tolist(), self.copies[start:end].tolist())]
+
+    def missing_by_deck(self):
+        """ Dizionario {id mazzo: copie mancanti} dei soli mazzi non costruibili. """
+
+        rows = np.flatnonzero(self.missing)
+        return dict(zip(self.deck_ids[rows].tolist(), self.missing[rows].tolist()))
+
+
+
+def query_owned(session, card_ids=None):
+    """ Legge le coppie (id carta, copie possedute) delle carte possedute, eventualmente solo di quelle indicate. """
+
+    query = select(Card.id, Card.owned_quantity).where(Card.owned_quantity > 0)
+    if card_ids is not None:
+        query = query.where(Card.id.in_(list(card_ids)))
+    return session.execute(query).all()
+
+
+def evaluate_buildability(matrix, owned_ids, owned_counts):
+    """
+    Calcola le copie mancanti di tutti i mazzi in un solo passaggio vettoriale.
+
+    Args:
+        matrix (DeckMatrix): Matrice mazzi x carte compattata (vedi DeckSimilarityIndex.matrix).
+        owned_ids (numpy.ndarray): Id delle carte possedute, in ordine crescente.
+        owned_counts (numpy.ndarray): Copie possedute di ogni carta di owned_ids.
+
+    Returns:
+        BuildabilityReport: Copie mancanti per mazzo e carte mancanti di ogni mazzo.
+    """
+
+    # Copie possedute di ogni colonna (0 per le carte non possedute)
+    owned = np.zeros(len(matrix.card_ids), dtype=np.float64)
+    if len(owned_ids):
+        positions = np.minimum(np.searchsorted(owned_ids, matrix.card_ids), len(owned_ids) - 1)
+        found = owned_ids[positions] == matrix.card_ids
+        owned[found] = owned_counts[positions[found]]
+
+    rows = len(matrix.deck_ids)
+    entry_rows = np.repeat(np.arange(rows), matrix.ends - matrix.starts)
+    shortfall = matrix.counts - owned[matrix.columns]
+    short = shortfall > 0
+    short_rows = entry_rows[short]
+
+    return BuildabilityReport(
+        deck_ids=matrix.deck_ids,
+        missing=np.bincount(short_rows, weights=shortfall[short], minlength=rows).astype(np.int64),
+        missing_starts=np.concatenate(([0], np.cumsum(np.bincount(short_rows, minlength=rows)))),
+        card_ids=matrix.card_ids[matrix.columns[short]],
+        copies=shortfall[short].astype(np.int64),
+        row_by_deck=dict(zip(matrix.deck_ids.tolist(), range(rows))),
+    )
+
+
+
+class BuildabilityEvaluator:
+    """ Cache delle copie mancanti di tutti i mazzi, aggiornata alle modifiche di mazzi e collezione. """
+
+    def __init__(self, index):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy non è installato: la valutazione vettoriale dei mazzi costruibili non è disponibile.")
+
+        self.index = index              # DeckSimilarityIndex da cui leggere la matrice dei mazzi
+        self.owned = {}                 # id carta -> copie possedute (solo carte possedute)
+        self._generation = None         # Generazione delle carte lette (None = mai lette)
+        self._owned_changed = True
+        self._matrix = None             # Matrice usata per il risultato in cache
+        self._report = None
+        self._lock = Lock()
+
+
+    def load_owned(self, session):
+        """ Rilegge le copie possedute di tutte le carte. """
+
+        owned = dict(query_owned(session))
+        self._owned_changed = self._owned_changed or owned != self.owned
+        self.owned = owned
+
+
+    def update_owned(self, session, card_ids):
+        """ Rilegge solo le copie possedute delle carte indicate (modificate o eliminate). """
+
+        card_ids = list(card_ids)
+        previous = {card_id: self.owned.pop(card_id, 0) for card_id in card_ids}
+        current = dict(query_owned(session, card_ids))
+        self.owned.update(current)
+        self._owned_changed = self._owned_changed or any(current.get(card_id, 0) != copies for card_id, copies in previous.items())
+
+
+    def _ensure_owned(self):
+        """ Allinea le copie possedute alle carte del database (da chiamare con il lock acquisito). """
+
+        generation = get_card_generation()
+        if self._generation == generation:
+            return
+
+        changed = get_changed_cards(self._generation)
+        with read_session() as session:     # Solo dati confermati, anche dentro un db_session() con scritture in sospeso
+            if changed is None:
+                self.load_owned(session)
+            elif changed:
+                self.update_owned(session, changed)
+        self._generation = generation
+
+
+    def evaluate(self, matrix):
+        """ Restituisce il risultato per la matrice indicata, ricalcolandolo solo se mazzi o copie possedute sono cambiati. """
+
+        # Ogni aggiornamento dell'indice sostituisce gli array delle voci (card_ids invece è ricostruito a ogni istantanea)
+        if self._report is not None and not self._owned_changed and all(a is b for a, b in zip(matrix[:-1], self._matrix[:-1])):
+            return self._report
+
+        owned_ids = np.array(sorted(self.owned), dtype=np.int64)
+        owned_counts = np.array([self.owned[card_id] for card_id in owned_ids.tolist()], dtype=np.float64)
+        self._report = evaluate_buildability(matrix, owned_ids, owned_counts)
+        self._matrix = matrix
+        self._owned_changed = False
+        return self._report
+
+
+    def report(self):
+        """ Restituisce il BuildabilityReport aggiornato (i dati vengono letti al primo uso e poi solo se cambiano). """
+
+        with self._lock:
+            self._ensure_owned()
+            return self.evaluate(self.index.matrix())
+
+
+    def invalidate(self):
+        """ Forza la rilettura di tutte le copie possedute alla prossima interrogazione. """
+        self._generation = None
+
+
+
+#@@# Equivalenti SQL (senza NumPy)
+
+def query_missing_copies(session):
+    """ Equivalente SQL di BuildabilityReport.missing_by_deck: {id mazzo: copie mancanti} con una query aggregata. """
+
+    owned = func.coalesce(Card.owned_quantity, 0)
+    return dict(session.execute(
+        select(DeckCard.deck_id, func.sum(DeckCard.quantity - owned))
+        .outerjoin(Card, Card.id == DeckCard.card_id)
+        .where(DeckCard.quantity > owned)
+        .group_by(DeckCard.deck_id)
+    ).all())
+
+
+def query_missing_cards(session, deck_id):
+    """ Equivalente SQL di BuildabilityReport.missing_cards. """
+
+    owned = func.coalesce(Card.owned_quantity, 0)
+    return [MissingCard(card_id, copies) for card_id, copies in session.execute(
+        select(DeckCard.card_id, DeckCard.quantity - owned)
+        .outerjoin(Card, Card.id == DeckCard.card_id)
+        .where(DeckCard.deck_id == deck_id, DeckCard.quantity > owned)
+        .order_by(DeckCard.card_id)
+    )]
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
@@ -0,0 +1,224 @@
+"""
+    deck_export.py
+
+    Modulo per l'esportazione di tutti i mazzi in un file (JSON Lines, CSV o testo di Hearthstone).
+
+    Path:
+        scr/deck_export.py
+
+    Descrizione:
+        iter_exported_decks() legge mazzi e carte con una sola query (decks -> deck_cards -> cards) eseguita
+        con yield_per: le righe arrivano a blocchi e vengono raggruppate per mazzo man mano, quindi in memoria
+        c'è un solo mazzo alla volta qualunque sia la dimensione della libreria.
+        I writer (write_jsonl, write_csv, write_text) scrivono ogni mazzo appena letto su un file con buffer;
+        il formato testo è lo stesso degli appunti di Hearthstone e può essere reimportato con DbManager.import_decks.
+
+    Note:
+        - Il file viene scritto con un nome temporaneo e rinominato alla fine: un'esportazione interrotta
+          non lascia un file incompleto al posto di quello richiesto.
+        - Uso senza interfaccia:
+              python -m scr.deck_export mazzi.jsonl
+              python -m scr.deck_export mazzi.txt --format txt
+        - Tempo e memoria dell'esportazione sono misurati da benchmarks/bench_deck_export.py.
+
+"""
+
+# lib
+import csv, json, os
+from itertools import groupby
+from operator import itemgetter
+from typing import NamedTuple, Optional
+from sqlalchemy import select
+from .db import db_session, Deck, DeckCard, Card
+from .deck_parser import DECK_FOOTER, ParsedCard
+from .deckstring import encode_deckstring, game_format_code, hero_dbf_id
+from utyls import logger as log
+
+
+YIELD_PER = 1000                # Righe lette dal database per blocco
+BUFFER_SIZE = 1 << 16           # Byte del buffer di scrittura del file
+CSV_HEADER = ("deck", "player_class", "game_format", "quantity", "mana_cost", "card")
+
+
+
+class ExportedDeck(NamedTuple):
+    """ Mazzo letto per l'esportazione. """
+
+    name: str
+    player_class: str
+    game_format: str
+    cards: tuple                # Tuple di ParsedCard ordinate per costo e nome
+    deckstring: Optional[str]   # None se qualche carta non ha il dbf_id o la classe non è riconosciuta
+
+    def as_dict(self):
+        """ Restituisce il mazzo come dizionario (formato JSON Lines). """
+        return {
+            "name": self.name,
+            "player_class": self.player_class,
+            "game_format": self.game_format,
+            "deckstring": self.deckstring,
+            "cards": [card.as_dict() for card in self.cards],
+        }
+
+
+
+def format_deck_text(name, player_class, game_format, cards, deckstring=None):
+    """
+    Restituisce il testo di un mazzo nel formato degli appunti di Hearthstone.
+
+    La riga dell'anno del formato (es. "# Anno del Pegaso") viene omessa: il database non la conserva
+    e il parser non la richiede.
+
+    Args:
+        cards (iterable): Tuple (quantità, costo, nome) delle carte, es. ParsedCard.
+        deckstring (str): Deckstring da inserire prima della riga finale (opzionale).
+    """
+
+    lines = [f"### {name}", f"# Classe: {player_class}", f"# Formato: {game_format}", "#"]
+    lines.extend(f"# {quantity}x ({mana_cost}) {card_name}" for quantity, mana_cost, card_name in cards)
+    lines.append("#")
+    if deckstring:
+        lines += [deckstring, "#"]
+    lines.append(DECK_FOOTER)
+    return "\n".join(lines) + "\n"
+
+
+def iter_exported_decks(session, yield_per=YIELD_PER):
+    """
+    Legge tutti i mazzi con le loro carte, in ordine di id, un mazzo alla volta.
+
+    Args:
+        session: Sessione del database.
+        yield_per (int): Righe lette dal database per blocco.
+
+    Yields:
+        ExportedDeck: Un record per mazzo (anche per i mazzi senza carte).
+    """
+
+    query = select(
+        Deck.id, Deck.name, Deck.player_class, Deck.game_format,
+        DeckCard.quantity, Card.mana_cost, Card.name, Card.dbf_id
+    ).outerjoin(DeckCard, DeckCard.deck_id == Deck.id).outerjoin(Card, Card.id == DeckCard.card_id).order_by(Deck.id)
+
+    rows = session.execute(query.execution_options(yield_per=yield_per))
+    for _, deck_rows in groupby(rows, key=itemgetter(0)):
+        deck_rows = list(deck_rows)
+        _, name, player_class, game_format = deck_rows[0][:4]
+
+        cards, dbf_cards = [], {}
+        for *_, quantity, mana_cost, card_name, dbf_id in deck_rows:
+            if card_name is None:
+                continue            # Mazzo senza carte
+            cards.append(ParsedCard(quantity, mana_cost, card_name))
+            if dbf_cards is not None:
+                if dbf_id is None:
+                    dbf_cards = None
+                else:
+                    dbf_cards[dbf_id] = dbf_cards.get(dbf_id, 0) + quantity
+
+        hero = hero_dbf_id(player_class)
+        deckstring = None
+        if cards and dbf_cards is not None and hero is not None:
+            deckstring = encode_deckstring(dbf_cards, hero, game_format_code(game_format))
+
+        cards.sort(key=lambda card: (card.mana_cost, card.name))
+        yield ExportedDeck(name, player_class, game_format, tuple(cards), deckstring)
+
+
+def write_jsonl(decks, stream):
+    """ Scrive un oggetto JSON per riga (un mazzo per riga). Restituisce il numero di mazzi scritti. """
+
+    count = 0
+    for deck in decks:
+        stream.write(json.dumps(deck.as_dict(), ensure_ascii=False))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(decks, stream):
+    """ Scrive una riga CSV per ogni carta di ogni mazzo (i mazzi senza carte hanno una riga senza carta). """
+
+    writer = csv.writer(stream)
+    writer.writerow(CSV_HEADER)
+    count = 0
+    for deck in decks:
+        deck_columns = (deck.name, deck.player_class, deck.game_format)
+        if deck.cards:
+            writer.writerows(deck_columns + tuple(card) for card in deck.cards)
+        else:
+            writer.writerow(deck_columns + ("", "", ""))
+        count += 1
+    return count
+
+
+def write_text(decks, stream):
+    """ Scrive i mazzi nel formato degli appunti di Hearthstone, separati da una riga vuota. """
+
+    count = 0
+    for deck in decks:
+        if count:
+            stream.write("\n")
+        stream.write(format_deck_text(deck.name, deck.player_class, deck.game_format, deck.cards, deck.deckstring))
+        count += 1
+    return count
+
+
+WRITERS = {"jsonl": write_jsonl, "csv": write_csv, "txt": write_text}
+
+
+def export_format_for_path(path):
+    """ Restituisce il formato di esportazione dall'estensione del file (jsonl se non riconosciuta). """
+
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return extension if extension in WRITERS else "jsonl"
+
+
+def export_decks(path, export_format=None, yield_per=YIELD_PER):
+    """
+    Esporta tutti i mazzi del database in un file.
+
+    Args:
+        path (str): Percorso del file da scrivere.
+        export_format (str): "jsonl", "csv" o "txt" (se None, dall'estensione del file).
+        yield_per (int): Righe lette dal database per blocco.
+
+    Returns:
+        int: Numero di mazzi esportati.
+
+    Raises:
+        ValueError: Se il formato non è supportato.
+    """
+
+    export_format = export_format or export_format_for_path(path)
+    writer = WRITERS.get(export_format)
+    if writer is None:
+        raise ValueError(f"Formato di esportazione non supportato: {export_format}")
+
+    temp_path = f"{path}.tmp"
+    try:
+        with db_session() as session, open(temp_path, "w", encoding="utf-8", newline="", buffering=BUFFER_SIZE) as stream:
+            count = writer(iter_exported_decks(session, yield_per), stream)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    log.info(f"Esportati {count} mazzi in '{path}' (formato {export_format}).")
+    return count
+
+
+
+#@@@# Start del modulo
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Esporta tutti i mazzi del database in un file.")
+    parser.add_argument("path", help="File da scrivere (.jsonl, .csv o .txt)")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="Formato del file (predefinito: dall'estensione)")
+    arguments = parser.parse_args()
+
+    print(f"Esportati {export_decks(arguments.path, arguments.format)} mazzi in '{arguments.path}'.")
+else:
+    log.debug(f"Carico: {__name__}")
@@ -0,0 +1,235 @@
+"""
+    deck_parser.py
+
+    Modulo per la lettura dei mazzi in formato testo (appunti di Hearthstone e file esportati).
+
+    Path:
+        scr/deck_parser.py
+
+    Descrizione:
+        iter_decks() legge l'input una sola volta e restituisce un ParsedDeck per ogni mazzo incontrato:
+        nome, classe, formato, righe delle carte e deckstring. Il testo viene diviso nei blocchi che iniziano
+        con "###" e ogni blocco viene analizzato con espressioni regolari precompilate (findall su più righe),
+        così il lavoro in Python dipende dal numero di mazzi e di carte, non dal numero di righe.
+        L'input può contenere molti mazzi consecutivi e può essere un file aperto, letto a blocchi:
+        la memoria usata dipende dal mazzo corrente e non dalla dimensione dell'input.
+
+        Formato di un mazzo:
+            ### Nome del mazzo
+            # Classe: Mago
+            # Formato: Standard
+            # 2x (1) Nome della carta
+            AAECAf0E...
+            # Per utilizzare questo mazzo, copialo negli appunti e crea un nuovo mazzo in Hearthstone
+
+    Note:
+        - Gli errori (nome mancante, nessuna carta, riga finale mancante, righe non riconosciute) sono
+          raccolti nel ParsedDeck del mazzo a cui appartengono: un mazzo errato non interrompe la lettura degli altri.
+        - La lettura di 10k mazzi sintetici è misurata da benchmarks/bench_deck_parser.py.
+
+"""
+
+# lib
+import re
+from typing import NamedTuple, Optional
+from utyls import logger as log
+
+
+DEFAULT_PLAYER_CLASS = "Neutrale"
+DEFAULT_GAME_FORMAT = "Standard"
+DECK_HEADER = "###"
+DECK_FOOTER = "# Per utilizzare questo mazzo, copialo negli appunti e crea un nuovo mazzo in Hearthstone"
+METADATA_LINES = 3          # Righe dopo l'intestazione in cui cercare classe e formato
+CHUNK_SIZE = 1 << 20        # Caratteri letti per volta dai file
+
+HEADER_SEPARATOR = "\n" + DECK_HEADER
+CARD_LINE_RE = re.compile(r"^[ \t]*#*[ \t]*(\d+)x?[ \t]*\((\d+)\)[ \t]*(.*\S)", re.MULTILINE)
+METADATA_RE = re.compile(r"^#[ \t]*(Classe|Formato)[ \t]*:[ \t]*(.*?)[ \t]*$")
+UNCOMMENTED_LINE_RE = re.compile(r"^[ \t]*([^#\s].*)", re.MULTILINE)
+DECKSTRING_RE = re.compile(r"^[A-Za-z0-9+/]+={0,2}$")
+
+
+
+class ParsedCard(NamedTuple):
+    """ Riga di una carta letta da un mazzo. """
+
+    quantity: int
+    mana_cost: int
+    name: str
+
+    def as_dict(self):
+        """ Restituisce la carta nel formato usato da DbManager (quantity, mana_cost, name). """
+        return {"quantity": self.quantity, "mana_cost": self.mana_cost, "name": self.name}
+
+
+
+class ParsedDeck(NamedTuple):
+    """ Mazzo letto da un testo, con gli eventuali errori riscontrati. """
+
+    name: str
+    player_class: str
+    game_format: str
+    cards: tuple            # Tuple di ParsedCard, nell'ordine del testo
+    deckstring: Optional[str]
+    line: int               # Numero della riga di intestazione (###), da 1
+    errors: tuple           # Messaggi di errore (vuota = mazzo valido)
+
+    @property
+    def valid(self):
+        """ True se il mazzo è completo e senza errori. """
+        return not self.errors
+
+    def metadata(self):
+        """ Restituisce nome, classe e formato nel formato di DbManager.parse_deck_metadata. """
+        return {"name": self.name, "player_class": self.player_class, "game_format": self.game_format}
+
+    def card_dicts(self):
+        """ Restituisce le carte come lista di dizionari (vedi ParsedCard.as_dict). """
+        return [card.as_dict() for card in self.cards]
+
+
+
+def parse_card_line(line):
+    """ Restituisce il ParsedCard di una riga di testo, oppure None se la riga non descrive una carta. """
+
+    match = CARD_LINE_RE.match(line)
+    if match:
+        return ParsedCard(int(match.group(1)), int(match.group(2)), match.group(3))
+    return None
+
+
+def parse_card_lines(text):
+    """ Restituisce i ParsedCard di tutte le righe di carte di un testo, con una sola ricerca. """
+
+    new_card = tuple.__new__            # Crea i ParsedCard senza passare dal costruttore (più rapido su molte carte)
+    return tuple([
+        new_card(ParsedCard, (int(quantity), int(mana_cost), name))
+        for quantity, mana_cost, name in CARD_LINE_RE.findall(text)
+    ])
+
+
+def _iter_chunks(source, chunk_size=CHUNK_SIZE):
+    """ Restituisce il testo a blocchi: la stringa intera, letture successive di un file o le righe di un iterabile. """
+
+    if isinstance(source, str):
+        yield source
+        return
+
+    read = getattr(source, "read", None)
+    if read:
+        while True:
+            chunk = read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        for line in source:
+            yield line if line.endswith("\n") else line + "\n"
+
+
+def _iter_blocks(source):
+    """
+    Divide l'input nei blocchi che iniziano con "###", leggendolo una sola volta.
+
+    Yields:
+        tuple: (numero della riga di intestazione, testo del blocco senza "###").
+    """
+
+    pending = "\n"              # Un'intestazione sulla prima riga è preceduta da un a capo come le altre
+    pending_is_deck = False     # False finché pending contiene solo il testo che precede la prima intestazione
+    line_number = 0             # Riga in cui inizia pending (0 = l'a capo aggiunto)
+    keep = len(HEADER_SEPARATOR) - 1
+
+    for chunk in _iter_chunks(source):
+        pending += chunk
+        blocks = pending.split(HEADER_SEPARATOR)
+        pending = blocks.pop()      # L'ultimo blocco può continuare nel prossimo pezzo
+
+        for block in blocks:
+            if pending_is_deck:
+                yield line_number, block
+            pending_is_deck = True
+            line_number += block.count("\n") + 1
+
+        # Il testo prima della prima intestazione non serve: ne resta solo la coda (un separatore può essere a cavallo)
+        if not pending_is_deck and len(pending) > keep:
+            line_number += pending.count("\n", 0, len(pending) - keep)
+            pending = pending[-keep:]
+
+    if pending_is_deck:
+        yield line_number, pending
+
+
+def _parse_block(line_number, block):
+    """ Crea il ParsedDeck di un blocco: carte e righe senza "#" sono estratte con una ricerca ciascuna sull'intero blocco. """
+
+    name_line, _, body = block.partition("\n")
+    footer = body.find(DECK_FOOTER)
+    complete = footer >= 0
+    if complete:
+        body = body[:footer]            # Il testo dopo la riga finale non appartiene al mazzo
+
+    cards = parse_card_lines(body)
+
+    player_class, game_format = DEFAULT_PLAYER_CLASS, DEFAULT_GAME_FORMAT
+    for line in body.split("\n", METADATA_LINES)[:METADATA_LINES]:
+        match = METADATA_RE.match(line.strip())
+        if match:
+            if match.group(1) == "Classe":
+                player_class = match.group(2)
+            else:
+                game_format = match.group(2)
+
+    deckstring, errors = None, []
+    for match in UNCOMMENTED_LINE_RE.finditer(body):
+        text = match.group(1).strip()
+        if CARD_LINE_RE.match(text):
+            continue                    # Riga di una carta senza "#" iniziale (già letta)
+
+        text_line = line_number + 1 + body.count("\n", 0, match.start())
+        if not DECKSTRING_RE.match(text):
+            errors.append(f"Riga {text_line}: testo non riconosciuto: {text[:40]}")
+        elif deckstring:
+            errors.append(f"Riga {text_line}: deckstring ripetuto.")
+        else:
+            deckstring = text
+
+    name = name_line.strip()
+    if not name:
+        errors.append(f"Riga {line_number}: nome del mazzo mancante.")
+    if not cards and not deckstring:
+        errors.append(f"Riga {line_number}: nessuna carta nel mazzo.")
+    if not complete:
+        errors.append(f"Riga {line_number}: riga finale del mazzo mancante (mazzo incompleto).")
+
+    return ParsedDeck(name, player_class, game_format, cards, deckstring, line_number, tuple(errors))
+
+
+def iter_decks(source):
+    """
+    Legge in un solo passaggio tutti i mazzi contenuti in un testo.
+
+    Args:
+        source (str | file | iterable): Testo completo, file aperto in modalità testo o righe di testo.
+
+    Yields:
+        ParsedDeck: Un record per ogni riga che inizia con "###", nell'ordine del testo.
+                    Il testo che precede il primo mazzo o segue la riga finale di un mazzo viene ignorato.
+    """
+
+    for line_number, block in _iter_blocks(source):
+        yield _parse_block(line_number, block)
+
+
+def parse_deck(source):
+    """ Restituisce il primo mazzo del testo (es. il contenuto degli appunti), oppure None se non ce ne sono. """
+
+    if not source:
+        return None
+    return next(iter_decks(source), None)
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
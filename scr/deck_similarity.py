@@ -0,0 +1,362 @@
+"""
+    deck_similarity.py
+
+    Modulo per la ricerca dei mazzi simili (varianti e quasi duplicati di una lista).
+
+    Path:
+        scr/deck_similarity.py
+
+    Descrizione:
+        DeckSimilarityIndex mantiene in memoria la matrice sparsa mazzi x carte di deck_cards in forma CSR:
+        per ogni riga (mazzo) l'intervallo starts/ends delle sue voci, e per ogni voce la colonna (carta)
+        e il numero di copie. Confrontare un mazzo con tutti gli altri è un solo passaggio vettoriale sulle voci
+        (bincount per riga), quindi il tempo dipende dal numero totale di carte nei mazzi e non da query SQL.
+            - coseno: prodotto scalare dei conteggi diviso il prodotto delle norme
+            - Jaccard: somma dei minimi delle copie diviso la somma dei massimi (Jaccard sui multinsiemi)
+
+        L'indice si aggiorna in modo incrementale: i mazzi aggiunti, modificati o eliminati (vedi
+        scr.db.mark_decks_changed) vengono riletti da soli; le righe sostituite sono marcate come non attive
+        e la matrice viene compattata quando le voci non attive superano quelle attive.
+
+    Note:
+        - NumPy è opzionale: se non è installato NUMPY_AVAILABLE è False e query_similar_decks calcola
+          le stesse somiglianze con una query SQL (più lenta sulle librerie grandi).
+        - Caricamento, aggiornamento e ricerca su un database temporaneo di 10k mazzi sintetici sono misurati da benchmarks/bench_deck_similarity.py.
+
+"""
+
+# lib
+from math import sqrt
+from threading import Lock
+from typing import NamedTuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from .db import read_session, DeckCard, get_deck_generation, get_changed_decks
+from utyls import logger as log
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+METRICS = ("cosine", "jaccard")
+SIMILAR_DECKS_LIMIT = 10        # Mazzi simili restituiti per ricerca
+FULL_RELOAD_RATIO = 0.25        # Oltre questa frazione di mazzi modificati si ricarica tutta la matrice
+
+
+
+class DeckMatrix(NamedTuple):
+    """ Istantanea della matrice mazzi x carte senza righe non attive, da non modificare (vedi DeckSimilarityIndex.matrix). """
+
+    deck_ids: object        # numpy.ndarray: id del mazzo di ogni riga
+    starts: object          # numpy.ndarray: prima voce di ogni riga
+    ends: object            # numpy.ndarray: voce successiva all'ultima di ogni riga
+    columns: object         # numpy.ndarray: colonna di ogni voce
+    counts: object          # numpy.ndarray: copie di ogni voce
+    card_ids: object        # numpy.ndarray: id della carta di ogni colonna
+
+
+
+class SimilarDeck(NamedTuple):
+    """ Mazzo simile a quello cercato. """
+
+    deck_id: int
+    score: float        # Somiglianza tra 0 e 1
+
+
+
+def _top_matches(deck_ids, scores, limit):
+    """ Restituisce i SimilarDeck con i punteggi positivi migliori (a parità di punteggio, per id del mazzo). """
+
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > limit:
+        # Si tengono tutti i pari merito dell'ultimo posto, poi l'ordinamento li sceglie per id
+        threshold = -np.partition(-scores[candidates], limit - 1)[limit - 1]
+        candidates = candidates[scores[candidates] >= threshold]
+    order = np.lexsort((deck_ids[candidates], -scores[candidates]))[:limit]
+    return [SimilarDeck(deck_id, score) for deck_id, score in zip(deck_ids[candidates[order]].tolist(), scores[candidates[order]].tolist())]
+
+
+
+class DeckSimilarityIndex:
+    """ Matrice sparsa mazzi x carte (CSR) per la ricerca vettoriale dei mazzi simili. """
+
+    def __init__(self):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy non è installato: l'indice di somiglianza dei mazzi non è disponibile.")
+
+        self._generation = None         # Generazione dei mazzi caricati (None = mai caricati)
+        self._lock = Lock()
+        self.clear()
+
+
+    def clear(self):
+        """ Svuota la matrice. """
+
+        self.deck_ids = np.empty(0, dtype=np.int64)         # Id del mazzo di ogni riga
+        self.starts = np.empty(0, dtype=np.int64)           # Prima voce di ogni riga
+        self.ends = np.empty(0, dtype=np.int64)             # Voce successiva all'ultima di ogni riga
+        self.active = np.empty(0, dtype=bool)               # False per le righe sostituite o eliminate
+        self.totals = np.empty(0, dtype=np.float64)         # Copie totali di ogni riga
+        self.norms = np.empty(0, dtype=np.float64)          # Norma euclidea dei conteggi di ogni riga
+        self.entry_rows = np.empty(0, dtype=np.int64)       # Riga di ogni voce
+        self.entry_columns = np.empty(0, dtype=np.int64)    # Colonna (carta) di ogni voce
+        self.entry_counts = np.empty(0, dtype=np.float64)   # Copie di ogni voce
+        self.column_by_card = {}                            # id carta -> colonna
+        self.row_by_deck = {}                               # id mazzo -> riga attiva
+        self.inactive_entries = 0
+
+
+    @property
+    def size(self):
+        """ Numero di mazzi (con almeno una carta) nell'indice. """
+        return len(self.row_by_deck)
+
+
+    #@@# Caricamento e aggiornamento
+
+    def append_rows(self, rows):
+        """
+        Aggiunge alla matrice le carte di alcuni mazzi.
+
+        Args:
+            rows (list): Tuple (id mazzo, id carta, copie) ordinate per id del mazzo; i mazzi non devono essere già presenti.
+        """
+
+        if not rows:
+            return
+
+        deck_column, card_column, count_column = (np.array(values, dtype=np.int64) for values in zip(*rows))
+        cards, inverse = np.unique(card_column, return_inverse=True)
+        column_by_card = self.column_by_card
+        columns = np.array([column_by_card.setdefault(card_id, len(column_by_card)) for card_id in cards.tolist()], dtype=np.int64)
+
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(deck_column)) + 1))
+        ends = np.append(starts[1:], len(deck_column))
+        counts = count_column.astype(np.float64)
+        first_row, offset = len(self.deck_ids), len(self.entry_rows)
+        new_deck_ids = deck_column[starts]
+
+        self.deck_ids = np.concatenate((self.deck_ids, new_deck_ids))
+        self.starts = np.concatenate((self.starts, starts + offset))
+        self.ends = np.concatenate((self.ends, ends + offset))
+        self.active = np.concatenate((self.active, np.ones(len(starts), dtype=bool)))
+        self.totals = np.concatenate((self.totals, np.add.reduceat(counts, starts)))
+        self.norms = np.concatenate((self.norms, np.sqrt(np.add.reduceat(counts * counts, starts))))
+        self.entry_rows = np.concatenate((self.entry_rows, np.repeat(np.arange(first_row, first_row + len(starts)), ends - starts)))
+        self.entry_columns = np.concatenate((self.entry_columns, columns[inverse]))
+        self.entry_counts = np.concatenate((self.entry_counts, counts))
+        self.row_by_deck.update(zip(new_deck_ids.tolist(), range(first_row, first_row + len(starts))))
+
+
+    def remove_decks(self, deck_ids):
+        """ Disattiva le righe dei mazzi indicati (i mazzi assenti sono ignorati). """
+
+        for deck_id in deck_ids:
+            row = self.row_by_deck.pop(deck_id, None)
+            if row is not None:
+                self.active[row] = False
+                self.inactive_entries += int(self.ends[row] - self.starts[row])
+
+
+    def compact(self):
+        """ Elimina dalla matrice le righe non attive. """
+
+        keep_entries = self.active[self.entry_rows]
+        lengths = (self.ends - self.starts)[self.active]
+        new_rows = np.cumsum(self.active) - 1
+
+        self.deck_ids = self.deck_ids[self.active]
+        self.ends = np.cumsum(lengths)
+        self.starts = self.ends - lengths
+        self.totals = self.totals[self.active]
+        self.norms = self.norms[self.active]
+        self.entry_rows = new_rows[self.entry_rows[keep_entries]]
+        self.entry_columns = self.entry_columns[keep_entries]
+        self.entry_counts = self.entry_counts[keep_entries]
+        self.active = np.ones(len(self.deck_ids), dtype=bool)
+        self.row_by_deck = dict(zip(self.deck_ids.tolist(), range(len(self.deck_ids))))
+        self.inactive_entries = 0
+
+
+    @staticmethod
+    def query_rows(session, deck_ids=None):
+        """ Legge le righe (id mazzo, id carta, copie) di deck_cards, ordinate per mazzo. """
+
+        query = select(DeckCard.deck_id, DeckCard.card_id, DeckCard.quantity).where(DeckCard.quantity > 0)
+        if deck_ids is not None:
+            query = query.where(DeckCard.deck_id.in_(list(deck_ids)))
+        return session.execute(query.order_by(DeckCard.deck_id)).all()
+
+
+    def refresh(self, session):
+        """ Ricarica l'intera matrice con un'unica query. """
+
+        self.clear()
+        self.append_rows(self.query_rows(session))
+        log.debug(f"Indice di somiglianza dei mazzi ricaricato: {self.size} mazzi, {len(self.entry_rows)} voci.")
+
+
+    def update_decks(self, session, deck_ids):
+        """ Rilegge solo le righe dei mazzi indicati (aggiunti, modificati o eliminati). """
+
+        deck_ids = list(deck_ids)
+        self.remove_decks(deck_ids)
+        self.append_rows(self.query_rows(session, deck_ids))
+        if self.inactive_entries > len(self.entry_rows) - self.inactive_entries:
+            self.compact()
+
+
+    def _ensure_fresh(self):
+        """ Allinea la matrice ai mazzi del database (da chiamare con il lock acquisito). """
+
+        generation = get_deck_generation()
+        if self._generation == generation:
+            return
+
+        changed = get_changed_decks(self._generation)
+        with read_session() as session:     # Solo dati confermati, anche dentro un db_session() con scritture in sospeso
+            if changed is None or len(changed) > max(self.size, 1) * FULL_RELOAD_RATIO:
+                self.refresh(session)
+            elif changed:
+                self.update_decks(session, changed)
+        self._generation = generation
+
+
+    def ensure_fresh(self):
+        """ Ricarica i mazzi modificati dall'ultimo aggiornamento (tutti al primo uso). """
+
+        with self._lock:
+            self._ensure_fresh()
+
+
+    def invalidate(self):
+        """ Forza il ricaricamento completo alla prossima interrogazione. """
+        self._generation = None
+
+
+    def snapshot(self):
+        """ Restituisce la matrice corrente, compattata, come DeckMatrix (senza aggiornarla dal database). """
+
+        if self.inactive_entries:
+            self.compact()
+        card_ids = np.empty(len(self.column_by_card), dtype=np.int64)
+        card_ids[list(self.column_by_card.values())] = list(self.column_by_card.keys())
+        return DeckMatrix(self.deck_ids, self.starts, self.ends, self.entry_columns, self.entry_counts, card_ids)
+
+
+    def matrix(self):
+        """
+        Restituisce la matrice aggiornata, per le elaborazioni su tutti i mazzi (es. gli archetipi).
+
+        Gli aggiornamenti successivi sostituiscono gli array invece di modificarli, quindi il risultato resta coerente.
+        """
+
+        with self._lock:
+            self._ensure_fresh()
+            return self.snapshot()
+
+
+    #@@# Ricerca
+
+    def scores(self, deck_id, metric="cosine"):
+        """
+        Calcola la somiglianza di un mazzo con tutte le righe della matrice (senza aggiornarla).
+
+        Returns:
+            numpy.ndarray | None: Un punteggio per riga (-1 per il mazzo stesso e le righe non attive),
+                                  None se il mazzo non è nell'indice.
+        """
+
+        if metric not in METRICS:
+            raise ValueError(f"Metrica di somiglianza non supportata: {metric}")
+
+        row = self.row_by_deck.get(deck_id)
+        if row is None:
+            return None
+
+        start, end = self.starts[row], self.ends[row]
+        vector = np.zeros(len(self.column_by_card), dtype=np.float64)
+        vector[self.entry_columns[start:end]] = self.entry_counts[start:end]
+        shared = vector[self.entry_columns]             # Copie del mazzo cercato per ogni voce (0 se non ha la carta)
+
+        if metric == "cosine":
+            dots = np.bincount(self.entry_rows, weights=shared * self.entry_counts, minlength=len(self.deck_ids))
+            scores = dots / (self.norms * self.norms[row])
+        else:
+            minimums = np.bincount(self.entry_rows, weights=np.minimum(shared, self.entry_counts), minlength=len(self.deck_ids))
+            scores = minimums / (self.totals + self.totals[row] - minimums)
+
+        scores[~self.active] = -1
+        scores[row] = -1
+        return scores
+
+
+    def similar(self, deck_id, limit=SIMILAR_DECKS_LIMIT, metric="cosine"):
+        """
+        Restituisce i mazzi più simili a quello indicato.
+
+        Args:
+            deck_id (int): Id del mazzo cercato.
+            limit (int): Numero massimo di risultati.
+            metric (str): "cosine" o "jaccard".
+
+        Returns:
+            list: SimilarDeck ordinati per somiglianza decrescente (solo mazzi con almeno una carta in comune).
+        """
+
+        with self._lock:
+            self._ensure_fresh()
+            scores = self.scores(deck_id, metric)
+            if scores is None:
+                return []
+            return _top_matches(self.deck_ids, scores, limit)
+
+
+
+def query_similar_decks(session, deck_id, limit=SIMILAR_DECKS_LIMIT, metric="cosine"):
+    """
+    Equivalente SQL di DeckSimilarityIndex.similar (usato quando NumPy non è installato).
+
+    I mazzi con almeno una carta in comune e le loro somme vengono calcolati con due query aggregate.
+    """
+
+    if metric not in METRICS:
+        raise ValueError(f"Metrica di somiglianza non supportata: {metric}")
+
+    other = aliased(DeckCard)
+    shared = dict((candidate, (dot, minimum)) for candidate, dot, minimum in session.execute(
+        select(other.deck_id, func.sum(DeckCard.quantity * other.quantity), func.sum(func.min(DeckCard.quantity, other.quantity)))
+        .join(other, other.card_id == DeckCard.card_id)
+        .where(DeckCard.deck_id == deck_id, other.deck_id != deck_id, DeckCard.quantity > 0, other.quantity > 0)
+        .group_by(other.deck_id)
+    ))
+    if not shared:
+        return []
+
+    sums = {candidate: (squares, total) for candidate, squares, total in session.execute(
+        select(DeckCard.deck_id, func.sum(DeckCard.quantity * DeckCard.quantity), func.sum(DeckCard.quantity))
+        .where(DeckCard.deck_id.in_([deck_id, *shared]), DeckCard.quantity > 0)
+        .group_by(DeckCard.deck_id)
+    )}
+
+    squares, total = sums[deck_id]
+    matches = []
+    for candidate, (dot, minimum) in shared.items():
+        if metric == "cosine":
+            score = dot / sqrt(squares * sums[candidate][0])
+        else:
+            score = minimum / (total + sums[candidate][1] - minimum)
+        matches.append(SimilarDeck(candidate, score))
+
+    matches.sort(key=lambda match: (-match.score, match.deck_id))
+    return matches[:limit]
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
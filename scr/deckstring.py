@@ -0,0 +1,224 @@
+"""
+    deckstring.py
+
+    Modulo per la codifica e decodifica dei deckstring di Hearthstone (il codice base64 dei mazzi).
+
+    Path:
+        scr/deckstring.py
+
+    Descrizione:
+        Un deckstring è una sequenza di interi varint (7 bit per byte) codificata in base64:
+            0 (riservato), versione (1), formato, numero di eroi e loro DBF id,
+            poi le carte in tre gruppi: copie singole, doppie e con più copie (DBF id e quantità),
+            infine un indicatore delle sideboard (carte associate ad altre carte, es. il Principe Renathal).
+        Le carte sono identificate dal DBF id, l'identificativo numerico del gioco (colonna cards.dbf_id).
+        encode_deckstring() e decode_deckstring() lavorano solo su interi: l'associazione con le carte
+        del database (DBF id <-> id) è in scr/models.py.
+
+    Note:
+        - I gruppi di carte sono ordinati per DBF id (le sideboard per carta proprietaria e DBF id), come nei
+          deckstring generati dal gioco, quindi lo stesso mazzo produce sempre lo stesso deckstring.
+        - La codifica e la decodifica di 10k mazzi sintetici sono misurate da benchmarks/bench_deckstring.py.
+
+"""
+
+# lib
+import base64, binascii
+from typing import NamedTuple
+from utyls import logger as log
+
+
+DECKSTRING_VERSION = 1
+
+# Formati di gioco (valori del deckstring)
+FORMAT_WILD = 1
+FORMAT_STANDARD = 2
+FORMAT_CLASSIC = 3
+FORMAT_TWIST = 4
+GAME_FORMATS = {"selvaggio": FORMAT_WILD, "standard": FORMAT_STANDARD, "classico": FORMAT_CLASSIC, "twist": FORMAT_TWIST}
+
+# DBF id degli eroi base di ogni classe (nomi delle classi come in EnuHero, senza distinzione di maiuscole)
+HERO_DBF_IDS = {
+    "cacciatore": 31,
+    "cacciatore di demoni": 56550,
+    "cavaliere della morte": 78065,
+    "druido": 274,
+    "guerriero": 7,
+    "ladro": 930,
+    "mago": 637,
+    "paladino": 671,
+    "sacerdote": 813,
+    "sciamano": 1066,
+    "stregone": 893,
+}
+
+
+
+class DecodedDeck(NamedTuple):
+    """ Contenuto di un deckstring. """
+
+    cards: dict             # {dbf_id: quantità}
+    heroes: tuple           # DBF id degli eroi
+    game_format: int        # Uno dei valori FORMAT_*
+    sideboards: dict        # {(dbf_id, dbf_id della carta proprietaria): quantità}
+
+
+
+def game_format_code(game_format):
+    """ Restituisce il valore del deckstring per il formato di un mazzo (es. "Selvaggio"), Standard se sconosciuto. """
+    return GAME_FORMATS.get(str(game_format).casefold(), FORMAT_STANDARD)
+
+
+def hero_dbf_id(player_class):
+    """ Restituisce il DBF id dell'eroe base della classe, oppure None se la classe non è riconosciuta. """
+    return HERO_DBF_IDS.get(" ".join(str(player_class).split()).casefold())
+
+
+def _write_varint(out, value):
+    """ Aggiunge un intero non negativo al bytearray, 7 bit per byte. """
+
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, position):
+    """ Legge un varint dalla posizione indicata e restituisce (valore, nuova posizione). """
+
+    value = shift = 0
+    while True:
+        try:
+            byte = data[position]
+        except IndexError:
+            raise ValueError("Deckstring troncato.") from None
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def _write_card_groups(out, cards, owners=None):
+    """
+    Scrive le carte nei gruppi da una copia, due copie e più copie.
+
+    Le carte del mazzo sono ordinate per DBF id e scritte come `dbf_id` (`dbf_id, quantità` nel gruppo da più copie);
+    le carte delle sideboard sono ordinate per carta proprietaria e DBF id e scritte come `dbf_id, proprietaria`
+    (`dbf_id, quantità, proprietaria` nel gruppo da più copie), come nei deckstring generati dal gioco.
+    """
+
+    groups = ([], [], [])
+    sort_key = None if owners is None else (lambda item: (item[0][1], item[0][0]))
+    for key, count in sorted(cards.items(), key=sort_key):
+        if count > 0:
+            groups[min(count, 3) - 1].append((key, count))
+
+    for index, group in enumerate(groups):
+        _write_varint(out, len(group))
+        for key, count in group:
+            dbf_id, owner = (key, None) if owners is None else key
+            _write_varint(out, dbf_id)
+            if index == 2:
+                _write_varint(out, count)
+            if owners is not None:
+                _write_varint(out, owner)
+
+
+def _read_card_groups(data, position, with_owner=False):
+    """ Legge i tre gruppi di carte (stesso formato di _write_card_groups) e restituisce ({chiave: quantità}, nuova posizione). """
+
+    cards = {}
+    for count in (1, 2, None):
+        size, position = _read_varint(data, position)
+        for _ in range(size):
+            dbf_id, position = _read_varint(data, position)
+            if count is None:
+                quantity, position = _read_varint(data, position)
+            else:
+                quantity = count
+            key = dbf_id
+            if with_owner:
+                owner, position = _read_varint(data, position)
+                key = (dbf_id, owner)
+            cards[key] = cards.get(key, 0) + quantity
+    return cards, position
+
+
+def encode_deckstring(cards, hero, game_format=FORMAT_STANDARD, sideboards=None):
+    """
+    Codifica un mazzo come deckstring.
+
+    Args:
+        cards (dict): {dbf_id: quantità} delle carte del mazzo.
+        hero (int): DBF id dell'eroe (vedi hero_dbf_id).
+        game_format (int): Uno dei valori FORMAT_*.
+        sideboards (dict): {(dbf_id, dbf_id della carta proprietaria): quantità} (opzionale).
+
+    Returns:
+        str: Il deckstring in base64.
+    """
+
+    out = bytearray((0,))
+    _write_varint(out, DECKSTRING_VERSION)
+    _write_varint(out, game_format)
+    _write_varint(out, 1)
+    _write_varint(out, hero)
+    _write_card_groups(out, cards)
+
+    if sideboards:
+        out.append(1)
+        _write_card_groups(out, sideboards, owners=True)
+    else:
+        out.append(0)
+
+    return base64.b64encode(out).decode("ascii")
+
+
+def decode_deckstring(deckstring):
+    """
+    Decodifica un deckstring.
+
+    Args:
+        deckstring (str): Il codice base64 del mazzo (gli spazi e il padding mancante sono tollerati).
+
+    Returns:
+        DecodedDeck: Carte, eroi, formato e sideboard.
+
+    Raises:
+        ValueError: Se il testo non è un deckstring valido o la versione non è supportata.
+    """
+
+    text = "".join(str(deckstring).split())
+    try:
+        data = base64.b64decode(text + "=" * (-len(text) % 4), validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Deckstring non valido: {e}") from None
+
+    if not data or data[0] != 0:
+        raise ValueError("Deckstring non valido: byte iniziale errato.")
+
+    version, position = _read_varint(data, 1)
+    if version != DECKSTRING_VERSION:
+        raise ValueError(f"Versione del deckstring non supportata: {version}")
+
+    game_format, position = _read_varint(data, position)
+    hero_count, position = _read_varint(data, position)
+    heroes = []
+    for _ in range(hero_count):
+        hero, position = _read_varint(data, position)
+        heroes.append(hero)
+
+    cards, position = _read_card_groups(data, position)
+
+    sideboards = {}
+    if position < len(data) and data[position] == 1:
+        sideboards, position = _read_card_groups(data, position + 1, with_owner=True)
+
+    return DecodedDeck(cards, tuple(heroes), game_format, sideboards)
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
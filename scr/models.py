@@ -32,17 +32,39 @@
 """
 
 #lib
-import re, pyperclip
+import pyperclip
 from contextlib import contextmanager
+from sqlalchemy import func, insert, update, select, text, case
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
-from .db import session, db_session, Deck, DeckCard, Card
+from .db import db_session, Deck, DeckCard, DeckStats, DeckArchetype, Card, cards_fts, card_search_available, mark_cards_changed, mark_decks_changed, get_card_generation
+from .card_catalog import CardCatalog
+from .search_session import name_tokens, matches_tokens
+from .card_store import CardColumnStore, NUMPY_AVAILABLE
+from .deck_parser import DECK_HEADER, iter_decks, parse_deck, parse_card_line, parse_card_lines
+from .deckstring import encode_deckstring, decode_deckstring, game_format_code, hero_dbf_id
+from .deck_export import export_decks, format_deck_text
+from .deck_similarity import DeckSimilarityIndex, query_similar_decks, SIMILAR_DECKS_LIMIT
+from .deck_buildability import BuildabilityEvaluator, query_missing_copies, query_missing_cards
+from .db_settings import USE_COLUMNAR_STORE
 from utyls import enu_glob as eg
 from utyls import logger as log
 #import pdb
 
 
 filters_options = ["tutti", "Tutti", "qualsiasi", "Qualsiasi", "", "all", "All", "", None]
+collection_store = None         # Archivio colonnare della collezione (creato al primo uso, vedi get_collection_store)
+deck_similarity_index = None    # Matrice dei mazzi per la ricerca dei mazzi simili (creata al primo uso, vedi get_deck_similarity_index)
+deck_buildability = None        # Copie mancanti dei mazzi rispetto alla collezione (creata al primo uso, vedi get_deck_buildability)
+
+# Colonne di deck_stats: tipo e rarità delle carte (confronto in minuscolo) e limite della curva del mana
+DECK_STATS_TYPES = {"creatures": "creatura", "spells": "magia", "weapons": "arma", "locations": "luogo", "heroes": "eroe"}
+DECK_STATS_RARITIES = {"common": "comune", "rare": "rara", "epic": "epica", "legendary": "leggendaria"}
+MANA_CURVE_MAX = 7              # curve_7 conta le carte da 7 mana in su
+
+# Ricerca approssimata dei nomi (vedi CardCatalog.fuzzy_search)
+FUZZY_SEARCH_LIMIT = 10         # Risultati mostrati dalla collezione quando nessun nome contiene il testo cercato
+FUZZY_IMPORT_MIN_SCORE = 0.8    # Somiglianza minima per associare a una carta esistente una riga importata senza corrispondenza esatta
 
 
 
@@ -61,47 +83,147 @@ def serialize_card(card):
         "health": card.health,
         "durability": card.durability,
         "rarity": card.rarity,
-        "expansion": card.expansion
+        "expansion": card.expansion,
+        "owned_quantity": card.owned_quantity
     }
 
 
+def serialize_deck_card(deck_card):
+    """Serializza un oggetto DeckCard (con la carta già caricata) in un dizionario."""
+
+    card_dict = serialize_card(deck_card.card)
+    card_dict["quantity"] = deck_card.quantity
+    return card_dict
+
+
+def query_deck_with_cards(session):
+    """Restituisce una query sui mazzi che carica carte e quantità in un'unica istruzione SQL."""
+
+    return session.query(Deck).options(
+        joinedload(Deck.deck_cards).joinedload(DeckCard.card)
+    )
+
+
+def query_deck_cards(session, deck_id):
+    """Restituisce una query sulle carte di un mazzo con le carte caricate tramite join."""
+
+    return session.query(DeckCard).options(
+        joinedload(DeckCard.card)
+    ).filter(DeckCard.deck_id == deck_id)
+
+
+def build_fts_query(tokens):
+    """ Converte i termini di ricerca in un'espressione MATCH FTS5 (una frase tra virgolette per termine, in AND). """
+    return " AND ".join('"' + token.replace('"', '""') + '"' for token in tokens)
+
+
+def card_name_filters(search_text):
+    """
+    Restituisce i filtri SQLAlchemy per la ricerca di una carta per nome.
+
+    I termini di almeno tre caratteri vengono cercati come sottostringhe nell'indice FTS5 trigram
+    (`cards_fts`), gli altri con LIKE. Se l'indice non è disponibile si usa solo LIKE.
+
+    Args:
+        search_text (str): Testo digitato dall'utente.
+
+    Returns:
+        list: Lista di condizioni da applicare alla query sulle carte.
+    """
+
+    tokens = search_text.split()
+    if not card_search_available:
+        return [Card.name.ilike(f"%{search_text}%")]
+
+    indexed = [token for token in tokens if len(token) >= 3]
+    conditions = [Card.name.ilike(f"%{token}%") for token in tokens if len(token) < 3]
+    if indexed:
+        conditions.append(Card.id.in_(
+            select(cards_fts.c.rowid).where(text("cards_fts MATCH :fts_query").bindparams(fts_query=build_fts_query(indexed)))
+        ))
+
+    return conditions
+
+
+def get_collection_store():
+    """ Restituisce l'archivio colonnare della collezione, oppure None se disabilitato o se NumPy non è installato. """
+
+    global collection_store
+    if collection_store is None and USE_COLUMNAR_STORE and NUMPY_AVAILABLE:
+        collection_store = CardColumnStore()
+    return collection_store
+
+
+def get_deck_similarity_index():
+    """ Restituisce l'indice di somiglianza dei mazzi, oppure None se NumPy non è installato. """
+
+    global deck_similarity_index
+    if deck_similarity_index is None and NUMPY_AVAILABLE:
+        deck_similarity_index = DeckSimilarityIndex()
+    return deck_similarity_index
+
+
+def get_deck_buildability():
+    """ Restituisce la valutazione dei mazzi costruibili (sulla matrice dell'indice dei mazzi), oppure None se NumPy non è installato. """
+
+    global deck_buildability
+    index = get_deck_similarity_index()
+    if deck_buildability is None and index is not None:
+        deck_buildability = BuildabilityEvaluator(index)
+    return deck_buildability
+
+
 def load_cards_from_db(filters=None):
-    with db_session() as session:
-        query = session.query(Card)
-        if filters:
-            # Applica i filtri in modo combinato
-            if filters.get("name"):
-                query = query.filter(Card.name.ilike(f"%{filters['name']}%"))
-            if filters.get("mana_cost") and filters["mana_cost"] not in filters_options:
-                query = query.filter(Card.mana_cost == int(filters["mana_cost"]))
-            
-            if filters.get("card_type") and filters["card_type"] not in filters_options:
-                query = query.filter(Card.card_type == filters["card_type"])
+    """ Restituisce le carte della collezione filtrate e ordinate per mana e nome (archivio colonnare o SQL). """
+
+    store = get_collection_store()
+    if store is not None:
+        cards = store.load(filters)
+    else:
+        with db_session() as session:
+            cards = query_cards(session, filters)
+
+    log.info(f"Carte trovate: {len(cards)}")
+    return cards
+
+
+def query_cards(session, filters=None):
+    """ Percorso SQL di load_cards_from_db: applica i filtri con una query sulle carte. """
 
-            if filters.get("spell_type") and filters["spell_type"] not in filters_options:
-                query = query.filter(Card.spell_type == filters["spell_type"])
+    query = session.query(Card)
+    if filters:
+        # Applica i filtri in modo combinato
+        if filters.get("name"):
+            query = query.filter(*card_name_filters(filters["name"]))
+        if filters.get("mana_cost") and filters["mana_cost"] not in filters_options:
+            query = query.filter(Card.mana_cost == int(filters["mana_cost"]))
+        
+        if filters.get("card_type") and filters["card_type"] not in filters_options:
+            query = query.filter(Card.card_type == filters["card_type"])
+
+        if filters.get("spell_type") and filters["spell_type"] not in filters_options:
+            query = query.filter(Card.spell_type == filters["spell_type"])
 
-            if filters.get("card_subtype") and filters["card_subtype"] not in filters_options:
-                query = query.filter(Card.card_subtype == filters["card_subtype"])
+        if filters.get("card_subtype") and filters["card_subtype"] not in filters_options:
+            query = query.filter(Card.card_subtype == filters["card_subtype"])
 
-            if filters.get("attack") and filters["attack"] not in filters_options:
-                query = query.filter(Card.attack == int(filters["attack"]))
+        if filters.get("attack") and filters["attack"] not in filters_options:
+            query = query.filter(Card.attack == int(filters["attack"]))
 
-            if filters.get("health") and filters["health"] not in filters_options:
-                query = query.filter(Card.health == int(filters["health"]))
+        if filters.get("health") and filters["health"] not in filters_options:
+            query = query.filter(Card.health == int(filters["health"]))
 
-            if filters.get("durability") and filters["durability"] not in filters_options:
-                query = query.filter(Card.durability == int(filters["durability"]))
+        if filters.get("durability") and filters["durability"] not in filters_options:
+            query = query.filter(Card.durability == int(filters["durability"]))
 
-            if filters.get("rarity") and filters["rarity"] not in filters_options:
-                query = query.filter(Card.rarity == filters["rarity"])
+        if filters.get("rarity") and filters["rarity"] not in filters_options:
+            query = query.filter(Card.rarity == filters["rarity"])
 
-            if filters.get("expansion") and filters["expansion"] not in filters_options:
-                query = query.filter(Card.expansion == filters["expansion"])
+        if filters.get("expansion") and filters["expansion"] not in filters_options:
+            query = query.filter(Card.expansion == filters["expansion"])
 
-        log.info(f"Carte trovate: {query.count()}")
-        cards = query.order_by(Card.mana_cost, Card.name).all()
-        return [serialize_card(card) for card in cards]  # Restituisci una lista di dizionari
+    cards = query.order_by(Card.mana_cost, Card.name).all()
+    return [serialize_card(card) for card in cards]  # Restituisci una lista di dizionari
 
 
 def load_deck_from_db(deck_name=None, deck_content=None, filters=None, card_list=None):
@@ -112,9 +234,9 @@ def load_deck_from_db(deck_name=None, deck_content=None, filters=None, card_list
     
     with db_session() as session:
         # Carica le carte del mazzo
-        deck_cards = session.query(DeckCard).filter_by(deck_id=deck_content["id"]).all()
+        deck_cards = query_deck_cards(session, deck_content["id"]).all()
         for deck_card in deck_cards:
-            card = session.query(Card).filter_by(id=deck_card.card_id).first()
+            card = deck_card.card
             if card:
                 card_dict = serialize_card(card)  # Serializza la carta in un dizionario
                 # Applica i filtri (se presenti)
@@ -165,152 +287,445 @@ def load_deck_from_db(deck_name=None, deck_content=None, filters=None, card_list
         return deck_cards
 
 
+def format_card_row(card):
+    """Converte una carta serializzata nella riga mostrata dalla lista della collezione."""
+
+    return [
+        card["name"],
+        str(card["mana_cost"]) if card["mana_cost"] else "-",
+        card["class_name"] if card["class_name"] else "-",
+        card["card_type"] if card["card_type"] else "-",
+        card["spell_type"] if card["spell_type"] else "-",
+        card["card_subtype"] if card["card_subtype"] else "-",
+        str(card["attack"]) if card["attack"] is not None else "-",
+        str(card["health"]) if card["health"] is not None else "-",
+        str(card["durability"]) if card["durability"] is not None else "-",
+        card["rarity"] if card["rarity"] else "-",
+        card["expansion"] if card["expansion"] else "-"
+    ]
+
+
+def load_collection_rows(filters=None):
+    """Restituisce le righe già formattate della collezione (eseguibile in un thread in background)."""
+    return [format_card_row(card) for card in load_cards_from_db(filters)]
+
+
+def load_collection_view(filters=None, known_tag=None, search=None, catalog=None):
+    """
+    Prepara il contenuto della lista virtuale della collezione (eseguibile in un thread in background).
+
+    Con l'archivio colonnare le righe di tutte le carte vengono formattate una volta per generazione
+    di scrittura: un nuovo filtro restituisce solo l'array delle posizioni da mostrare.
+
+    Args:
+        filters (dict): Filtri da applicare.
+        known_tag: Generazione delle righe già presenti nella lista (None = nessuna).
+        search (SearchSession): Sessione di ricerca della finestra; se il nome cercato estende il precedente
+                                vengono filtrati solo i risultati della ricerca precedente.
+        catalog (CardCatalog): Se indicato e nessun nome contiene il testo cercato, vengono mostrate
+                               le carte con il nome più simile (ricerca approssimata).
+
+    Returns:
+        tuple: (tag, righe, posizioni, simili). righe è None se quelle già nella lista sono ancora valide;
+               posizioni è None se le righe sono già filtrate e ordinate (percorso SQL);
+               simili è True se il risultato viene dalla ricerca approssimata.
+    """
+
+    filters = filters or {}
+    name = filters.get("name")
+    other_filters = tuple(sorted((key, value) for key, value in filters.items() if key != "name"))
+    store = get_collection_store()
+
+    if store is None:
+        if search and name:
+            tokens = name_tokens(name)
+            rows = search.search(
+                name,
+                full_query=lambda: load_collection_rows(filters),
+                narrow=lambda previous: [row for row in previous if matches_tokens(row[0], tokens)],
+                context=(get_card_generation(), other_filters)
+            )
+        else:
+            rows = load_collection_rows(filters)
+
+        # Ricerca approssimata solo senza altri filtri (il percorso SQL non può combinarli con i risultati)
+        if not rows and name and catalog and all(value in filters_options for _, value in other_filters):
+            matches = catalog.fuzzy_search(name, limit=FUZZY_SEARCH_LIMIT)
+            if matches:
+                return None, [format_card_row(record.as_dict()) for record, _ in matches], None, True
+        return None, rows, None, False
+
+    snapshot = store.snapshot()     # Posizioni, righe e generazione vengono tutte dalla stessa istantanea
+    if search and name:
+        positions = search.search(
+            name,
+            full_query=lambda: snapshot.query(filters),
+            narrow=lambda previous: snapshot.filter_by_name(previous, name),
+            context=(snapshot.generation, other_filters)
+        )
+    else:
+        positions = snapshot.query(filters)
+
+    similar = False
+    if not len(positions) and name and catalog:
+        # Nessun nome contiene il testo: carte con il nome più simile, dalla più simile, che rispettano gli altri filtri
+        matches = catalog.fuzzy_search(name, limit=FUZZY_SEARCH_LIMIT)
+        positions = snapshot.positions_for_ids([record.id for record, _ in matches])
+        positions = positions[snapshot.mask(dict(other_filters))[positions]]
+        similar = bool(len(positions))
+
+    tag = snapshot.generation
+    rows = None if tag == known_tag else [format_card_row(card) for card in snapshot.all_rows()]
+    log.info(f"Carte trovate: {len(positions)}{' (nomi simili)' if similar else ''}")
+    return tag, rows, positions, similar
+
+
 def load_cards(card_list=None, deck_content=None, mode="collection", filters=None):
     """Carica le carte nella lista."""
 
     card_list.DeleteAllItems()
     if mode == "collection":
-        cards = load_cards_from_db(filters)  # Ora cards è una lista di dizionari
-        for card in cards:
-            card_list.Append([
-                card["name"], 
-                str(card["mana_cost"]) if card["mana_cost"] else "-",
-                card["class_name"] if card["class_name"] else "-",
-                card["card_type"] if card["card_type"] else "-",
-                card["spell_type"] if card["spell_type"] else "-",
-                card["card_subtype"] if card["card_subtype"] else "-",
-                str(card["attack"]) if card["attack"] is not None else "-",
-                str(card["health"]) if card["health"] is not None else "-",
-                str(card["durability"]) if card["durability"] is not None else "-",
-                card["rarity"] if card["rarity"] else "-",
-                card["expansion"] if card["expansion"] else "-"
-            ])
+        for row in load_collection_rows(filters):
+            card_list.Append(row)
 
     elif mode == "deck":
         # Carica le carte del mazzo
         load_deck_from_db(deck_content=deck_content, filters=filters, card_list=card_list)
 
 
+def deck_stats_columns():
+    """ Restituisce le espressioni aggregate che calcolano ogni colonna di deck_stats a partire da deck_cards e cards. """
+
+    quantity = DeckCard.quantity
+    card_type = func.lower(Card.card_type)
+    rarity = func.lower(Card.rarity)
+
+    def count_if(condition):
+        return func.coalesce(func.sum(case((condition, quantity), else_=0)), 0)
+
+    columns = {
+        "total_cards": func.coalesce(func.sum(quantity), 0),
+        "mana_sum": func.coalesce(func.sum(Card.mana_cost * quantity), 0)
+    }
+    for column, value in DECK_STATS_TYPES.items():
+        columns[column] = count_if(card_type == value)
+
+    for mana in range(MANA_CURVE_MAX):
+        columns[f"curve_{mana}"] = count_if(Card.mana_cost == mana)
+    columns[f"curve_{MANA_CURVE_MAX}"] = count_if(Card.mana_cost >= MANA_CURVE_MAX)
+
+    for column, value in DECK_STATS_RARITIES.items():
+        columns[column] = count_if(rarity == value)
+
+    return columns
+
+
+def refresh_deck_stats(session, deck_ids=None, mark_changed=True):
+    """
+    Ricalcola le righe di deck_stats dei mazzi indicati con un'unica INSERT ... SELECT aggregata.
+
+    Va chiamata nella stessa sessione (e transazione) della modifica al mazzo; il commit è a carico del chiamante.
+    I mazzi vengono anche segnalati come modificati (mark_decks_changed) per le cache dei mazzi.
+
+    Args:
+        session: Sessione del database.
+        deck_ids (iterable): Id dei mazzi da ricalcolare; None = tutti i mazzi.
+        mark_changed (bool): False quando le statistiche mancanti vengono solo completate durante una lettura:
+            il contenuto dei mazzi non cambia, quindi la generazione dei mazzi resta la stessa.
+    """
+
+    if deck_ids is not None:
+        deck_ids = list(deck_ids)
+        if not deck_ids:
+            return
+
+    columns = deck_stats_columns()
+    cards_in_decks = DeckCard.__table__.join(Card.__table__, Card.id == DeckCard.card_id)
+    query = select(Deck.id, *columns.values()).select_from(
+        Deck.__table__.outerjoin(cards_in_decks, DeckCard.deck_id == Deck.id)
+    ).group_by(Deck.id)
+
+    stale = session.query(DeckStats)
+    if deck_ids is not None:
+        query = query.where(Deck.id.in_(deck_ids))
+        stale = stale.filter(DeckStats.deck_id.in_(deck_ids))
+
+    stale.delete(synchronize_session=False)
+    session.execute(insert(DeckStats).from_select(["deck_id", *columns], query))
+    if mark_changed:
+        mark_decks_changed(session, deck_ids)
+
+
+def refresh_deck_stats_for_cards(session, card_ids):
+    """ Ricalcola deck_stats dei mazzi che contengono le carte indicate (es. dopo la modifica del tipo di una carta). """
+
+    deck_ids = [deck_id for (deck_id,) in session.query(DeckCard.deck_id).filter(DeckCard.card_id.in_(list(card_ids))).distinct()]
+    refresh_deck_stats(session, deck_ids)
+    return deck_ids
+
+
+def encode_deck_deckstrings(session, deck_ids=None):
+    """
+    Codifica i deckstring dei mazzi con una sola query su deck_cards e cards.
+
+    Args:
+        session: Sessione del database.
+        deck_ids (iterable): Id dei mazzi da codificare (None = tutti).
+
+    Returns:
+        dict: {deck_id: deckstring}; None per i mazzi con carte senza dbf_id o con una classe sconosciuta.
+    """
+
+    # Una riga per mazzo: dbf_id e quantità concatenati nello stesso ordine (group_concat salta i NULL, quindi
+    # i mazzi con carte senza dbf_id sono riconosciuti dal confronto dei conteggi)
+    query = session.query(
+        DeckCard.deck_id, Deck.player_class, Deck.game_format,
+        func.group_concat(Card.dbf_id), func.group_concat(DeckCard.quantity), func.count(Card.dbf_id) == func.count()
+    ).join(Deck, Deck.id == DeckCard.deck_id).join(Card, Card.id == DeckCard.card_id).group_by(DeckCard.deck_id)
+    if deck_ids is not None:
+        query = query.filter(DeckCard.deck_id.in_(list(deck_ids)))
+
+    deckstrings = {}
+    for deck_id, player_class, game_format, dbf_ids, quantities, complete in query:
+        hero = hero_dbf_id(player_class)
+        if not complete or hero is None:
+            deckstrings[deck_id] = None
+            continue
+
+        cards = {}
+        for dbf_id, quantity in zip(map(int, dbf_ids.split(",")), map(int, quantities.split(","))):
+            cards[dbf_id] = cards.get(dbf_id, 0) + quantity
+        deckstrings[deck_id] = encode_deckstring(cards, hero, game_format_code(game_format))
+    return deckstrings
+
+
+def format_deck_stats(deck, deck_stats):
+    """ Converte una riga di deck_stats nel dizionario mostrato dal DeckStatsDialog. """
+
+    curve = [getattr(deck_stats, f"curve_{mana}") for mana in range(MANA_CURVE_MAX + 1)]
+    return {
+        "Nome Mazzo": deck.name,
+        "Eroe": deck.player_class,
+        "Numero Carte": deck_stats.total_cards,
+        "Creature": deck_stats.creatures,
+        "Magie": deck_stats.spells,
+        "Armi": deck_stats.weapons,
+        "Luoghi": deck_stats.locations,
+        "Costo Mana Medio": round(deck_stats.mana_sum / deck_stats.total_cards, 2) if deck_stats.total_cards else 0.0,
+        "Curva Mana": "  ".join(
+            f"{mana}{'+' if mana == MANA_CURVE_MAX else ''}: {count}" for mana, count in enumerate(curve)
+        ),
+        "Rarità": (
+            f"Comuni {deck_stats.common}, Rare {deck_stats.rare}, "
+            f"Epiche {deck_stats.epic}, Leggendarie {deck_stats.legendary}"
+        )
+    }
+
+
+def format_missing_cards(session, deck_id):
+    """
+    Restituisce le voci del DeckStatsDialog sulle carte del mazzo che mancano nella collezione.
+
+    Per un solo mazzo basta una query SQL: la valutazione vettoriale di tutti i mazzi serve solo alla lista.
+    """
+
+    missing = query_missing_cards(session, deck_id)
+    if not missing:
+        return {"Costruibile": "Sì"}
+
+    names = dict(session.query(Card.id, Card.name).filter(Card.id.in_([card.card_id for card in missing])))
+    return {
+        "Costruibile": f"No, mancano {sum(card.copies for card in missing)} copie",
+        "Carte Mancanti": ", ".join(f"{names.get(card.card_id, card.card_id)} x{card.copies}" for card in missing)
+    }
+
+
+def diff_deck_cards(old_cards, new_cards):
+    """
+    Confronta due versioni di un mazzo espresse come dizionari {card_id: quantità}.
+
+    Args:
+        old_cards (dict): Contenuto attuale del mazzo.
+        new_cards (dict): Nuovo contenuto del mazzo.
+
+    Returns:
+        dict: Modifiche da applicare, con le chiavi:
+            - "added": {card_id: quantità} per le carte da inserire.
+            - "updated": {card_id: (quantità_precedente, nuova_quantità)} per le carte da aggiornare.
+            - "removed": {card_id: quantità_precedente} per le carte da eliminare.
+    """
+
+    added = {card_id: qty for card_id, qty in new_cards.items() if card_id not in old_cards}
+    removed = {card_id: qty for card_id, qty in old_cards.items() if card_id not in new_cards}
+    updated = {
+        card_id: (old_cards[card_id], qty)
+        for card_id, qty in new_cards.items()
+        if card_id in old_cards and old_cards[card_id] != qty
+    }
+    return {"added": added, "updated": updated, "removed": removed}
+
+
 
 class DbManager:
     """ Classe per la gestione dei mazzi di Hearthstone. """
 
-    def __init__(self):
-        pass
+    def __init__(self, catalog=None):
+        self.catalog = catalog or CardCatalog()     # Cache in memoria delle carte (ricerche per nome/id)
 
     @staticmethod
     def parse_deck_metadata(deck_string):
         """ Estrae le informazioni di metadata da un mazzo. """
-        lines = deck_string.splitlines()[:3]
-        metadata = {
-            "name": lines[0].replace("###", "").strip(),
-            "player_class": "Neutrale",
-            "game_format": "Standard"
-        }
-        
-        for line in lines[1:]:
-            if "Classe:" in line:
-                metadata["player_class"] = line.split(":")[1].strip()
-            elif "Formato:" in line:
-                metadata["game_format"] = line.split(":")[1].strip()
-        
-        return metadata
+        deck = parse_deck(deck_string)
+        if deck is None:
+            return {"name": "", "player_class": "Neutrale", "game_format": "Standard"}
+        return deck.metadata()
+
+    @staticmethod
+    def parse_valid_deck(deck_string):
+        """
+        Legge un mazzo copiato dagli appunti (un solo passaggio sul testo).
+
+        Returns:
+            ParsedDeck: Il mazzo, se il testo inizia con "###" e il mazzo è completo e senza errori; altrimenti None.
+        """
+
+        if not deck_string or not deck_string.startswith(DECK_HEADER):
+            return None
+
+        deck = parse_deck(deck_string)
+        if deck is None or not deck.valid:
+            for error in deck.errors if deck else ():
+                log.warning(f"Mazzo non valido: {error}")
+            return None
+        return deck
 
     def is_valid_deck(self, deck_string):
         """Verifica se una stringa rappresenta un mazzo valido."""
-        last_verify = "# Per utilizzare questo mazzo, copialo negli appunti e crea un nuovo mazzo in Hearthstone"
-        return bool(
-            deck_string and 
-            deck_string.startswith("###") and 
-            deck_string.splitlines()[-1].startswith(last_verify)
-        )
+        return self.parse_valid_deck(deck_string) is not None
 
     def copy_deck_to_clipboard(self, deck_name):
         """ Copia un mazzo dal database negli appunti. """
-        with db_session():
+        with db_session() as session:
             deck_content = self.get_deck(deck_name)
             if deck_content:
-                deck_info = f"### {deck_content['name']}\n"
-                deck_info += f"# Classe: {deck_content['player_class']}\n"
-                deck_info += f"# Formato: {deck_content['game_format']}\n"
-                deck_info += "# Anno del Pegaso\n"
-                deck_info += "#\n"
-                
-                for card in deck_content["cards"]:
-                    deck_info += f"# {card['quantity']}x ({card['mana_cost']}) {card['name']}\n"
-
-                deck_info += "#\n"
-                deck_info += "AAECAeSKBwaU1ATj+AXpngbSsAb3wAbO8QYMg58E0p8E7KAEx7AG7eoGn/EGwvEG3vEG4/EG5fEGqPcGiPgGAAA=\n#\n# Per utilizzare questo mazzo, copialo negli appunti e crea un nuovo mazzo in Hearthstone\n"
+                # Il deckstring è importabile nel gioco solo se tutte le carte hanno il dbf_id
+                deckstring = encode_deck_deckstrings(session, [deck_content["id"]]).get(deck_content["id"])
+                if not deckstring:
+                    log.warning(f"Deckstring del mazzo '{deck_name}' non disponibile: carte senza dbf_id o classe sconosciuta.")
+
+                deck_info = format_deck_text(
+                    deck_content["name"], deck_content["player_class"], deck_content["game_format"],
+                    [(card["quantity"], card["mana_cost"], card["name"]) for card in deck_content["cards"]],
+                    deckstring
+                )
 
                 pyperclip.copy(deck_info)
                 return True
         return False
 
-    def add_deck_from_clipboard(self, deck_string=None):
-        """Aggiunge un mazzo copiato dagli appunti al database."""
+    def export_decks(self, path, export_format=None):
+        """
+        Esporta tutti i mazzi in un file (vedi scr.deck_export.export_decks).
+
+        Returns:
+            int: Numero di mazzi esportati.
+        """
+        return export_decks(path, export_format)
+
+    def add_deck_from_clipboard(self, deck_string=None, parsed_deck=None):
+        """
+        Aggiunge un mazzo copiato dagli appunti al database.
+
+        Args:
+            deck_string (str): Testo del mazzo (se assente viene letto dagli appunti).
+            parsed_deck (ParsedDeck): Mazzo già letto e verificato (es. dalla conferma dell'utente): il testo non viene riletto.
+        """
         try:
-            if not deck_string:
-                deck_string = pyperclip.paste()
+            if parsed_deck is None:
+                if not deck_string:
+                    deck_string = pyperclip.paste()
+                parsed_deck = self.parse_valid_deck(deck_string)
 
-            if not self.is_valid_deck(deck_string):
+            if parsed_deck is None:
                 log.error("Il mazzo copiato non è valido.")
                 return False
 
-            # Sincronizza le carte prima di aggiungere il mazzo
-            self.sync_cards_with_database(deck_string)
+            return self.add_parsed_deck(parsed_deck)
+
+        except Exception as e:
+            log.error(f"Errore durante l'aggiunta del mazzo: {str(e)}")
+            return False
+
+    def add_parsed_deck(self, parsed_deck):
+        """
+        Salva un ParsedDeck nel database: mazzo, carte mancanti e relazioni in un'unica transazione.
+
+        Returns:
+            bool: True se il mazzo è stato aggiunto, False se esiste già un mazzo con lo stesso nome.
+        """
 
-            # Estrae i metadati del mazzo
-            metadata = self.parse_deck_metadata(deck_string)
-            deck_name = metadata["name"]
+        deck_name = parsed_deck.name
 
+        with db_session() as session:
             # Verifica se il mazzo esiste già
-            if self.get_deck(deck_name):
+            if session.query(Deck.id).filter(Deck.name == deck_name).first():
                 log.warning(f"Il mazzo '{deck_name}' è già presente nel database.")
                 return False
 
-            # Aggiungi il mazzo
-            with db_session() as session:
-                new_deck = Deck(
-                    name=deck_name,
-                    player_class=metadata["player_class"],
-                    game_format=metadata["game_format"]
-                )
-                session.add(new_deck)
-                session.flush()  # Ottieni l'ID del nuovo mazzo
-
-                # Aggiungi le relazioni tra mazzo e carte
-                cards = self.parse_cards_from_deck(deck_string)
-                for card_data in cards:
-                    card = session.query(Card).filter_by(name=card_data["name"]).first()
-                    if not card:
-                        card = Card(
-                            name=card_data["name"],
-                            class_name="Unknown",
-                            mana_cost=card_data["mana_cost"],
-                            card_type="Unknown",
-                            spell_type="Unknown",
-                            card_subtype="Unknown",
-                            rarity="Unknown",
-                            expansion="Unknown"
-                        )
-                        session.add(card)
-                        session.flush()
+            deck_cards = self.resolve_deckstring(session, parsed_deck.deckstring)
+            if deck_cards is None and not parsed_deck.cards:
+                log.error(f"Le carte del mazzo '{deck_name}' sono solo nel deckstring, ma non sono tutte nel database.")
+                return False
 
-                    # Aggiungi la relazione tra mazzo e carta
-                    session.add(DeckCard(
-                        deck_id=new_deck.id,
-                        card_id=card.id,
-                        quantity=card_data["quantity"]
-                    ))
+            new_deck = Deck(
+                name=deck_name,
+                player_class=parsed_deck.player_class,
+                game_format=parsed_deck.game_format
+            )
+            session.add(new_deck)
+            session.flush()  # Ottieni l'ID del nuovo mazzo
+
+            # Aggiungi le relazioni tra mazzo e carte: dal deckstring se tutte le carte sono note, altrimenti dalle righe
+            if deck_cards is None:
+                cards = self.merge_card_lines(parsed_deck.card_dicts())
+                card_ids = self.resolve_card_ids(session, cards)
+                deck_cards = self.card_id_quantities(cards, card_ids)
+            self._insert_deck_cards(session, new_deck.id, deck_cards)
+            refresh_deck_stats(session, [new_deck.id])
+
+        log.info(f"Mazzo '{deck_name}' aggiunto con successo.")
+        return True
 
-                session.commit()
+    def import_decks(self, source):
+        """
+        Importa tutti i mazzi di un testo o di un file (es. un'esportazione con molti mazzi), leggendolo una sola volta.
 
-            log.info(f"Mazzo '{deck_name}' aggiunto con successo.")
-            return True
+        Ogni mazzo viene salvato nella propria transazione: un mazzo non valido o già presente non blocca gli altri.
 
-        except Exception as e:
-            log.error(f"Errore durante l'aggiunta del mazzo: {str(e)}")
-            return False
+        Args:
+            source (str | file): Testo dei mazzi o file aperto in modalità testo.
+
+        Returns:
+            list: Per ogni mazzo una tupla (nome, riga dell'intestazione, aggiunto, errori).
+        """
+
+        report = []
+        for parsed_deck in iter_decks(source):
+            errors = list(parsed_deck.errors)
+            added = False
+            if not errors:
+                try:
+                    added = self.add_parsed_deck(parsed_deck)
+                    if not added:
+                        errors.append("Mazzo già presente nel database.")
+                except Exception as e:
+                    errors.append(f"Errore durante l'aggiunta del mazzo: {str(e)}")
+
+            report.append((parsed_deck.name, parsed_deck.line, added, errors))
+
+        added_count = sum(1 for _, _, added, _ in report if added)
+        log.info(f"Importazione completata: {added_count} mazzi aggiunti su {len(report)}.")
+        return report
 
 
     def sync_cards_with_database(self, deck_string):
@@ -323,23 +738,7 @@ class DbManager:
                 return
 
             with db_session() as session:  # Usa il contesto db_session
-                for card_data in cards:
-                    card = session.query(Card).filter_by(name=card_data["name"]).first()
-                    if not card:
-                        log.debug(f"Carta '{card_data['name']}' non trovata nel database. Aggiunta in corso...")
-                        card = Card(
-                            name=card_data["name"],
-                            class_name="Unknown",
-                            mana_cost=card_data["mana_cost"],
-                            card_type="Unknown",
-                            spell_type="Unknown",
-                            card_subtype="Unknown",
-                            rarity="Unknown",
-                            expansion="Unknown"
-                        )
-                        session.add(card)
-                # Commit alla fine della transazione
-                session.commit()
+                self.resolve_card_ids(session, self.merge_card_lines(cards))
 
         except SQLAlchemyError as e:
             log.error(f"Errore del database durante la sincronizzazione delle carte: {str(e)}")
@@ -351,27 +750,215 @@ class DbManager:
         log.debug("Sincronizzazione delle carte completata.")
 
 
+    @staticmethod
+    def merge_card_lines(cards):
+        """
+        Accorpa le righe che si riferiscono alla stessa carta sommandone le quantità.
+
+        Args:
+            cards (list): Lista di dizionari restituita da parse_cards_from_deck.
+
+        Returns:
+            list: Lista di dizionari con un solo elemento per nome di carta.
+        """
+
+        merged = {}
+        for card_data in cards:
+            if card_data["name"] in merged:
+                merged[card_data["name"]]["quantity"] += card_data["quantity"]
+            else:
+                merged[card_data["name"]] = dict(card_data)
+
+        return list(merged.values())
+
+
+    @staticmethod
+    def card_id_quantities(cards, card_ids):
+        """
+        Somma le quantità delle righe per id di carta.
+
+        Due righe con nomi diversi possono risolversi nella stessa carta (es. un nome con un refuso sostituito
+        dalla carta con il nome simile): le loro quantità vanno sommate, non sovrascritte.
+
+        Args:
+            cards (list): Lista di dizionari con "name" e "quantity".
+            card_ids (dict): Dizionario {nome_carta: id_carta} restituito da resolve_card_ids.
+
+        Returns:
+            dict: Dizionario {id_carta: quantità}.
+        """
+
+        deck_cards = {}
+        for card_data in cards:
+            card_id = card_ids[card_data["name"]]
+            deck_cards[card_id] = deck_cards.get(card_id, 0) + card_data["quantity"]
+
+        return deck_cards
+
+
+    def resolve_card_ids(self, session, cards):
+        """
+        Risolve gli id delle carte con una sola query `IN (...)` e crea quelle mancanti con un inserimento multiplo.
+
+        Args:
+            session: Sessione del database in cui eseguire le operazioni (il commit è a carico del chiamante).
+            cards (list): Lista di dizionari con almeno "name" e "mana_cost".
+
+        Returns:
+            dict: Dizionario {nome_carta: id_carta}.
+        """
+
+        names = {card_data["name"] for card_data in cards}
+        if not names:
+            return {}
+
+        # A parità di nome vince la carta con l'id più basso, come con filter_by(...).first()
+        card_ids = dict(
+            session.query(Card.name, Card.id).filter(Card.name.in_(names)).order_by(Card.id.desc()).all()
+        )
+
+        missing = [card_data for card_data in cards if card_data["name"] not in card_ids]
+        for card_data in missing:
+            record = self.match_card_name(card_data)
+            if record:
+                log.warning(f"Carta '{card_data['name']}' non trovata: sostituita con '{record.name}' (nome simile).")
+                card_ids[card_data["name"]] = record.id
+
+        missing = [card_data for card_data in missing if card_data["name"] not in card_ids]
+        if missing:
+            log.debug(f"Carte non trovate nel database: {len(missing)}. Aggiunta in corso...")
+            session.execute(insert(Card), [
+                {
+                    "name": card_data["name"],
+                    "class_name": "Unknown",
+                    "mana_cost": card_data["mana_cost"],
+                    "card_type": "Unknown",
+                    "spell_type": "Unknown",
+                    "card_subtype": "Unknown",
+                    "rarity": "Unknown",
+                    "expansion": "Unknown"
+                }
+                for card_data in missing
+            ])
+
+            mark_cards_changed(session)     # Il catalogo carte verrà ricaricato dopo il commit
+            missing_names = [card_data["name"] for card_data in missing]
+            card_ids.update(session.query(Card.name, Card.id).filter(Card.name.in_(missing_names)).all())
+
+        return card_ids
+
+
+    def match_card_name(self, card_data):
+        """
+        Cerca una carta esistente per una riga importata senza corrispondenza esatta del nome
+        (errori di battitura, accenti, apostrofi diversi).
+
+        Args:
+            card_data (dict): Dizionario con "name" e "mana_cost".
+
+        Returns:
+            CardRecord: La carta più simile con lo stesso costo in mana, se abbastanza simile; altrimenti None.
+        """
+
+        for record, score in self.catalog.fuzzy_search(card_data["name"], limit=3, min_score=FUZZY_IMPORT_MIN_SCORE / 2):
+            # I numeri nel nome distinguono carte diverse (es. "Golem 1" e "Golem 2"): devono coincidere
+            same_digits = [c for c in record.name if c.isdigit()] == [c for c in card_data["name"] if c.isdigit()]
+            if score >= FUZZY_IMPORT_MIN_SCORE and same_digits and record.mana_cost == card_data["mana_cost"]:
+                log.debug(f"Carta '{card_data['name']}' simile a '{record.name}' (somiglianza {score}).")
+                return record
+        return None
+
+
+    def preview_card_matches(self, parsed_deck):
+        """
+        Elenca le carte del mazzo che il salvataggio sostituirà con una carta dal nome simile (vedi match_card_name),
+        così da poterle mostrare all'utente prima della conferma.
+
+        Args:
+            parsed_deck (ParsedDeck): Mazzo letto dagli appunti.
+
+        Returns:
+            list: Tuple (nome nel mazzo, nome della carta che verrà usata).
+        """
+
+        with db_session() as session:
+            if self.resolve_deckstring(session, parsed_deck.deckstring) is not None:
+                return []       # Le carte vengono dal deckstring, i nomi non vengono usati
+
+            cards = self.merge_card_lines(parsed_deck.card_dicts())
+            names = {card_data["name"] for card_data in cards}
+            known = {name for (name,) in session.query(Card.name).filter(Card.name.in_(names))}
+
+        matches = []
+        for card_data in cards:
+            if card_data["name"] not in known:
+                record = self.match_card_name(card_data)
+                if record:
+                    matches.append((card_data["name"], record.name))
+        return matches
+
+
+    def _insert_deck_cards(self, session, deck_id, deck_cards):
+        """Inserisce con un'unica istruzione le relazioni tra un mazzo e le sue carte ({card_id: quantità})."""
+
+        rows = [
+            {"deck_id": deck_id, "card_id": card_id, "quantity": quantity}
+            for card_id, quantity in deck_cards.items()
+        ]
+        if rows:
+            session.execute(insert(DeckCard), rows)
+
+
+    def resolve_deckstring(self, session, deckstring):
+        """
+        Decodifica un deckstring direttamente nelle carte del database, senza leggere le righe di commento.
+
+        Args:
+            session: Sessione del database.
+            deckstring (str): Deckstring del mazzo (può essere None).
+
+        Returns:
+            dict | None: {card_id: quantità}, oppure None se il deckstring manca, non è valido, non contiene carte
+            o contiene carte senza dbf_id nel database (in quel caso si usano le righe delle carte).
+        """
+
+        if not deckstring:
+            return None
+
+        try:
+            dbf_cards = decode_deckstring(deckstring).cards
+        except ValueError as e:
+            log.warning(f"{e}: uso le righe delle carte.")
+            return None
+
+        if not dbf_cards:
+            log.warning("Il deckstring non contiene carte: uso le righe delle carte.")
+            return None
+
+        # A parità di dbf_id vince la carta con l'id più basso, come in resolve_card_ids
+        card_ids = dict(
+            session.query(Card.dbf_id, Card.id).filter(Card.dbf_id.in_(list(dbf_cards))).order_by(Card.id.desc()).all()
+        )
+        missing = len(dbf_cards) - len(card_ids)
+        if missing:
+            log.info(f"Deckstring con {missing} carte senza dbf_id nel database: uso le righe delle carte (vedi scr.card_importer).")
+            return None
+
+        deck_cards = {}
+        for dbf_id, quantity in dbf_cards.items():
+            deck_cards[card_ids[dbf_id]] = deck_cards.get(card_ids[dbf_id], 0) + quantity
+        return deck_cards
+
+
     def parse_card_line(self, line):
         """ Estrae le informazioni da una riga di testo rappresentante una carta. """
-        pattern = r'^#*\s*(\d+)x?\s*\((\d+)\)\s*(.+)$'
-        match = re.match(pattern, line.strip())
-        if match:
-            return {
-                "quantity": int(match.group(1)),
-                "mana_cost": int(match.group(2)),
-                "name": match.group(3).strip()
-            }
-        return None
+        card = parse_card_line(line)
+        return card.as_dict() if card else None
 
     def parse_cards_from_deck(self, deck_string):
         """ Estrae le informazioni delle carte da un mazzo. """
-        cards = []
         try:
-            for line in deck_string.splitlines():
-                card_data = self.parse_card_line(line)
-                if card_data:
-                    cards.append(card_data)
-            return cards
+            return [card.as_dict() for card in parse_card_lines(deck_string)]
         except Exception as e:
             log.error(f"Errore durante il parsing delle carte: {str(e)}")
             raise
@@ -392,14 +979,13 @@ class DbManager:
 
 
     def is_card_in_database(self, card_name):
-        """Verifica se una carta esiste nel database."""
-        with db_session():
-            return session.query(Card).filter_by(name=card_name).first() is not None
+        """Verifica se una carta esiste nel database (tramite il catalogo in memoria)."""
+        return self.catalog.get_by_name(card_name) is not None
 
     def add_card_to_database(self, card):
         """Aggiunge una nuova carta al database."""
 
-        with db_session():
+        with db_session() as session:
             new_card = Card(
                 id=card["id"],
                 name=card["name"],
@@ -413,36 +999,73 @@ class DbManager:
             )
 
             session.add(new_card)
-            session.commit()
+            mark_cards_changed(session)
             log.info(f"Carta '{card['name']}' aggiunta al database.")
             return True
 
 
+    def save_card(self, card_data, card_id=None):
+        """
+        Salva una carta: la crea se card_id è None, altrimenti aggiorna quella esistente.
+
+        Args:
+            card_data (dict): Valori delle colonne della carta (come raccolti dal CardEditDialog).
+            card_id (int): Id della carta da modificare.
+
+        Returns:
+            int | None: Id della carta salvata, None se la carta da modificare non esiste.
+        """
+
+        with db_session() as session:
+            if card_id is None:
+                card = Card(**card_data)
+                session.add(card)
+                session.flush()
+            else:
+                card = session.get(Card, card_id)
+                if card is None:
+                    log.warning(f"Carta con id {card_id} non trovata.")
+                    return None
+
+                for key, value in card_data.items():
+                    setattr(card, key, value)
+
+                # Tipo, costo e rarità influiscono sulle statistiche dei mazzi che contengono la carta
+                refresh_deck_stats_for_cards(session, [card_id])
+
+            mark_cards_changed(session, [card.id])
+            log.info(f"Carta '{card.name}' salvata nel database.")
+            return card.id
+
+
+    def delete_card(self, card_name):
+        """ Elimina una carta dal database. """
+
+        with db_session() as session:
+            card_ids = [card_id for (card_id,) in session.query(Card.id).filter(Card.name == card_name)]
+            deleted = 0
+            if card_ids:
+                # La carta esce anche dai mazzi che la contengono (statistiche e matrici dei mazzi non devono più contarla)
+                deck_ids = [deck_id for (deck_id,) in session.query(DeckCard.deck_id).filter(DeckCard.card_id.in_(card_ids)).distinct()]
+                session.query(DeckCard).filter(DeckCard.card_id.in_(card_ids)).delete(synchronize_session=False)
+                deleted = session.query(Card).filter(Card.id.in_(card_ids)).delete(synchronize_session=False)
+                mark_cards_changed(session, card_ids)
+                refresh_deck_stats(session, deck_ids)       # Segnala anche i mazzi come modificati
+
+        if not deleted:
+            log.warning(f"Tentativo di eliminazione della carta '{card_name}' non trovata.")
+            return False
+
+        log.info(f"Carta '{card_name}' eliminata dal database.")
+        return True
+
+
     def get_deck(self, deck_name):
         """Restituisce il contenuto di un mazzo dal database."""
         with db_session() as session:  # Aggiungi il contesto
-            deck = session.query(Deck).filter_by(name=deck_name).first()
+            deck = query_deck_with_cards(session).filter(Deck.name == deck_name).first()
             if deck:
-                deck_cards = session.query(DeckCard).filter_by(deck_id=deck.id).all()
-                cards = []
-                for deck_card in deck_cards:
-                    card = session.query(Card).filter_by(id=deck_card.card_id).first()
-                    if card:
-                        cards.append({
-                            "id": card.id,
-                            "name": card.name,
-                            "mana_cost": card.mana_cost,
-                            "quantity": deck_card.quantity,
-                            "class_name": card.class_name,
-                            "card_type": card.card_type,
-                            "spell_type": card.spell_type,
-                            "card_subtype": card.card_subtype,
-                            "attack": card.attack,
-                            "health": card.health,
-                            "durability": card.durability,
-                            "rarity": card.rarity,
-                            "expansion": card.expansion
-                        })
+                cards = [serialize_deck_card(deck_card) for deck_card in deck.deck_cards if deck_card.card]
                 return {
                     "id": deck.id,
                     "name": deck.name,
@@ -456,17 +1079,19 @@ class DbManager:
     def delete_deck(self, deck_name):
         """ Elimina un mazzo dal database. """
         try:
-            with db_session():
+            with db_session() as session:
                 deck = session.query(Deck).filter_by(name=deck_name).first()
                 if not deck:
                     log.warning(f"Tentativo di eliminazione del mazzo '{deck_name}' non trovato.")
                     return False
 
-                # Elimina le carte associate al mazzo
+                # Elimina le carte e le statistiche associate al mazzo
                 session.query(DeckCard).filter_by(deck_id=deck.id).delete()
+                session.query(DeckStats).filter_by(deck_id=deck.id).delete()
+                session.query(DeckArchetype).filter_by(deck_id=deck.id).delete()
                 # Elimina il mazzo
                 session.delete(deck)
-                session.commit()
+                mark_decks_changed(session, [deck.id])
 
             log.info(f"Mazzo '{deck_name}' eliminato con successo.")
             return True
@@ -495,11 +1120,10 @@ class DbManager:
 
 
     def get_card_by_name(self, card_name):
-        """Restituisce una carta dal database in base al nome."""
-        with db_session() as session:  # Aggiungi il contesto
-            card = session.query(Card).filter_by(name=card_name).first()
-            if card:
-                return serialize_card(card)
+        """Restituisce una carta in base al nome (dal catalogo in memoria, senza interrogare il database)."""
+        record = self.catalog.get_by_name(card_name)
+        if record:
+            return record.as_dict()
         return None
 
 
@@ -508,51 +1132,47 @@ class DbManager:
         return load_cards_from_db(filters=filters)
 
     def get_deck_statistics(self, deck_name):
-        """Calcola statistiche dettagliate per un mazzo."""
-        with db_session():
-            deck = self.get_deck(deck_name)
-            if not deck:
-                return None
+        """Restituisce le statistiche di un mazzo lette dalla tabella deck_stats."""
 
-            stats = {
-                "Nome Mazzo": deck["name"],
-                "Eroe": deck["player_class"],
-                "Numero Carte": sum(card["quantity"] for card in deck["cards"]),
-                "Creature": 0,
-                "Magie": 0,
-                "Armi": 0,
-                "Luoghi": 0,
-                "Costo Mana Medio": 0.0
-            }
+        with db_session() as session:
+            row = session.query(Deck, DeckStats).outerjoin(
+                DeckStats, DeckStats.deck_id == Deck.id
+            ).filter(Deck.name == deck_name).first()
+            if not row:
+                return None
 
-            total_mana = 0
-            for card in deck["cards"]:
-                db_card = session.query(Card).filter_by(name=card["name"]).first()
-                if db_card:
-                    card_type = db_card.card_type.lower()
-                    if card_type == "creatura":
-                        stats["Creature"] += card["quantity"]
-                    elif card_type == "magia":
-                        stats["Magie"] += card["quantity"]
-                    elif card_type == "arma":
-                        stats["Armi"] += card["quantity"]
-                    elif card_type == "luogo":
-                        stats["Luoghi"] += card["quantity"]
-
-                    # Calcola il costo totale del mana
-                    total_mana += db_card.mana_cost * card["quantity"]
-
-            if stats["Numero Carte"] > 0:
-                stats["Costo Mana Medio"] = total_mana / stats["Numero Carte"]
-
-            # Arrotonda i valori a 2 decimali
-            for key, value in stats.items():
-                if isinstance(value, float):
-                    stats[key] = round(value, 2)
+            deck, deck_stats = row
+            if deck_stats is None:
+                # Mazzo senza statistiche materializzate (es. importato prima della tabella deck_stats)
+                refresh_deck_stats(session, [deck.id], mark_changed=False)
+                deck_stats = session.get(DeckStats, deck.id)
 
+            stats = format_deck_stats(deck, deck_stats)
+            stats.update(format_missing_cards(session, deck.id))
             return stats
 
 
+    def backfill_deck_stats(self, session, missing=None):
+        """
+        Calcola le statistiche dei mazzi che non hanno ancora una riga in deck_stats.
+
+        È un completamento eseguito durante le letture: i mazzi non vengono segnalati come modificati.
+
+        Args:
+            missing (list): Id dei mazzi senza statistiche, se già noti (None = cercati con una query).
+        """
+
+        if missing is None:
+            missing = [
+                deck_id for (deck_id,) in session.query(Deck.id).outerjoin(
+                    DeckStats, DeckStats.deck_id == Deck.id
+                ).filter(DeckStats.deck_id.is_(None))
+            ]
+        if missing:
+            log.info(f"Calcolo delle statistiche mancanti per {len(missing)} mazzi.")
+            refresh_deck_stats(session, missing, mark_changed=False)
+
+
     def get_decks(self, filters=None):
         """Restituisce tutti i mazzi con opzioni di filtro."""
         with db_session() as session:  # Aggiungi il contesto
@@ -571,18 +1191,16 @@ class DbManager:
         """Restituisce i dettagli di un mazzo specifico."""
 
         with db_session() as session:
-            deck = session.query(Deck).filter_by(name=deck_name).first()
+            deck = query_deck_with_cards(session).filter(Deck.name == deck_name).first()
             if deck:
-                deck_cards = session.query(DeckCard).filter_by(deck_id=deck.id).all()
-                cards = []
-                for deck_card in deck_cards:
-                    card = session.query(Card).filter_by(id=deck_card.card_id).first()
-                    if card:
-                        cards.append({
-                            "name": card.name,
-                            "mana_cost": card.mana_cost,
-                            "quantity": deck_card.quantity
-                        })
+                cards = [
+                    {
+                        "name": deck_card.card.name,
+                        "mana_cost": deck_card.card.mana_cost,
+                        "quantity": deck_card.quantity
+                    }
+                    for deck_card in deck.deck_cards if deck_card.card
+                ]
                 return {
                     "name": deck.name,
                     "player_class": deck.player_class,
@@ -596,16 +1214,14 @@ class DbManager:
         """Calcola il numero totale di carte in un mazzo."""
 
         try:
-            with db_session() as session:
-                deck = self.get_deck(deck_name)
-                if deck:
-                    #total_cards = session.query(DeckCard).filter_by(deck_id=deck.id).count()
-                    total_cards = sum(card["quantity"] for card in deck["cards"])
-                    log.info(f"Mazzo '{deck_name}' contiene {total_cards} carte.")
-                    return total_cards
-                else:
-                    log.error(f"Mazzo '{deck_name}' non trovato.")
-                    return 0
+            stats = self.get_deck_statistics(deck_name)
+            if stats:
+                total_cards = stats["Numero Carte"]
+                log.info(f"Mazzo '{deck_name}' contiene {total_cards} carte.")
+                return total_cards
+            else:
+                log.error(f"Mazzo '{deck_name}' non trovato.")
+                return 0
 
         except Exception as e:
             log.error(f"Errore durante il calcolo delle carte totali per il mazzo {deck_name}: {e}")
@@ -621,17 +1237,17 @@ class DbManager:
             # mostra tutti i mazzi
             frame.load_decks()
             # sposta il cursore nella lista deimazzi
-            frame.controller.set_focus_to_list(frame)    # Imposta il focus sul primo mazzo della lista
+            frame.set_focus_to_list()    # Imposta il focus sul primo mazzo della lista (al termine del caricamento)
 
         else:
-            # Filtra i mazzi in base al nome o alla classe
-            frame.card_list.DeleteAllItems()
-            with db_session() as session:
-                decks = session.query(Deck).filter(Deck.name.ilike(f"%{search_text}%") | Deck.player_class.ilike(f"%{search_text}%")).all()
-                for deck in decks:
-                    index = frame.card_list.InsertItem(frame.card_list.GetItemCount(), deck.name)
-                    frame.card_list.SetItem(index, 1, deck.player_class)
-                    frame.card_list.SetItem(index, 2, deck.game_format)
+            # Filtra i mazzi in base al nome o alla classe, in background; se il testo estende la ricerca
+            # precedente vengono filtrate solo le righe già trovate (vedi scr.search_session)
+            folded_text = search_text.casefold()
+            frame.load_rows_async(
+                frame.search_session.search, search_text,
+                full_query=lambda: self.get_deck_summary_rows(search_text),
+                narrow=lambda rows: [row for row in rows if folded_text in row[0].casefold() or folded_text in row[1].casefold()]
+            )
 
 
     def load_collection(filters=None, card_list=None):
@@ -642,10 +1258,10 @@ class DbManager:
     def get_deck_cards(self, deck_id):
         """Restituisce le carte associate a un mazzo."""
         with db_session() as session:
-            deck_cards = session.query(DeckCard).filter_by(deck_id=deck_id).all()
+            deck_cards = query_deck_cards(session, deck_id).all()
             cards = []
             for deck_card in deck_cards:
-                card = session.query(Card).filter_by(id=deck_card.card_id).first()
+                card = deck_card.card
                 if card:
                     cards.append({
                         "name": card.name,
@@ -656,6 +1272,140 @@ class DbManager:
             return cards
 
 
+    def get_deck_summaries(self, search_text=None):
+        """
+        Restituisce il riepilogo dei mazzi leggendo i totali materializzati in deck_stats e gli archetipi di deck_archetype.
+
+        Le copie mancanti nella collezione non fanno parte del riepilogo: la lista dei mazzi le chiede
+        in background a get_missing_copies_by_deck, dopo aver mostrato le righe.
+
+        Args:
+            search_text (str): Se indicato, solo i mazzi il cui nome o la cui classe contiene il testo.
+
+        Returns:
+            list: Lista di dizionari con nome, classe, formato, numero totale di carte e archetipo
+                  (stringa vuota se non è ancora stato calcolato).
+        """
+
+        with db_session() as session:
+            query = session.query(
+                Deck.id,
+                Deck.name,
+                Deck.player_class,
+                Deck.game_format,
+                func.coalesce(DeckStats.total_cards, 0),
+                func.coalesce(DeckArchetype.name, ""),
+                DeckStats.deck_id.is_(None)
+            ).outerjoin(
+                DeckStats, DeckStats.deck_id == Deck.id
+            ).outerjoin(
+                DeckArchetype, DeckArchetype.deck_id == Deck.id
+            )
+            if search_text:
+                query = query.filter(Deck.name.ilike(f"%{search_text}%") | Deck.player_class.ilike(f"%{search_text}%"))
+            rows = query.order_by(Deck.id).all()
+
+            # Mazzi senza statistiche (es. creati prima di deck_stats): calcolate una volta sola e poi rilette
+            missing_stats = [row[0] for row in rows if row[6]]
+            if missing_stats:
+                self.backfill_deck_stats(session, missing_stats)
+                rows = query.order_by(Deck.id).all()
+
+            return [
+                {
+                    "name": name,
+                    "player_class": player_class,
+                    "game_format": game_format,
+                    "total_cards": total_cards,
+                    "archetype": archetype
+                }
+                for deck_id, name, player_class, game_format, total_cards, archetype, _ in rows
+            ]
+
+
+    def get_deck_summary_rows(self, search_text=None):
+        """
+        Restituisce le righe già formattate della lista dei mazzi (eseguibile in un thread in background).
+
+        La colonna delle copie mancanti resta vuota finché non arriva il risultato di get_missing_copies_by_deck.
+        """
+
+        return [
+            [summary["name"], summary["player_class"], summary["game_format"], str(summary["total_cards"]), summary["archetype"], ""]
+            for summary in self.get_deck_summaries(search_text)
+        ]
+
+
+    def get_missing_copies_by_deck(self):
+        """
+        Restituisce le copie mancanti nella collezione per costruire ogni mazzo (eseguibile in un thread in background).
+
+        Returns:
+            dict: {nome del mazzo: copie mancanti} (0 per i mazzi costruibili).
+        """
+
+        evaluator = get_deck_buildability()
+        with db_session() as session:
+            missing = evaluator.report().missing_by_deck() if evaluator is not None else query_missing_copies(session)
+            return {name: missing.get(deck_id, 0) for deck_id, name in session.query(Deck.id, Deck.name)}
+
+
+    def get_similar_decks(self, deck_name, limit=SIMILAR_DECKS_LIMIT, metric="cosine"):
+        """
+        Restituisce i mazzi più simili a quello indicato (indice NumPy, oppure SQL se NumPy non è installato).
+
+        Args:
+            deck_name (str): Nome del mazzo cercato.
+            limit (int): Numero massimo di mazzi.
+            metric (str): "cosine" (conteggi delle copie) o "jaccard" (carte in comune sul totale).
+
+        Returns:
+            list: Dizionari con nome, classe, formato e somiglianza (tra 0 e 1), in ordine di somiglianza decrescente.
+        """
+
+        with db_session() as session:
+            deck_id = session.query(Deck.id).filter(Deck.name == deck_name).scalar()
+            if deck_id is None:
+                log.warning(f"Mazzo '{deck_name}' non trovato.")
+                return []
+
+            index = get_deck_similarity_index()
+            if index is not None:
+                matches = index.similar(deck_id, limit, metric)
+            else:
+                matches = query_similar_decks(session, deck_id, limit, metric)
+
+            details = {
+                row[0]: row[1:] for row in session.query(Deck.id, Deck.name, Deck.player_class, Deck.game_format)
+                .filter(Deck.id.in_([match.deck_id for match in matches]))
+            }
+
+        similar_decks = []
+        for match in matches:
+            if match.deck_id in details:
+                name, player_class, game_format = details[match.deck_id]
+                similar_decks.append({"name": name, "player_class": player_class, "game_format": game_format, "score": match.score})
+        return similar_decks
+
+
+    def prepare_similar_decks(self):
+        """ Carica in anticipo l'indice di somiglianza dei mazzi (eseguibile in un thread in background). """
+
+        index = get_deck_similarity_index()
+        if index is not None:
+            index.ensure_fresh()
+
+
+    def _append_deck_summary(self, card_list, summary):
+        """Aggiunge alla lista la riga di riepilogo di un mazzo."""
+
+        index = card_list.InsertItem(card_list.GetItemCount(), summary["name"])
+        card_list.SetItem(index, 1, summary["player_class"])
+        card_list.SetItem(index, 2, summary["game_format"])
+        card_list.SetItem(index, 3, str(summary["total_cards"]))
+        card_list.SetItem(index, 4, summary["archetype"])
+
+
     def new_load_decks(self, card_list=None):
         """Carica i mazzi dal database e restituisce una lista di dizionari."""
 
@@ -674,63 +1424,73 @@ class DbManager:
             log.error("Errore durante il caricamento dei mazzi. Nessuna lista passata.")
             raise ValueError("Errore durante il caricamento dei mazzi. Nessuna lista passata.")
 
-        with db_session() as session:  # Aggiungi il contesto
-            decks = session.query(Deck).all()
-            if not decks:
-                log.warning("Nessun mazzo trovato.")
-                return False
+        summaries = self.get_deck_summaries()
+        if not summaries:
+            log.warning("Nessun mazzo trovato.")
+            return False
+
+        for summary in summaries:
+            self._append_deck_summary(card_list, summary)
 
-            for deck in decks:
-                log.info(f"Caricamento deck: {deck.name}")
-                index = card_list.InsertItem(card_list.GetItemCount(), deck.name)
-                card_list.SetItem(index, 1, deck.player_class)
-                card_list.SetItem(index, 2, deck.game_format)
-                stats = self.get_deck_statistics(deck.name)
-                total_cards = stats.get("Numero Carte", 0)
-                log.info(f"Totale carte per {deck.name}: {total_cards}")
-                card_list.SetItem(index, 3, str(total_cards))
+        log.info(f"Caricati {len(summaries)} mazzi.")
         return True
 
 
     def upgrade_deck(self, deck_name):
-        """ Aggiorna un mazzo nel database. """
+        """
+        Aggiorna un mazzo nel database con il contenuto degli appunti.
+
+        Vengono applicati solo gli inserimenti, gli aggiornamenti di quantità e le eliminazioni
+        necessari, tutti nella stessa transazione.
+
+        Returns:
+            dict | bool: Le modifiche applicate ("added", "updated", "removed", ciascuna una lista
+            di tuple con il nome della carta e le quantità), oppure False in caso di errore.
+        """
 
         try:
-            deck_string = pyperclip.paste()
-            if self.is_valid_deck(deck_string):
-                with db_session() as session:  # Usa il contesto db_session
+            parsed_deck = self.parse_valid_deck(pyperclip.paste())
+            if parsed_deck:
+                with db_session() as session:  # Usa il contesto db_session (un solo commit)
                     deck = session.query(Deck).filter_by(name=deck_name).first()
                     if deck:
-                        # Elimina le carte associate al mazzo
-                        session.query(DeckCard).filter_by(deck_id=deck.id).delete()
-                        session.commit()
-
-                        # Sincronizza le carte con il database
-                        self.sync_cards_with_database(deck_string)
-
-                        # Aggiungi le nuove carte al mazzo
-                        cards = self.parse_cards_from_deck(deck_string)
-                        for card_data in cards:
-                            card = session.query(Card).filter_by(name=card_data["name"]).first()
-                            if not card:
-                                card = Card(
-                                    name=card_data["name"],
-                                    class_name="Unknown",
-                                    mana_cost=card_data["mana_cost"],
-                                    card_type="Unknown",
-                                    spell_type="Unknown",
-                                    card_subtype="Unknown",
-                                    rarity="Unknown",
-                                    expansion="Unknown"
-                                )
-                                session.add(card)
-                                session.commit()
-
-                            deck_card = DeckCard(deck_id=deck.id, card_id=card.id, quantity=card_data["quantity"])
-                            session.add(deck_card)
-                            session.commit()
-
-                        return True
+                        # Contenuto attuale del mazzo: {card_id: (nome, quantità)}
+                        stored = {
+                            card_id: (name, quantity)
+                            for card_id, name, quantity in session.query(
+                                DeckCard.card_id, Card.name, DeckCard.quantity
+                            ).join(Card, Card.id == DeckCard.card_id).filter(DeckCard.deck_id == deck.id)
+                        }
+
+                        # Nuovo contenuto: dal deckstring se tutte le carte sono note, altrimenti dalle righe
+                        new_cards = self.resolve_deckstring(session, parsed_deck.deckstring)
+                        if new_cards is None and not parsed_deck.cards:
+                            log.error("Le carte del mazzo negli appunti sono solo nel deckstring, ma non sono tutte nel database.")
+                            return False
+                        if new_cards is None:
+                            cards = self.merge_card_lines(parsed_deck.card_dicts())
+                            card_ids = self.resolve_card_ids(session, cards)
+                            new_cards = self.card_id_quantities(cards, card_ids)
+
+                        names = dict(session.query(Card.id, Card.name).filter(Card.id.in_(list(new_cards))))
+                        names.update({card_id: name for card_id, (name, _) in stored.items()})
+
+                        changes = diff_deck_cards(
+                            {card_id: quantity for card_id, (_, quantity) in stored.items()},
+                            new_cards
+                        )
+                        self._apply_deck_changes(session, deck.id, changes)
+                        refresh_deck_stats(session, [deck.id])
+
+                        log.info(
+                            f"Mazzo '{deck_name}' aggiornato: {len(changes['added'])} carte aggiunte, "
+                            f"{len(changes['updated'])} modificate, {len(changes['removed'])} rimosse."
+                        )
+                        return {
+                            "added": [(names[card_id], qty) for card_id, qty in changes["added"].items()],
+                            "updated": [(names[card_id], old, new) for card_id, (old, new) in changes["updated"].items()],
+                            "removed": [(names[card_id], qty) for card_id, qty in changes["removed"].items()]
+                        }
 
                     else:
                         log.error("Errore: Mazzo non trovato nel database.")
@@ -745,21 +1505,35 @@ class DbManager:
             return False
 
 
+    def _apply_deck_changes(self, session, deck_id, changes):
+        """Applica al mazzo le modifiche calcolate da diff_deck_cards (il commit è a carico del chiamante)."""
+
+        if changes["added"]:
+            session.execute(insert(DeckCard), [
+                {"deck_id": deck_id, "card_id": card_id, "quantity": qty}
+                for card_id, qty in changes["added"].items()
+            ])
+
+        if changes["updated"]:
+            session.execute(update(DeckCard), [
+                {"deck_id": deck_id, "card_id": card_id, "quantity": new}
+                for card_id, (_, new) in changes["updated"].items()
+            ])
+
+        if changes["removed"]:
+            session.query(DeckCard).filter(
+                DeckCard.deck_id == deck_id,
+                DeckCard.card_id.in_(changes["removed"])
+            ).delete(synchronize_session=False)
+
+
     def update_decks_list(self, card_list =None):
         """Aggiorna la lista dei mazzi."""
 
         #card_list = frame.card_list
         card_list.DeleteAllItems()  # Pulisce la lista
-        with db_session() as session:  # Usa il contesto db_session
-            decks = session.query(Deck).all()
-            for deck in decks:
-                index = card_list.InsertItem(card_list.GetItemCount(), deck.name)  # Prima colonna
-                card_list.SetItem(index, 1, deck.player_class)  # Seconda colonna
-                card_list.SetItem(index, 2, deck.game_format)  # Terza colonna
-                
-                # Calcola e visualizza il numero totale di carte
-                total_cards = self.get_total_cards_in_deck(deck.name)
-                card_list.SetItem(index, 3, str(total_cards))  # Aggiunge il numero totale di carte nella nuova colonna
+        for summary in self.get_deck_summaries():
+            self._append_deck_summary(card_list, summary)
 
 
 
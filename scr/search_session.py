@@ -0,0 +1,107 @@
+"""
+    search_session.py
+
+    Modulo per la ricerca incrementale nelle liste (collezione, mazzo, elenco dei mazzi).
+
+    Path:
+        scr/search_session.py
+
+    Descrizione:
+        Una SearchSession ricorda il testo e i risultati dell'ultima ricerca di una finestra.
+        Se il nuovo testo estende il precedente (caratteri o termini aggiunti in coda) e il contesto
+        non è cambiato (altri filtri, generazione dei dati), i risultati si ottengono filtrando solo
+        le corrispondenze precedenti. Cancellazioni, testi diversi o contesti diversi eseguono la query completa.
+
+    Note:
+        - La ricerca per nome richiede che ogni termine compaia nel nome: aggiungere caratteri o termini
+          può solo ridurre i risultati, quindi restringere quelli precedenti dà lo stesso esito della query completa.
+        - Il testo e i risultati sono salvati insieme (un'unica tupla), quindi la sessione resta coerente anche
+          se le ricerche vengono eseguite dai thread del DataService.
+        - La misura della digitazione con e senza SearchSession è in benchmarks/bench_search_session.py.
+
+"""
+
+# lib
+from .card_catalog import normalize_card_name, fold_text
+from utyls import logger as log
+
+
+
+def name_tokens(text):
+    """ Restituisce i termini di ricerca normalizzati di un testo (senza maiuscole né accenti). """
+    return fold_text(text).split()
+
+
+def matches_tokens(name, tokens):
+    """ True se tutti i termini compaiono nel nome (senza distinzione tra maiuscole, minuscole e accenti). """
+
+    name = fold_text(name)
+    return all(token in name for token in tokens)
+
+
+
+class SearchSession:
+    """
+    Ricerca incrementale: restringe i risultati precedenti quando il testo viene esteso.
+
+    Attributi:
+        full_queries (int): Ricerche eseguite con la query completa.
+        narrowed (int): Ricerche ottenute restringendo i risultati precedenti.
+    """
+
+    def __init__(self):
+        self._state = None          # (testo normalizzato, contesto, risultati) dell'ultima ricerca
+        self.full_queries = 0
+        self.narrowed = 0
+
+
+    def can_narrow(self, text, context=None):
+        """ True se il testo estende quello dell'ultima ricerca con lo stesso contesto. """
+        return self._extends(self._state, text, context)
+
+
+    @staticmethod
+    def _extends(state, text, context):
+        if state is None:
+            return False
+
+        previous_text, previous_context, _ = state
+        return previous_context == context and normalize_card_name(text).startswith(previous_text)
+
+
+    def search(self, text, full_query, narrow, context=None):
+        """
+        Esegue la ricerca, restringendo i risultati precedenti quando possibile.
+
+        Args:
+            text (str): Testo cercato.
+            full_query (callable): full_query() esegue la ricerca completa e restituisce i risultati.
+            narrow (callable): narrow(risultati_precedenti) restituisce le sole corrispondenze del nuovo testo.
+            context: Valore confrontabile che identifica filtri e dati; se cambia si esegue la query completa.
+
+        Returns:
+            I risultati della ricerca.
+        """
+
+        state = self._state
+        if self._extends(state, text, context):
+            results = narrow(state[2])
+            self.narrowed += 1
+        else:
+            results = full_query()
+            self.full_queries += 1
+
+        self._state = (normalize_card_name(text), context, results)
+        log.debug(f"Ricerca '{text}': {len(results)} risultati (query complete: {self.full_queries}, ristrette: {self.narrowed}).")
+        return results
+
+
+    def reset(self):
+        """ Dimentica l'ultima ricerca (es. dopo una modifica dei dati): la prossima esegue la query completa. """
+        self._state = None
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
@@ -0,0 +1,191 @@
+"""
+    trigram_index.py
+
+    Modulo per la ricerca approssimata dei nomi delle carte (tollerante agli errori di battitura).
+
+    Path:
+        scr/trigram_index.py
+
+    Descrizione:
+        TrigramIndex indicizza i nomi per trigrammi di caratteri (per parola, con bordi come pg_trgm),
+        dopo averli normalizzati con fold_text (minuscole, senza accenti e spazi superflui).
+        Una ricerca conta i trigrammi in comune tramite le liste di occorrenze, seleziona i candidati
+        con la somiglianza migliore (media di Jaccard e copertura della query) e li riordina con la
+        distanza di modifica (Levenshtein), restituendo i primi `limit` risultati.
+
+    Note:
+        - NumPy è opzionale: se installato i conteggi usano bincount, altrimenti un dizionario.
+        - I tempi di costruzione e di ricerca su 50k nomi sintetici sono misurati da benchmarks/bench_trigram_index.py.
+
+"""
+
+# lib
+from typing import NamedTuple
+from .card_catalog import fold_text
+from utyls import logger as log
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+RERANK_FACTOR = 3           # Candidati riordinati con la distanza di modifica, per ogni risultato richiesto
+
+
+
+def trigrams(text):
+    """ Restituisce l'insieme dei trigrammi di un testo già normalizzato (due spazi prima e uno dopo ogni parola). """
+
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def edit_distance(first, second):
+    """ Distanza di Levenshtein tra due testi. """
+
+    if first == second:
+        return 0
+    if len(first) < len(second):
+        first, second = second, first
+
+    previous = list(range(len(second) + 1))
+    for i, char_first in enumerate(first, 1):
+        current = [i]
+        left = i
+        for j, char_second in enumerate(second, 1):
+            cost = previous[j - 1] + (char_first != char_second)     # sostituzione
+            if previous[j] + 1 < cost:                              # cancellazione
+                cost = previous[j] + 1
+            if left + 1 < cost:                                     # inserimento
+                cost = left + 1
+            current.append(cost)
+            left = cost
+        previous = current
+    return previous[-1]
+
+
+
+class FuzzyMatch(NamedTuple):
+    """ Risultato di una ricerca approssimata. """
+
+    key: object         # Chiave dell'elemento indicizzato (es. id della carta)
+    name: str
+    score: float        # Somiglianza tra 0 e 1
+
+
+
+class TrigramIndex:
+    """
+    Indice per trigrammi di un insieme di nomi.
+
+    Args:
+        entries (iterable): Coppie (chiave, nome) da indicizzare.
+    """
+
+    def __init__(self, entries=()):
+        self.keys = []
+        self.names = []
+        self.folded = []
+        self._sizes = []            # Numero di trigrammi di ogni nome
+        self._postings = {}         # trigramma -> posizioni dei nomi che lo contengono
+        self.build(entries)
+
+
+    def __len__(self):
+        return len(self.keys)
+
+
+    def build(self, entries):
+        """ Ricostruisce l'indice con le coppie (chiave, nome) indicate. """
+
+        keys, names, folded, sizes, postings = [], [], [], [], {}
+        for position, (key, name) in enumerate(entries):
+            folded_name = fold_text(name)
+            grams = trigrams(folded_name)
+            keys.append(key)
+            names.append(name)
+            folded.append(folded_name)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+
+        if NUMPY_AVAILABLE:
+            sizes = np.array(sizes, dtype=np.int32)
+            postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+
+        self.keys, self.names, self.folded, self._sizes, self._postings = keys, names, folded, sizes, postings
+        log.debug(f"Indice per trigrammi costruito: {len(keys)} nomi, {len(postings)} trigrammi.")
+
+
+    def _candidates(self, grams, limit, min_score):
+        """ Restituisce [(posizione, somiglianza per trigrammi)] dei migliori candidati. """
+
+        query_size = len(grams)
+        if NUMPY_AVAILABLE:
+            lists = [self._postings[gram] for gram in grams if gram in self._postings]
+            if not lists:
+                return []
+
+            counts = np.bincount(np.concatenate(lists), minlength=len(self.keys))
+            positions = np.flatnonzero(counts)
+            overlap = counts[positions]
+            scores = (overlap / (query_size + self._sizes[positions] - overlap) + overlap / query_size) / 2
+            keep = scores >= min_score
+            positions, scores = positions[keep], scores[keep]
+            if len(positions) > limit:
+                best = np.argpartition(-scores, limit)[:limit]
+                positions, scores = positions[best], scores[best]
+            return list(zip(positions.tolist(), scores.tolist()))
+
+        counts = {}
+        for gram in grams:
+            for position in self._postings.get(gram, ()):
+                counts[position] = counts.get(position, 0) + 1
+
+        scored = []
+        for position, overlap in counts.items():
+            score = (overlap / (query_size + self._sizes[position] - overlap) + overlap / query_size) / 2
+            if score >= min_score:
+                scored.append((position, score))
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
+
+
+    def search(self, text, limit=10, min_score=0.3):
+        """
+        Restituisce i nomi più simili al testo, dal più simile.
+
+        Args:
+            text (str): Testo cercato (maiuscole, accenti e spazi superflui sono ignorati).
+            limit (int): Numero massimo di risultati.
+            min_score (float): Somiglianza minima per trigrammi dei candidati.
+
+        Returns:
+            list: Lista di FuzzyMatch.
+        """
+
+        folded_text = fold_text(text)
+        grams = trigrams(folded_text)
+        if not grams or not self.keys:
+            return []
+
+        matches = []
+        for position, trigram_score in self._candidates(grams, limit * RERANK_FACTOR, min_score):
+            folded_name = self.folded[position]
+            edit_score = 1 - edit_distance(folded_text, folded_name) / max(len(folded_text), len(folded_name))
+            matches.append(FuzzyMatch(self.keys[position], self.names[position], round((trigram_score + edit_score) / 2, 4)))
+
+        matches.sort(key=lambda match: (-match.score, match.name))
+        return matches[:limit]
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
@@ -8,6 +8,7 @@
     
         Questo modulo contiene la classe ColorManager, che gestisce i colori dell'applicazione.
         La classe supporta temi e colori personalizzati, e fornisce metodi per applicare stili a elementi dell'interfaccia.
+        ListSelectionTracker evidenzia la riga selezionata di una lista ricolorando solo la riga precedente e la nuova.
 
 """
 
@@ -132,47 +133,47 @@ class ColorManager:
 
     def apply_selection_style(self, element, item_index=None):
         if isinstance(element, wx.ListCtrl):
-            if item_index is not None:
-                element.SetItemBackgroundColour(item_index, self.get_color(AppColors.FOCUS_BG))
-                element.SetItemTextColour(item_index, self.get_color(AppColors.FOCUS_TEXT))
-            else:
-                for i in range(element.GetItemCount()):
-                    element.SetItemBackgroundColour(i, self.get_color(AppColors.DEFAULT_BG))
-                    element.SetItemTextColour(i, self.get_color(AppColors.DEFAULT_TEXT))
+            self.selection_tracker(element).select(item_index)
         else:
             self.apply_focus_style(element)
 
 
+    def selection_tracker(self, list_ctrl):
+        """
+        Restituisce il ListSelectionTracker della lista, creandolo al primo uso.
+        :param list_ctrl: L'istanza di wx.ListCtrl.
+        """
+
+        tracker = getattr(list_ctrl, "selection_tracker", None)
+        if tracker is None:
+            tracker = ListSelectionTracker(list_ctrl, self)
+            list_ctrl.selection_tracker = tracker
+        return tracker
+
+
     def apply_selection_style_to_list_item(self, list_ctrl, item_index):
         """
         Applica lo stile di selezione a un elemento di una ListCtrl.
 
+        La riga evidenziata in precedenza torna allo stile predefinito.
+
         :param list_ctrl: La ListCtrl contenente l'elemento.
         :param item_index: L'indice dell'elemento da modificare.
         """
 
-        list_ctrl.SetItemBackgroundColour(item_index, self.get_color(AppColors.FOCUS_BG))
-        list_ctrl.SetItemTextColour(item_index, self.get_color(AppColors.FOCUS_TEXT))
-        list_ctrl.Refresh()
+        self.selection_tracker(list_ctrl).select(item_index)
 
 
     def apply_selection_style_to_list(self, list_ctrl, selected_item=None):
         """
-        Applica lo stile di selezione a un elemento di una ListCtrl.
+        Applica lo stile di selezione a un elemento di una ListCtrl (e lo stile predefinito alle altre righe).
+        Solo la riga evidenziata in precedenza e quella nuova vengono ricolorate, qualunque sia la lunghezza della lista.
+
         :param list_ctrl: L'istanza di wx.ListCtrl.
-        :param selected_item: L'indice della riga selezionata.
+        :param selected_item: L'indice della riga selezionata (None = nessuna riga evidenziata).
         """
 
-        for i in range(list_ctrl.GetItemCount()):
-            if i == selected_item:
-                list_ctrl.SetItemBackgroundColour(i, self.get_color(AppColors.FOCUS_BG))
-                list_ctrl.SetItemTextColour(i, self.get_color(AppColors.FOCUS_TEXT))
-
-            else:
-                list_ctrl.SetItemBackgroundColour(i, self.get_color(AppColors.DEFAULT_BG))
-                list_ctrl.SetItemTextColour(i, self.get_color(AppColors.DEFAULT_TEXT))
-
-        list_ctrl.Refresh()
+        self.selection_tracker(list_ctrl).select(selected_item)
 
 
     def reset_focus_style(self, element):
@@ -293,6 +294,64 @@ class ColorManager:
 
 
 
+#@@# Sezione evidenziazione della riga selezionata
+
+class ListSelectionTracker:
+    """
+    Evidenzia la riga selezionata di una ListCtrl ricordando la riga evidenziata in precedenza,
+    così che ogni cambio di selezione ricolori solo due righe invece dell'intera lista.
+
+    Nelle liste virtuali (con un ListRowProvider) i colori non vengono scritti nella lista:
+    il provider restituisce da OnGetItemAttr un wx.ItemAttr in cache per la riga evidenziata.
+
+    Attributi:
+        item (int | None): Riga evidenziata (None = nessuna).
+    """
+
+    def __init__(self, list_ctrl, color_manager):
+        self.list_ctrl = list_ctrl
+        self.cm = color_manager
+        self.item = None
+
+
+    def select(self, item):
+        """
+        Evidenzia la riga indicata e riporta allo stile predefinito quella evidenziata in precedenza.
+        :param item: Indice della riga (None o fuori dalla lista = nessuna riga evidenziata).
+        """
+
+        count = self.list_ctrl.GetItemCount()
+        if item is not None and not 0 <= item < count:
+            item = None
+
+        previous, self.item = self.item, item
+        provider = getattr(self.list_ctrl, "provider", None)
+        if provider is not None:
+            provider.highlight(item, self.cm.get_color(AppColors.FOCUS_BG), self.cm.get_color(AppColors.FOCUS_TEXT))
+        else:
+            if previous is not None and previous != item and previous < count:
+                self.cm.apply_default_style_to_list_item(self.list_ctrl, previous)
+            if item is not None:
+                self.list_ctrl.SetItemBackgroundColour(item, self.cm.get_color(AppColors.FOCUS_BG))
+                self.list_ctrl.SetItemTextColour(item, self.cm.get_color(AppColors.FOCUS_TEXT))
+
+        # Ridisegna solo le due righe coinvolte
+        for row in {previous, item}:
+            if row is not None and row < count:
+                self.list_ctrl.RefreshItem(row)
+
+
+    def clear(self, keep=None):
+        """
+        Rimuove l'evidenziazione, a meno che la riga evidenziata sia `keep`.
+        :param keep: Riga che può restare evidenziata (opzionale).
+        """
+
+        if self.item is not None and self.item != keep:
+            self.select(None)
+
+
+
 #@@@# Start del modulo
 if __name__ != "__main__":
     log.debug(f"Carico: {__name__}")
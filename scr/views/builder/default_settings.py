@@ -13,6 +13,7 @@
 import wx, os, sys
 from enum import Enum
 from pathlib import Path
+from scr.db_settings import DB_PERFORMANCE_PROFILE, USE_COLUMNAR_STORE
 from utyls import enu_glob as eg
 from utyls import logger as log
 
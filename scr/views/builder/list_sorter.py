@@ -0,0 +1,128 @@
+"""
+    list_sorter.py
+
+    Modulo per l'ordinamento delle righe delle liste virtuali.
+
+    Path:
+        scr/views/builder/list_sorter.py
+
+    Descrizione:
+        RowSorter ordina le posizioni delle righe di un ListRowProvider con chiavi tipizzate, calcolate
+        una sola volta per colonna: numeri per le colonne numeriche, testo senza maiuscole e accenti per le altre.
+        L'ordinamento è stabile e su più colonne. Il rango di ogni riga per una data combinazione di colonne
+        resta in cache, quindi riordinare per le stesse colonne o filtrare una lista già ordinata costa
+        solo il riordino delle posizioni visibili.
+
+    Note:
+        - NumPy è opzionale: se installato il riordino delle posizioni usa argsort, altrimenti sorted().
+
+"""
+
+# lib
+from scr.card_catalog import fold_text
+from utyls import logger as log
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+
+def numeric_key(text):
+    """ Chiave per le colonne numeriche: i numeri precedono i valori mancanti o non numerici (es. "-"). """
+
+    try:
+        return (0, int(text))
+    except (TypeError, ValueError):
+        try:
+            return (0, float(text))
+        except (TypeError, ValueError):
+            return (1, fold_text(text))
+
+
+
+class RowSorter:
+    """
+    Ordinamento tipizzato delle righe di una lista.
+
+    Attributi:
+        rows (list): Righe da ordinare (liste di stringhe, come nel ListRowProvider).
+        numeric_columns (frozenset): Colonne da ordinare come numeri.
+    """
+
+    def __init__(self, rows, numeric_columns=()):
+        self.rows = rows
+        self.numeric_columns = frozenset(numeric_columns)
+        self._keys = {}         # colonna -> chiave di ogni riga
+        self._ranks = {}        # colonne di ordinamento -> rango di ogni riga
+
+
+    def keys(self, col):
+        """ Restituisce (calcolandole la prima volta) le chiavi di ordinamento della colonna. """
+
+        keys = self._keys.get(col)
+        if keys is None:
+            make_key = numeric_key if col in self.numeric_columns else fold_text
+            keys = [make_key(row[col] if col < len(row) else "") for row in self.rows]
+            self._keys[col] = keys
+        return keys
+
+
+    def ranks(self, columns):
+        """
+        Restituisce il rango di ogni riga per l'ordinamento indicato.
+
+        Args:
+            columns (tuple): Coppie (colonna, decrescente), dalla chiave principale alla meno importante.
+        """
+
+        columns = tuple(columns)
+        ranks = self._ranks.get(columns)
+        if ranks is not None:
+            return ranks
+
+        # Ordinamenti stabili successivi, dalla chiave meno importante alla principale
+        order = list(range(len(self.rows)))
+        for col, reverse in reversed(columns):
+            order.sort(key=self.keys(col).__getitem__, reverse=reverse)
+
+        ranks = [0] * len(order)
+        for rank, position in enumerate(order):
+            ranks[position] = rank
+        if NUMPY_AVAILABLE:
+            ranks = np.array(ranks, dtype=np.int64)
+
+        self._ranks[columns] = ranks
+        log.debug(f"Calcolato l'ordinamento {columns} su {len(order)} righe.")
+        return ranks
+
+
+    def sort(self, positions, columns):
+        """
+        Ordina le posizioni indicate.
+
+        Args:
+            positions: Posizioni delle righe (lista, array NumPy o None = tutte le righe).
+            columns (tuple): Coppie (colonna, decrescente).
+
+        Returns:
+            Le posizioni ordinate (array NumPy se disponibile, altrimenti lista).
+        """
+
+        ranks = self.ranks(columns)
+        if positions is None:
+            positions = range(len(self.rows))
+
+        if NUMPY_AVAILABLE:
+            positions = np.asarray(positions, dtype=np.int64)
+            return positions[np.argsort(ranks[positions], kind="stable")]
+        return sorted(positions, key=ranks.__getitem__)
+
+
+
+#@@@# Start del modulo
+if __name__ != "__main__":
+    log.debug(f"Carico: {__name__}")
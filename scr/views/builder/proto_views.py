@@ -17,6 +17,8 @@ import wx
 import wx.lib.newevent
 from abc import ABC, abstractmethod
 from .color_system import ColorManager, AppColors, ColorTheme
+from .view_components import VirtualListCtrl
+from scr.search_session import SearchSession
 from utyls import helper as hp
 from utyls import enu_glob as eg
 from utyls import logger as log
@@ -71,6 +73,9 @@ class BasicView(wx.Frame):
         self.controller = None             # Controller per l'interfaccia
         self.db_manager = None             # Gestore del database
         self.color_manager = None           # Gestore dei colori
+        self.card_catalog = None            # Catalogo delle carte in memoria
+        self.data_service = None            # Servizio per i caricamenti in background
+        self.autocomplete = None            # Suggerimenti per le barre di ricerca
         #self.focus_handler = None           # Gestore degli eventi di focus
 
         # Risolvi le dipendenze dal container
@@ -81,6 +86,9 @@ class BasicView(wx.Frame):
             self.color_manager = self.container.resolve("color_manager")
             #self.focus_handler = self.container.resolve("focus_handler")
             self.widget_factory = self.container.resolve("widget_factory")
+            self.card_catalog = self.container.resolve_optional("card_catalog")
+            self.data_service = self.container.resolve_optional("data_service")
+            self.autocomplete = self.container.resolve_optional("autocomplete")
 
         else:
             self.cm = ColorManager()
@@ -163,23 +171,15 @@ class BasicView(wx.Frame):
                 self.reset_focus_style(btn)
 
     def reset_focus_style_for_card_list(self, selected_item=None):
-        """ Resetta lo stile di tutte le righe. """
-
-        for i in range(self.card_list.GetItemCount()):
-            if i != selected_item:
-                self.cm.apply_default_style_to_list_item(self.card_list, i)
-
-        # Forza il ridisegno della lista
-        self.card_list.Refresh()
+        """ Resetta lo stile di tutte le righe (solo la riga evidenziata viene ricolorata). """
+        self.cm.selection_tracker(self.card_list).clear(keep=selected_item)
 
 
     def select_element(self, row):
         """ Seleziona l'elemento attivo. """
 
         if hasattr(self, "card_list"):
-            self.card_list.SetItemBackgroundColour(row, eg.BLUE)
-            self.card_list.SetItemTextColour(row, eg.WHITE)
-            self.card_list.Refresh()
+            self.cm.apply_selection_style_to_list(self.card_list, row)
 
 
     def init_ui(self):
@@ -337,7 +337,20 @@ class ListView(BasicView):
     Classe base per finestre che gestiscono elenchi (carte, mazzi, ecc.).
     """
 
+    LOAD_CHUNK_SIZE = 500               # Righe inserite nella lista per ogni ciclo degli eventi
+    NUMERIC_COLUMNS = ()                # Colonne ordinate come numeri (definite dalle classi derivate)
+    MAX_SORT_COLUMNS = 3                # Colonne considerate dall'ordinamento su più colonne
+    TIEBREAK_COLUMN = 0                 # Colonna usata per ultima a parità di valori (il nome)
+    LOADING_ANNOUNCE_DELAY = 300        # ms prima di annunciare allo screen reader un caricamento in corso
+    AUTOCOMPLETE_SOURCE = None          # Nomi suggeriti dalla barra di ricerca ("cards", "decks"; None = nessuno)
+
     def __init__(self, parent, title, size=(800, 600), container=None, **kwargs):
+        self.loading = False                # True mentre un caricamento in background è in corso
+        self._focus_after_load = False      # set_focus_to_list richiesto durante il caricamento
+        self._loading_announced = False     # True se lo screen reader ha annunciato il caricamento in corso
+        self._loading_timer = None
+        self._base_title = title
+        self.search_session = SearchSession()   # Ricerca incrementale della barra di ricerca
         super().__init__(parent, title, size, container, **kwargs)
         self.mode = None  # Modalità di visualizzazione (es. "collection", "decks", "deck")
         #self.card_list = None  # Lista di carte
@@ -364,14 +377,18 @@ class ListView(BasicView):
         self.search_ctrl = self.widget_factory.create_search_bar(
             parent=self.panel,
             placeholder="Cerca...",
-            event_handler=self.on_search
+            event_handler=self.on_search,
+            suggest=self.suggest_names,
+            speak=self.speak,
+            on_accept=self.on_suggestion_accepted
         )
         self.search_ctrl.Bind(wx.EVT_TEXT, self.on_search_text_change)
 
-        # Lista delle carte
+        # Lista delle carte (virtuale: il costo dipende solo dalle righe visibili)
         self.card_list = self.widget_factory.create_list_ctrl(
             parent=self.panel,
-            columns=self._get_list_columns()  # Metodo astratto per definire le colonne
+            columns=self._get_list_columns(),  # Metodo astratto per definire le colonne
+            virtual=True
         )
 
         # Aggiungi la barra di ricerca e la lista al layout
@@ -379,6 +396,145 @@ class ListView(BasicView):
         self.sizer.Add(self.card_list, 1, wx.EXPAND | wx.ALL, 5)
 
 
+    #@@# Sezione metodi comuni per il caricamento in background
+
+    def submit_load(self, loader, *args, on_result=None, **kwargs):
+        """
+        Esegue loader(*args, **kwargs) tramite il DataService e passa il risultato a on_result(risultato, token)
+        sul thread dell'interfaccia.
+
+        Una nuova richiesta della stessa finestra annulla quella ancora in corso.
+        Senza DataService il caricamento è sincrono e il token è None.
+        """
+
+        if self.data_service is None:
+            on_result(loader(*args, **kwargs), None)
+            return
+
+        self.set_loading(True)
+        self.data_service.submit(id(self), loader, *args, on_result=on_result, on_error=self.on_load_error, **kwargs)
+
+
+    def load_rows_async(self, loader, *args, on_loaded=None, **kwargs):
+        """
+        Esegue loader(*args, **kwargs) in background e inserisce le righe restituite nella lista.
+
+        Args:
+            loader (callable): Funzione che restituisce la lista delle righe (eseguita in background).
+            on_loaded (callable): Chiamata sul thread dell'interfaccia quando tutte le righe sono nella lista.
+        """
+
+        self.submit_load(
+            loader, *args,
+            on_result=lambda rows, token: self.populate_rows(rows, token, on_loaded=on_loaded),
+            **kwargs
+        )
+
+
+    def populate_rows(self, rows, token, on_loaded=None, start=0):
+        """
+        Mostra le righe nella lista.
+
+        Una VirtualListCtrl riceve tutte le righe in un colpo solo; nella lista classica le righe
+        sono inserite a blocchi di LOAD_CHUNK_SIZE, restituendo il controllo al ciclo degli eventi tra un blocco e l'altro.
+        """
+
+        if not self or (token and token.cancelled):
+            return      # Finestra chiusa o richiesta superata da una più recente
+
+        if isinstance(self.card_list, VirtualListCtrl):
+            self.card_list.set_rows(rows)
+            self.finish_loading(len(rows), on_loaded=on_loaded)
+            return
+
+        if start == 0:
+            self.card_list.DeleteAllItems()
+
+        end = min(start + self.LOAD_CHUNK_SIZE, len(rows))
+        self.card_list.Freeze()
+        try:
+            for row in rows[start:end]:
+                self.card_list.Append(row)
+        finally:
+            self.card_list.Thaw()
+
+        if end < len(rows):
+            wx.CallAfter(self.populate_rows, rows, token, on_loaded, end)
+            return
+
+        self.finish_loading(len(rows), on_loaded=on_loaded)
+
+
+    def finish_loading(self, count, on_loaded=None):
+        """ Chiude lo stato di caricamento, esegue on_loaded e sposta il focus se richiesto durante il caricamento. """
+
+        self.set_loading(False, count=count)
+        if on_loaded:
+            on_loaded()
+
+        if self._focus_after_load:
+            self._focus_after_load = False
+            self.set_focus_to_list()
+
+
+    def on_load_error(self, error, token):
+        """ Gestisce un errore del caricamento in background. """
+
+        if not self:
+            return
+        self.set_loading(False)
+        wx.MessageBox(f"Errore durante il caricamento: {str(error)}", "Errore", wx.OK | wx.ICON_ERROR)
+
+
+    def set_loading(self, loading, count=None):
+        """
+        Aggiorna lo stato di caricamento della finestra (titolo e annuncio allo screen reader).
+
+        L'annuncio "Caricamento in corso" viene pronunciato solo se il caricamento dura più di
+        LOADING_ANNOUNCE_DELAY, per non disturbare durante la ricerca mentre si digita.
+        """
+
+        self.loading = loading
+        if self._loading_timer:
+            self._loading_timer.Stop()
+            self._loading_timer = None
+
+        if loading:
+            self.SetTitle(f"{self._base_title} - Caricamento in corso...")
+            self._loading_timer = wx.CallLater(self.LOADING_ANNOUNCE_DELAY, self._announce_loading)
+            return
+
+        self.SetTitle(self._base_title)
+        if self._loading_announced and count is not None:
+            self.speak(f"Caricamento completato: {count} elementi.")
+        self._loading_announced = False
+
+
+    def _announce_loading(self):
+        """ Annuncia allo screen reader il caricamento ancora in corso. """
+
+        self._loading_timer = None
+        if self and self.loading:
+            self._loading_announced = True
+            self.speak("Caricamento in corso...")
+
+
+    def speak(self, text):
+        """ Vocalizza un testo tramite il controller, se disponibile. """
+        if self.controller:
+            self.controller.speak(text)
+
+
+    def Destroy(self):
+        """ Annulla l'eventuale caricamento in corso prima di distruggere la finestra. """
+
+        if self.data_service:
+            self.data_service.cancel(id(self))
+        if self._loading_timer:
+            self._loading_timer.Stop()
+        return super().Destroy()
+
+
     #@@# Sezione metodi comuni per la ricerca e l'ordinamento
 
     def on_timer(self, event):
@@ -399,12 +555,26 @@ class ListView(BasicView):
             self.load_items()  # Ricarica tutti gli elementi se la casella di ricerca è vuota
         self.timer.Stop()
         self.timer.Start(500, oneShot=True)
+        event.Skip()        # Prosegue verso i suggerimenti della barra di ricerca
 
     def on_search(self, event):
         """Gestisce la ricerca testuale."""
         search_text = self.search_ctrl.GetValue().strip().lower()
         self.apply_search_filter(search_text)
 
+    def suggest_names(self, text, limit):
+        """ Restituisce i nomi suggeriti dalla barra di ricerca per il testo digitato. """
+
+        if not self.autocomplete or not self.AUTOCOMPLETE_SOURCE:
+            return []
+        return self.autocomplete.suggest(self.AUTOCOMPLETE_SOURCE, text, limit)
+
+    def on_suggestion_accepted(self, name):
+        """ Cerca subito il suggerimento scelto, senza attendere il debounce. """
+
+        self.timer.Stop()
+        self.on_timer(None)
+
     def apply_search_filter(self, search_text):
         """Applica un filtro di ricerca alla lista."""
         if not search_text or search_text in ["tutti", "tutto", "all"]:
@@ -412,29 +582,34 @@ class ListView(BasicView):
         else:
             self.load_items(filters={"name": search_text})  # Filtra gli elementi
 
-    def sort_cards(self, col):
-        """Ordina le carte in base alla colonna selezionata."""
+    def sort_cards(self, col, reverse=None):
+        """
+        Ordina la lista in base alla colonna selezionata, sui dati del provider (senza rileggere la ListCtrl).
 
-        items = []
-        for i in range(self.card_list.GetItemCount()):
-            item = [self.card_list.GetItemText(i, c) for c in range(self.card_list.GetColumnCount())]
-            items.append(item)
+        Ripetendo la stessa colonna si inverte la direzione; le colonne ordinate in precedenza restano
+        chiavi secondarie. L'ordinamento resta attivo anche sui risultati dei filtri successivi.
+
+        Args:
+            col (int): Colonna di ordinamento.
+            reverse (bool): Ordine decrescente; None = inverte la direzione se col è già la colonna principale.
+        """
+
+        current = self.card_list.provider.sort_columns
+        if reverse is None:
+            reverse = bool(current) and current[0][0] == col and not current[0][1]
 
-        def safe_int(value):
-            try:
-                return int(value)
-            except ValueError:
-                return float('inf') if value == "-" else value
+        columns = [(col, reverse)] + [(c, r) for c, r in current if c not in (col, self.TIEBREAK_COLUMN)]
+        columns = columns[:self.MAX_SORT_COLUMNS]
+        if col != self.TIEBREAK_COLUMN:
+            columns.append((self.TIEBREAK_COLUMN, False))
 
+        log.debug(f"Ordinamento per colonne: {columns}")
+        self.card_list.sort_rows(columns, numeric_columns=self.NUMERIC_COLUMNS)
 
-        if col == 1:  # Colonna "Mana" (numerica)
-            items.sort(key=lambda x: safe_int(x[col]))
-        else:  # Altre colonne (testuali)
-            items.sort(key=lambda x: x[col])
 
-        self.card_list.DeleteAllItems()
-        for item in items:
-            self.card_list.Append(item)
+    def reset_sort(self):
+        """ Rimuove l'ordinamento scelto dall'utente: i caricamenti successivi mostrano l'ordine predefinito. """
+        self.card_list.provider.sort_columns = ()
 
 
     def on_column_click(self, event):
@@ -456,24 +631,21 @@ class ListView(BasicView):
                 break
 
     def select_element(self, row):
-        """Seleziona l'elemento attivo e applica lo stile di focus."""
+        """Seleziona l'elemento attivo e applica lo stile di focus (ricolora solo la riga precedente e la nuova)."""
         if hasattr(self, "card_list"):
             self.color_manager.apply_selection_style_to_list(self.card_list, row)
-            for i in range(self.card_list.GetItemCount()):
-                if i != row:
-                    self.color_manager.apply_default_style_to_list_item(self.card_list, i)
-            self.card_list.Refresh()
 
     def reset_focus_style_for_card_list(self, selected_item=None):
         """Resetta lo stile di tutte le righe tranne quella selezionata."""
-        for i in range(self.card_list.GetItemCount()):
-            if i != selected_item:
-                self.color_manager.apply_default_style_to_list_item(self.card_list, i)
-        self.card_list.Refresh()
+        self.color_manager.selection_tracker(self.card_list).clear(keep=selected_item)
 
     def set_focus_to_list(self):
-        """Imposta il focus sulla prima carta della lista carte."""
-        if hasattr(self, "card_list"):
+        """Imposta il focus sulla prima carta della lista carte (al termine del caricamento, se in corso)."""
+        if self.loading:
+            self._focus_after_load = True
+            return
+
+        if hasattr(self, "card_list") and self.card_list.GetItemCount() > 0:
             self.card_list.SetFocus()
             self.card_list.Select(0)
             self.card_list.Focus(0)
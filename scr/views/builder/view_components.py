@@ -10,7 +10,8 @@
 
 # Lib
 import wx
-from .color_system import ColorManager
+from .color_system import ColorManager, ListSelectionTracker
+from .list_sorter import RowSorter
 from utyls import enu_glob as eg
 from utyls import helper as hp
 from utyls import logger as log
@@ -24,6 +25,7 @@ cm = ColorManager()
 DEFAULT_BUTTON_SIZE = (180, 70)
 DEFAULT_FONT_SIZE = 16
 DEFAULT_LIST_STYLE = wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.BORDER_SUNKEN
+DEFAULT_VIRTUAL_LIST_STYLE = DEFAULT_LIST_STYLE | wx.LC_VIRTUAL
 
 
 #@@# sezione classi personalizzate per la gestione degli elementi dell'interfaccia utente
@@ -285,14 +287,16 @@ class CustomListCtrl(wx.ListCtrl):
         #self.Bind(wx.EVT_SET_FOCUS, self.on_list_focus)
         #self.Bind(wx.EVT_KILL_FOCUS, self.on_list_kill_focus)
 
+        # Evidenziazione della riga selezionata (ricolora solo la riga precedente e la nuova)
+        self.selection_tracker = ListSelectionTracker(self, self.cm)
+
         # Collega l'evento di selezione degli elementi
         self.Bind(wx.EVT_LIST_ITEM_FOCUSED, self.on_item_focused)
 
     # In CustomListCtrl
     def on_item_focused(self, event):
         selected_item = event.GetIndex()
-        self.cm.apply_selection_style_to_list(self, selected_item)
-        self.Refresh()
+        self.selection_tracker.select(selected_item)
 
     def last_on_item_focused(self, event):
         """
@@ -316,17 +320,439 @@ class CustomListCtrl(wx.ListCtrl):
         """
         Resetta lo stile di tutte le righe tranne quella selezionata.
         """
-        for i in range(self.GetItemCount()):
-            if i != selected_item:
-                self.cm.apply_default_style_to_list_item(self, i)
-
-        self.Refresh()
+        self.selection_tracker.clear(keep=selected_item)
 
     def apply_selection_style(self, item_index):
         """
         Applica lo stile di selezione a un elemento della lista.
         """
-        self.cm.apply_selection_style_to_list_item(self, item_index)
+        self.selection_tracker.select(item_index)
+
+
+
+class ListRowProvider:
+    """
+    Sorgente delle righe di una VirtualListCtrl.
+
+    Le righe (liste di stringhe già formattate) restano in `rows`, mentre `indices` contiene le posizioni
+    visibili nell'ordine di visualizzazione: filtrare o ordinare significa solo sostituire l'array degli indici.
+
+    Attributi:
+        rows (list): Tutte le righe caricate.
+        indices (list | numpy.ndarray | None): Posizioni visibili; None = tutte le righe nell'ordine di `rows`.
+        tag: Identificativo dei dati caricati (es. la generazione delle carte), azzerato a ogni modifica diretta.
+        sort_columns (tuple): Ordinamento applicato alle posizioni visibili, come coppie (colonna, decrescente).
+        numeric_columns (tuple): Colonne ordinate come numeri.
+        highlighted (int | None): Riga visibile evidenziata come selezionata (vedi ListSelectionTracker).
+    """
+
+    def __init__(self, rows=None, indices=None, tag=None):
+        self.rows = []
+        self.indices = None
+        self.tag = None
+        self.sort_columns = ()
+        self.numeric_columns = ()
+        self._sorter = None         # RowSorter delle righe correnti (creato al primo ordinamento)
+        self.highlighted = None
+        self._highlight_colours = None  # (sfondo, testo) della riga evidenziata
+        self._colours = {}          # riga visibile -> (sfondo, testo)
+        self._attrs = {}            # (sfondo, testo) -> wx.ItemAttr condiviso
+        self.set_rows(rows or [], indices=indices, tag=tag)
+
+
+    def __len__(self):
+        return len(self.rows) if self.indices is None else len(self.indices)
+
+
+    def set_rows(self, rows, indices=None, tag=None):
+        """ Sostituisce tutte le righe (e le posizioni visibili). """
+
+        self.rows = rows
+        self.tag = tag
+        self._sorter = None
+        self.set_indices(indices)
+
+
+    def set_indices(self, indices):
+        """ Sostituisce le posizioni visibili senza toccare le righe (applicando l'ordinamento corrente). """
+
+        if self.sort_columns:
+            indices = self.sorter().sort(indices, self.sort_columns)
+        self.indices = indices
+        self._colours.clear()
+        self.highlighted = None
+
+
+    def sorter(self):
+        """ Restituisce il RowSorter delle righe correnti. """
+
+        if self._sorter is None:
+            self._sorter = RowSorter(self.rows, numeric_columns=self.numeric_columns)
+        return self._sorter
+
+
+    def sort(self, columns, numeric_columns=None):
+        """
+        Ordina le righe visibili.
+
+        Args:
+            columns (tuple): Coppie (colonna, decrescente), dalla chiave principale; vuoto = nessun ordinamento
+                             (le righe caricate in seguito restano nell'ordine di caricamento).
+            numeric_columns (tuple): Colonne da ordinare come numeri (None = invariate).
+        """
+
+        if numeric_columns is not None and tuple(numeric_columns) != self.numeric_columns:
+            self.numeric_columns = tuple(numeric_columns)
+            self._sorter = None
+        self.sort_columns = tuple(columns)
+        self.set_indices(self.indices)
+
+
+    def position(self, item):
+        """ Restituisce la posizione in `rows` della riga visibile `item`. """
+        return item if self.indices is None else int(self.indices[item])
+
+
+    def row(self, item):
+        """ Restituisce la riga visibile `item`. """
+        return self.rows[self.position(item)]
+
+
+    def visible_rows(self):
+        """ Restituisce le righe visibili nell'ordine di visualizzazione. """
+
+        if self.indices is None:
+            return list(self.rows)
+        return [self.rows[position] for position in self.indices]
+
+
+    #@@# Metodi richiesti da wx.ListCtrl in modalità virtuale
+
+    def OnGetItemText(self, item, col):
+        row = self.row(item)
+        return row[col] if col < len(row) else ""
+
+
+    def OnGetItemAttr(self, item):
+        colours = self._highlight_colours if item == self.highlighted else self._colours.get(item)
+        if colours is None:
+            return None     # Colori predefiniti della lista
+
+        attr = self._attrs.get(colours)
+        if attr is None:
+            attr = wx.ItemAttr()
+            background, text = colours
+            if background:
+                attr.SetBackgroundColour(wx.Colour(*background))
+            if text:
+                attr.SetTextColour(wx.Colour(*text))
+            self._attrs[colours] = attr
+        return attr
+
+
+    #@@# Modifiche dirette (compatibilità con Append/InsertItem/SetItem di wx.ListCtrl)
+
+    def _detach(self):
+        """ Rende le righe visibili l'unico contenuto, prima di una modifica diretta. """
+
+        if self.indices is not None:
+            self.rows = self.visible_rows()
+            self.indices = None
+        elif not isinstance(self.rows, list):
+            self.rows = list(self.rows)
+        self.tag = None
+        self._sorter = None
+
+
+    def insert(self, item, row):
+        """ Inserisce una riga nella posizione visibile indicata e ne restituisce l'indice. """
+
+        self._detach()
+        item = min(max(item, 0), len(self.rows))
+        self.rows.insert(item, [str(value) for value in row])
+        self._colours = {(i + 1 if i >= item else i): colours for i, colours in self._colours.items()}
+        if self.highlighted is not None and self.highlighted >= item:
+            self.highlighted += 1
+        return item
+
+
+    def set_cell(self, item, col, text):
+        """ Modifica il testo di una cella. """
+
+        self._detach()
+        row = self.rows[item]
+        if col >= len(row):
+            row.extend([""] * (col + 1 - len(row)))
+        row[col] = str(text)
+
+
+    def clear(self):
+        """ Rimuove tutte le righe. """
+        self.set_rows([])
+
+
+    def set_item_colours(self, item, background=None, text=None):
+        """ Imposta i colori di una riga visibile (wx.Colour o nome del colore). """
+
+        current_background, current_text = self._colours.get(item, (None, None))
+        if background is not None:
+            current_background = wx.Colour(background).Get()
+        if text is not None:
+            current_text = wx.Colour(text).Get()
+        self._colours[item] = (current_background, current_text)
+
+
+    def highlight(self, item, background, text):
+        """ Evidenzia la riga visibile indicata (una sola alla volta; None = nessuna) con i colori dati. """
+
+        self.highlighted = item
+        self._highlight_colours = (wx.Colour(background).Get(), wx.Colour(text).Get())
+
+
+
+class VirtualListCtrl(CustomListCtrl):
+    """
+    CustomListCtrl in modalità wx.LC_VIRTUAL: il testo e i colori delle righe sono chiesti a un ListRowProvider
+    solo per le righe visibili, quindi il costo di visualizzazione non dipende dal numero di righe.
+
+    Append, InsertItem, SetItem, DeleteAllItems, GetItemText e i colori delle righe restano disponibili
+    e operano sul provider, così il codice scritto per la lista classica continua a funzionare.
+    """
+
+    def __init__(self, parent, color_manager, *args, provider=None, style=DEFAULT_VIRTUAL_LIST_STYLE, **kwargs):
+        super().__init__(parent, color_manager, *args, style=style | wx.LC_VIRTUAL, **kwargs)
+        self.provider = provider or ListRowProvider()
+        self.refresh_rows()
+
+
+    def refresh_rows(self):
+        """ Allinea il numero di righe della lista al provider e la ridisegna. """
+
+        self.SetItemCount(len(self.provider))
+        self.Refresh()
+
+
+    def set_rows(self, rows, indices=None, tag=None):
+        """ Sostituisce tutte le righe della lista. """
+
+        self.provider.set_rows(rows, indices=indices, tag=tag)
+        self.refresh_rows()
+
+
+    def set_indices(self, indices):
+        """ Sostituisce le righe visibili (filtro) senza ricaricare i dati. """
+
+        self.provider.set_indices(indices)
+        self.refresh_rows()
+
+
+    def sort_rows(self, columns, numeric_columns=None):
+        """ Ordina le righe visibili sui dati del provider (vedi ListRowProvider.sort). """
+
+        self.provider.sort(columns, numeric_columns=numeric_columns)
+        self.refresh_rows()
+
+
+    def OnGetItemText(self, item, col):
+        return self.provider.OnGetItemText(item, col)
+
+
+    def OnGetItemAttr(self, item):
+        return self.provider.OnGetItemAttr(item)
+
+
+    #@@# Compatibilità con l'interfaccia della lista classica
+
+    def GetItemText(self, item, col=0):
+        return self.provider.OnGetItemText(item, col)
+
+
+    def Append(self, entry):
+        item = self.provider.insert(len(self.provider), entry)
+        self.SetItemCount(len(self.provider))
+        return item
+
+
+    def InsertItem(self, index, label, *args):
+        item = self.provider.insert(index, [label])
+        self.SetItemCount(len(self.provider))
+        return item
+
+
+    def SetItem(self, index, column, label, imageId=-1):
+        self.provider.set_cell(index, column, label)
+        self.RefreshItem(index)
+        return True
+
+
+    def DeleteAllItems(self):
+        self.provider.clear()
+        self.refresh_rows()
+        return True
+
+
+    def SetItemBackgroundColour(self, item, col):
+        self.provider.set_item_colours(item, background=col)
+
+
+    def SetItemTextColour(self, item, col):
+        self.provider.set_item_colours(item, text=col)
+
+
+
+
+class SearchAutocomplete:
+    """
+    Suggerimenti di completamento per una barra di ricerca.
+
+    Mentre l'utente digita, i nomi restituiti da `suggest` compaiono in una lista a comparsa sotto la barra.
+    Il focus resta nella barra di ricerca: le frecce su e giù scorrono i suggerimenti (vocalizzati con `speak`
+    insieme alla posizione), Invio sceglie il suggerimento evidenziato, Esc chiude la lista.
+
+    Args:
+        search_ctrl (wx.SearchCtrl): Barra di ricerca.
+        suggest (callable): suggest(testo, limite) restituisce i nomi suggeriti.
+        speak (callable): Vocalizza un testo (opzionale).
+        on_accept (callable): Chiamata con il nome scelto, dopo averlo scritto nella barra (opzionale).
+        color_manager (ColorManager): Colori della lista a comparsa (opzionale).
+    """
+
+    MIN_CHARS = 2               # Caratteri digitati prima di mostrare i suggerimenti
+    MAX_SUGGESTIONS = 8
+
+    def __init__(self, search_ctrl, suggest, speak=None, on_accept=None, color_manager=None):
+        self.search_ctrl = search_ctrl
+        self.suggest = suggest
+        self.speak = speak
+        self.on_accept = on_accept
+        self.cm = color_manager
+        self.suggestions = []
+        self.selection = -1         # Suggerimento evidenziato (-1 = nessuno)
+        self._popup = None
+        self._list = None
+
+        search_ctrl.Bind(wx.EVT_TEXT, self.on_text)
+        search_ctrl.Bind(wx.EVT_CHAR_HOOK, self.on_char_hook)
+        search_ctrl.Bind(wx.EVT_KILL_FOCUS, self.on_kill_focus)
+
+
+    @property
+    def shown(self):
+        """ True se la lista dei suggerimenti è visibile. """
+        return bool(self._popup and self._popup.IsShown())
+
+
+    def _create_popup(self):
+        """ Crea la lista a comparsa (una sola volta per barra di ricerca). """
+
+        self._popup = wx.PopupWindow(self.search_ctrl.GetTopLevelParent())
+        self._list = wx.ListBox(self._popup, style=wx.LB_SINGLE)
+        self._list.Bind(wx.EVT_LISTBOX_DCLICK, lambda event: self.accept(self._list.GetSelection()))
+        if self.cm:
+            self.cm.apply_default_style(self._list)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self._list, 1, wx.EXPAND)
+        self._popup.SetSizer(sizer)
+
+
+    def show(self, suggestions):
+        """ Mostra i suggerimenti sotto la barra di ricerca. """
+
+        if not self._popup:
+            self._create_popup()
+
+        was_shown = self.shown
+        self.suggestions = suggestions
+        self.selection = -1
+        self._list.Set(suggestions)
+
+        width, height = self.search_ctrl.GetSize()
+        row_height = self._list.GetCharHeight() + 4
+        self._popup.SetPosition(self.search_ctrl.ClientToScreen(wx.Point(0, height)))
+        self._popup.SetSize(width, row_height * len(suggestions) + 4)
+        self._popup.Layout()
+        self._popup.Show()
+
+        if not was_shown and self.speak:
+            self.speak(f"{len(suggestions)} suggerimenti, usa le frecce per sceglierne uno.")
+
+
+    def hide(self):
+        """ Nasconde la lista dei suggerimenti. """
+
+        if self._popup:
+            self._popup.Hide()
+        self.suggestions = []
+        self.selection = -1
+
+
+    def move(self, step):
+        """ Evidenzia il suggerimento successivo (step=1) o precedente (step=-1) e lo vocalizza. """
+
+        if not self.suggestions:
+            return
+
+        self.selection = max(0, min(len(self.suggestions) - 1, self.selection + step))
+        self._list.SetSelection(self.selection)
+        if self.speak:
+            self.speak(f"{self.suggestions[self.selection]}, {self.selection + 1} di {len(self.suggestions)}")
+
+
+    def accept(self, index):
+        """ Scrive nella barra il suggerimento indicato e avvisa on_accept. """
+
+        if not 0 <= index < len(self.suggestions):
+            return
+
+        name = self.suggestions[index]
+        self.hide()
+        self.search_ctrl.ChangeValue(name)          # Non genera EVT_TEXT: la lista non si riapre
+        self.search_ctrl.SetInsertionPointEnd()
+        self.search_ctrl.SetFocus()
+        if self.on_accept:
+            self.on_accept(name)
+
+
+    def on_text(self, event):
+        """ Aggiorna i suggerimenti a ogni modifica del testo. """
+
+        text = self.search_ctrl.GetValue()
+        suggestions = self.suggest(text, self.MAX_SUGGESTIONS) if len(text.strip()) >= self.MIN_CHARS else []
+        if suggestions and suggestions != [text]:
+            self.show(suggestions)
+        else:
+            self.hide()
+        event.Skip()            # La finestra gestisce comunque la ricerca con debounce
+
+
+    def on_char_hook(self, event):
+        """ Frecce, Invio ed Esc agiscono sui suggerimenti mentre la lista è visibile. """
+
+        if not self.shown:
+            event.Skip()
+            return
+
+        key_code = event.GetKeyCode()
+        if key_code == wx.WXK_DOWN:
+            self.move(1)
+        elif key_code == wx.WXK_UP:
+            self.move(-1)
+        elif key_code in (wx.WXK_RETURN, wx.WXK_NUMPAD_ENTER) and self.selection >= 0:
+            self.accept(self.selection)
+        elif key_code == wx.WXK_ESCAPE:
+            self.hide()
+            if self.speak:
+                self.speak("Suggerimenti chiusi.")
+        else:
+            event.Skip()
+
+
+    def on_kill_focus(self, event):
+        """ Chiude i suggerimenti quando il focus lascia la barra di ricerca. """
+
+        self.hide()
+        event.Skip()
 
 
 
@@ -354,7 +780,7 @@ def create_button(parent, label, size=DEFAULT_BUTTON_SIZE, font_size=DEFAULT_FON
     return button
 
 
-def create_list_ctrl(parent, columns, color_manager=cm, focus_handler=None, style=DEFAULT_LIST_STYLE):
+def create_list_ctrl(parent, columns, color_manager=cm, focus_handler=None, style=DEFAULT_LIST_STYLE, virtual=False):
     """
 
     Crea una lista (wx.ListCtrl) con colonne personalizzabili.
@@ -363,10 +789,12 @@ def create_list_ctrl(parent, columns, color_manager=cm, focus_handler=None, styl
     :param color_manager: Istanza di ColorManager.
     :param focus_handler: Istanza di FocusHandler.
     :param style: Stile della lista.
-    :return: Un'istanza di CustomListCtrl.
+    :param virtual: Se True crea una VirtualListCtrl (righe fornite da un ListRowProvider).
+    :return: Un'istanza di CustomListCtrl o VirtualListCtrl.
     """
 
-    list_ctrl = CustomListCtrl(
+    list_class = VirtualListCtrl if virtual else CustomListCtrl
+    list_ctrl = list_class(
         parent,
         color_manager=color_manager,
         focus_handler=focus_handler,
@@ -380,13 +808,16 @@ def create_list_ctrl(parent, columns, color_manager=cm, focus_handler=None, styl
     return list_ctrl
 
 
-def create_search_bar(parent, placeholder="Cerca...", event_handler=None):
+def create_search_bar(parent, placeholder="Cerca...", event_handler=None, suggest=None, speak=None, on_accept=None):
     """
     Crea una barra di ricerca (wx.SearchCtrl).
 
     :param parent: Il genitore della barra di ricerca.
     :param placeholder: Testo placeholder. Default: "Cerca...".
     :param event_handler: Funzione da chiamare quando si avvia la ricerca (opzionale).
+    :param suggest: suggest(testo, limite) per i suggerimenti di completamento (opzionale, vedi SearchAutocomplete).
+    :param speak: Funzione per vocalizzare i suggerimenti (opzionale).
+    :param on_accept: Funzione chiamata con il suggerimento scelto (opzionale).
     :return: Un'istanza di wx.SearchCtrl.
     """
 
@@ -394,6 +825,8 @@ def create_search_bar(parent, placeholder="Cerca...", event_handler=None):
     search_ctrl.SetDescriptiveText(placeholder)
     if event_handler:
         search_ctrl.Bind(wx.EVT_SEARCHCTRL_SEARCH_BTN, event_handler)
+    if suggest:
+        search_ctrl.autocomplete = SearchAutocomplete(search_ctrl, suggest, speak=speak, on_accept=on_accept, color_manager=cm)
     return search_ctrl
 
 
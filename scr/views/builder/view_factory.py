@@ -79,18 +79,20 @@ class WidgetFactory:
         return button
 
 
-    def create_list_ctrl(self, parent, columns, style=wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.BORDER_SUNKEN):
+    def create_list_ctrl(self, parent, columns, style=wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.BORDER_SUNKEN, virtual=False):
         """
         Crea una lista (wx.ListCtrl) con colonne personalizzabili.
 
         :param parent: Il genitore della lista.
         :param columns: Lista di tuple (nome_colonna, larghezza).
         :param style: Stile della lista. Default: wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.BORDER_SUNKEN.
+        :param virtual: Se True crea una VirtualListCtrl (wx.LC_VIRTUAL) con le righe fornite da un ListRowProvider.
         :return: Un'istanza di wx.ListCtrl.
         """
 
         color_manager = self.color_manager
-        list_ctrl = vc.CustomListCtrl(
+        list_class = vc.VirtualListCtrl if virtual else vc.CustomListCtrl
+        list_ctrl = list_class(
             parent,
             color_manager=color_manager,
             style=style
@@ -107,13 +109,16 @@ class WidgetFactory:
         return list_ctrl
 
 
-    def create_search_bar(self, parent, placeholder="Cerca...", event_handler=None):
+    def create_search_bar(self, parent, placeholder="Cerca...", event_handler=None, suggest=None, speak=None, on_accept=None):
         """
         Crea una barra di ricerca (wx.SearchCtrl).
 
         :param parent: Il genitore della barra di ricerca.
         :param placeholder: Testo placeholder. Default: "Cerca...".
         :param event_handler: Funzione da chiamare quando si avvia la ricerca (opzionale).
+        :param suggest: suggest(testo, limite) per i suggerimenti di completamento (opzionale, vedi SearchAutocomplete).
+        :param speak: Funzione per vocalizzare i suggerimenti (opzionale).
+        :param on_accept: Funzione chiamata con il suggerimento scelto (opzionale).
         :return: Un'istanza di wx.SearchCtrl.
         """
 
@@ -121,6 +126,10 @@ class WidgetFactory:
         search_ctrl.SetDescriptiveText(placeholder)
         if event_handler:
             search_ctrl.Bind(wx.EVT_SEARCHCTRL_SEARCH_BTN, event_handler)
+        if suggest:
+            search_ctrl.autocomplete = vc.SearchAutocomplete(
+                search_ctrl, suggest, speak=speak, on_accept=on_accept, color_manager=self.color_manager
+            )
 
         # Applica lo stile predefinito e collega gli eventi di focus
         self.color_manager.apply_default_style(search_ctrl)
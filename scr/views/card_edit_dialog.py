@@ -9,7 +9,7 @@
     Descrizione:
 
         Questo modulo contiene la classe CardEditDialog, una finestra di dialogo per aggiungere o modificare una carta.
-        La finestra di dialogo permette all'utente di inserire i dettagli di una carta, come il nome, il costo in mana, il tipo, l'attacco, la vita, la durabilità, la rarità e l'espansione.
+        La finestra di dialogo permette all'utente di inserire i dettagli di una carta, come il nome, il costo in mana, il tipo, l'attacco, la vita, la durabilità, la rarità, l'espansione e le copie possedute nella collezione.
         La finestra di dialogo include anche un elenco di controllo per selezionare le classi associate alla carta e pulsanti per salvare le modifiche o chiudere la finestra.
 
 """
@@ -17,7 +17,6 @@
 #lib
 import wx
 from sqlalchemy.exc import SQLAlchemyError
-from ..db import session, Card
 from ..models import load_cards
 from .builder.view_components import create_button, create_check_list_box, create_separator, create_common_controls
 from .builder.proto_views import SingleCardView
@@ -65,6 +64,12 @@ class CardEditDialog(SingleCardView):
             fields_sizer.Add(control, proportion=1, flag=wx.EXPAND | wx.ALL, border=5)
             self.controls[key] = control
 
+        # Copie possedute nella collezione (fuori dai controlli comuni, usati anche dai filtri di ricerca)
+        label = wx.StaticText(self.panel, label="Copie Possedute")
+        self.controls["copie_possedute"] = wx.SpinCtrl(self.panel, min=0, max=99)
+        fields_sizer.Add(label, flag=wx.ALIGN_CENTER_VERTICAL | wx.ALL, border=5)
+        fields_sizer.Add(self.controls["copie_possedute"], proportion=1, flag=wx.EXPAND | wx.ALL, border=5)
+
         # Collega l'evento di selezione del tipo di carta
         self.controls["tipo"].Bind(wx.EVT_COMBOBOX, self.on_type_change)
 
@@ -196,6 +201,7 @@ class CardEditDialog(SingleCardView):
         self.controls["durability"].SetValue(self.card.durability or "-")
         self.controls["rarita"].SetValue(self.card.rarity or "-")
         self.controls["espansione"].SetValue(self.card.expansion or "-")
+        self.controls["copie_possedute"].SetValue(self.card.owned_quantity or 0)
 
         # Seleziona le classi associate alla carta
         if self.card.class_name:
@@ -315,22 +321,19 @@ class CardEditDialog(SingleCardView):
                 "durability": self.controls["durability"].GetValue() if self.controls["durability"].IsEnabled() else None,
                 "rarity": self.controls["rarita"].GetValue() if self.controls["rarita"].GetValue() else None,
                 "expansion": self.controls["espansione"].GetValue() if self.controls["espansione"].GetValue() else None,
+                "owned_quantity": self.controls["copie_possedute"].GetValue(),
             }
 
             # Ottieni le classi selezionate
             selected_classes = [self.classes_listbox.GetString(i) for i in self.classes_listbox.GetCheckedItems()]
             card_data["class_name"] = ", ".join(selected_classes)  # Salva come stringa separata da virgole
 
-            if self.card:
-                # Modifica la carta esistente
-                for key, value in card_data.items():
-                    setattr(self.card, key, value)
-            else:
-                # Aggiungi una nuova carta
-                new_card = Card(**card_data)
-                session.add(new_card)
+            # Crea una nuova carta o modifica quella esistente (stessa transazione delle statistiche dei mazzi)
+            db_manager = self.parent.controller.db_manager
+            if db_manager.save_card(card_data, card_id=self.card.id if self.card else None) is None:
+                wx.MessageBox("Carta non trovata nel database.", "Errore", wx.OK | wx.ICON_ERROR)
+                return
 
-            session.commit()            # Salva le modifiche nel database
             self.EndModal(wx.ID_OK)     # Chiude la finestra
 
         except Exception as e:
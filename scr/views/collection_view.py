@@ -21,8 +21,7 @@
 # lib
 import wx#, pyperclip
 import wx.lib.newevent
-from ..db import Card
-from ..models import load_cards, session
+from ..models import load_collection_view
 from .builder.proto_views import BasicView, ListView
 from .card_edit_dialog import CardEditDialog
 from .filters_dialog import FilterDialog
@@ -40,6 +39,9 @@ SearchEvent, EVT_SEARCH_EVENT = wx.lib.newevent.NewEvent()
 class CardCollectionFrame(ListView):
     """Finestra per gestire la collezione di carte."""
 
+    NUMERIC_COLUMNS = (1, 6, 7, 8)      # Mana, Attacco, Vita, Durabilità
+    AUTOCOMPLETE_SOURCE = "cards"
+
     def __init__(self, parent, controller, container, **kwargs):
         super().__init__(parent=parent, title="Collezione", container=container, **kwargs)
         self.mode = "collection"
@@ -64,7 +66,10 @@ class CardCollectionFrame(ListView):
         self.search_ctrl = self.widget_factory.create_search_bar(
             self.panel,
             placeholder="Cerca per nome...",
-            event_handler=self.on_search
+            event_handler=self.on_search,
+            suggest=self.suggest_names,
+            speak=self.speak,
+            on_accept=self.on_suggestion_accepted
         )
         self.search_ctrl.Bind(wx.EVT_TEXT, self.on_search_text_change)  # Aggiunto per la ricerca dinamica
         self.add_to_sizer(search_sizer, self.search_ctrl, proportion=1, flag=wx.EXPAND | wx.ALL, border=5)
@@ -98,7 +103,8 @@ class CardCollectionFrame(ListView):
                 ("Durabilità", 50),
                 ("Rarità", 120),
                 ("Espansione", 500)
-            ]
+            ],
+            virtual=True
         )
 
         # Collega gli eventi di focus alla lista
@@ -146,7 +152,7 @@ class CardCollectionFrame(ListView):
         #self.card_list.SetFont(wx.Font(13, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
         #self.card_list.SetForegroundColour('white')
 
-        # sposta il focus sulla lista
+        # sposta il focus sulla lista (al termine del caricamento)
         self.set_focus_to_list()
 
         #aggiorna la lista
@@ -161,8 +167,14 @@ class CardCollectionFrame(ListView):
         #self.Bind(wx.EVT_CLOSE, self.on_close)
 
 
-    def load_cards(self, filters=None):
-        """Carica le carte utilizzando le funzioni helper sopra definite."""
+    def load_cards(self, filters=None, on_loaded=None):
+        """
+        Carica le carte in background (DataService) e le inserisce nella lista al termine.
+
+        Args:
+            filters (dict): Filtri da applicare.
+            on_loaded (callable): Chiamata quando la lista è stata popolata (es. per selezionare una carta).
+        """
 
         if not self.card_list:
             log.error("La lista delle carte non è stata inizializzata.")
@@ -172,16 +184,45 @@ class CardCollectionFrame(ListView):
             filters = {}
 
         log.debug(f"Caricamento delle carte con filtri: {filters}")
-        load_cards(filters=filters, card_list=self.card_list)
-        #self.controller.load_collection(filters=filters, card_list=self.card_list)
-        #self.controller.load_collection(filters=filters, card_list=self.card_list)
+        self.submit_load(
+            load_collection_view, filters, self.card_list.provider.tag, search=self.search_session, catalog=self.card_catalog,
+            on_result=lambda result, token: self.on_collection_result(result, token, filters, on_loaded)
+        )
+
+
+    def on_collection_result(self, result, token, filters=None, on_loaded=None):
+        """Mostra il risultato del caricamento: con le stesse righe cambia solo l'array delle posizioni visibili."""
+
+        if not self or (token and token.cancelled):
+            return
+
+        tag, rows, positions, similar = result
+        if rows is None:
+            if self.card_list.provider.tag != tag:
+                # Le righe della lista sono cambiate nel frattempo: serve un caricamento completo
+                self.card_list.provider.tag = None
+                self.load_cards(filters, on_loaded=on_loaded)
+                return
+            self.card_list.set_indices(positions)
+        else:
+            self.card_list.set_rows(rows, indices=positions, tag=tag)
+
+        if similar:
+            self.speak(f"Nessuna carta contiene il testo cercato: {self.card_list.GetItemCount()} carte con nome simile.")
+
+        self.finish_loading(self.card_list.GetItemCount(), on_loaded=lambda: self.on_cards_loaded(on_loaded))
+
+
+    def on_cards_loaded(self, on_loaded=None):
+        """Applica gli stili alla lista appena caricata."""
 
         # Imposta il colore di sfondo predefinito per tutte le righe
         #self.reset_focus_style_for_card_list()
         self.cm.reset_all_styles(self.card_list)
 
         # colora la riga selezionata
-        self.select_element(0)
+        if self.card_list.GetItemCount() > 0:
+            self.select_element(0)
         self.cm.apply_focus_style(self.card_list)
         #self.card_list.SetBackgroundColour('blue')
         #self.card_list.SetFont(wx.Font(13, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
@@ -190,6 +231,9 @@ class CardCollectionFrame(ListView):
         # Forza il ridisegno della lista
         self.card_list.Refresh()
 
+        if on_loaded:
+            on_loaded()
+
 
     def _get_list_columns(self):
         """Definisce le colonne specifiche per la gestione della collezione."""
@@ -208,11 +252,11 @@ class CardCollectionFrame(ListView):
         ]
 
 
-    def sort_cards(self, col):
+    def sort_cards(self, col, reverse=None):
         """Ordina le carte in base alla colonna selezionata."""
 
         # Ordina le carte in base alla colonna selezionata
-        super().sort_cards(col)
+        super().sort_cards(col, reverse=reverse)
 
         # sposta il focus sulla lista
         self.set_focus_to_list()
@@ -298,12 +342,10 @@ class CardCollectionFrame(ListView):
         if hasattr(self, "filters"):
             del self.filters  # Libera la memoria occupata dai filtri precedenti
 
-        # Ricarica le carte senza filtri
+        # Ripristina l'ordinamento predefinito (per "Mana" e "Nome") e ricarica le carte senza filtri
+        self.reset_sort()
         self.load_cards()
 
-        # Ripristina l'ordinamento predefinito (ad esempio, per "Mana" e "Nome")
-        self.sort_cards(1)  # Ordina per "Mana" (colonna 1)
-
         # Sposta il focus sulla prima carta della lista carte di questa finestra
         self.set_focus_to_list()
 
@@ -345,6 +387,7 @@ class CardCollectionFrame(ListView):
         # Avvia il timer per il debounce (es. 300 ms)
         self.timer.Stop()  # Ferma il timer precedente
         self.timer.Start(500, oneShot=True)
+        event.Skip()                        # Prosegue verso i suggerimenti della barra di ricerca
 
 
     def on_search_event(self, event):
@@ -364,8 +407,7 @@ class CardCollectionFrame(ListView):
             if card_name:
                 if self.mode == "collection":
                     # Aggiungi la carta alla collezione (se non esiste già)
-                    card = session.query(Card).filter_by(name=card_name).first()
-                    if not card:
+                    if card_name not in self.card_catalog:
                         wx.MessageBox("La carta non esiste nel database.", "Errore")
                     else:
                         self.load_cards()
@@ -379,13 +421,13 @@ class CardCollectionFrame(ListView):
         selected = self.card_list.GetFirstSelected()
         if selected != -1:
             card_name = self.card_list.GetItemText(selected)
-            card = session.query(Card).filter_by(name=card_name).first()
+            card = self.card_catalog.get_by_name(card_name)
             if card:
                 dlg = CardEditDialog(self, card)
                 if dlg.ShowModal() == wx.ID_OK:
-                    self.load_cards()  # Ricarica la lista delle carte
+                    # Ricarica la lista, poi seleziona e mette a fuoco la carta modificata
+                    self.load_cards(on_loaded=lambda: self.select_card_by_name(card_name))
                     wx.MessageBox(f"Carta '{card_name}' modificata con successo.", "Successo")
-                    self.select_card_by_name(card_name)  # Seleziona e mette a fuoco la carta modificata
 
                 dlg.Destroy()
 
@@ -406,10 +448,7 @@ class CardCollectionFrame(ListView):
                 try:
                     if self.mode == "collection":
                         # Elimina la carta dalla collezione
-                        card = session.query(Card).filter_by(name=card_name).first()
-                        if card:
-                            session.delete(card)
-                            session.commit()
+                        if self.controller.db_manager.delete_card(card_name):
                             self.load_cards()
                             wx.MessageBox(f"Carta '{card_name}' eliminata dalla collezione.", "Successo", wx.OK | wx.ICON_INFORMATION)
                         else:
@@ -15,10 +15,10 @@
 # lib
 import wx#, pyperclip
 import wx.lib.newevent
-from ..db import Card, session
 from .builder.proto_views import BasicView, ListView
 from .card_edit_dialog import CardEditDialog
 from .builder.color_system import AppColors
+from ..autocomplete import PrefixIndex
 from utyls import enu_glob as eg
 from utyls import helper as hp
 from utyls import logger as log
@@ -31,7 +31,10 @@ SearchEvent, EVT_SEARCH_EVENT = wx.lib.newevent.NewEvent()
 class DeckViewFrame(ListView):
     """Finestra per gestire le carte di un mazzo."""
 
+    NUMERIC_COLUMNS = (1, 2, 6, 7, 8)   # Mana, Quantità, Attacco, Vita, Durabilità
+
     def __init__(self, parent=None, controller=None, container=None, deck_name="", **kwargs):
+        self.card_names = PrefixIndex()     # Nomi delle carte del mazzo, suggeriti dalla barra di ricerca
         super().__init__(parent=parent, title=f"Mazzo: {deck_name}", deck_name=deck_name, container=container, **kwargs)
         self.mode = "deck"  # Modalità "deck" per gestire i mazzi
         self.deck_name = deck_name
@@ -65,7 +68,10 @@ class DeckViewFrame(ListView):
         self.search_ctrl = self.widget_factory.create_search_bar(
             self.panel,
             placeholder="Cerca per nome...",
-            event_handler=self.on_search
+            event_handler=self.on_search,
+            suggest=self.suggest_names,
+            speak=self.speak,
+            on_accept=self.on_suggestion_accepted
         )
         self.search_ctrl.Bind(wx.EVT_TEXT, self.on_search_text_change)
         self.add_to_sizer(search_sizer, self.search_ctrl, proportion=1, flag=wx.EXPAND | wx.ALL, border=5)
@@ -88,7 +94,8 @@ class DeckViewFrame(ListView):
                 ("Durabilità", 50),
                 ("Rarità", 120),
                 ("Espansione", 500)
-            ]
+            ],
+            virtual=True
         )
 
         #self.card_list.Bind(wx.EVT_LIST_COL_CLICK, self.on_column_click)            # Ordina la lista per colonna
@@ -134,9 +141,8 @@ class DeckViewFrame(ListView):
         # Carica le carte SOLO se il mazzo è stato caricato correttamente
         if hasattr(self, "deck_content") and self.deck_content:
             #self.load_cards()
-            self.refresh_card_list()
+            self.refresh_card_list(on_loaded=lambda: self.select_element(0))
             self.set_focus_to_list()
-            self.select_element(0)
             #self.cm.apply_selection_style_to_list(self.card_list, 0)  # Applica lo stile di selezione alla prima riga
             #self.cm.apply_focus_style(self.card_list)
             #self.cm.apply_selection_style_to_list(self.card_list)
@@ -168,30 +174,6 @@ class DeckViewFrame(ListView):
             ("Espansione", 500)
         ]
 
-    def sort_cards(self, col):
-        """Ordina le carte in base alla colonna selezionata, con logica specifica per i mazzi."""
-        items = []
-        for i in range(self.card_list.GetItemCount()):
-            item = [self.card_list.GetItemText(i, c) for c in range(self.card_list.GetColumnCount())]
-            items.append(item)
-
-        def safe_int(value):
-            try:
-                return int(value)
-            except ValueError:
-                return float('inf') if value == "-" else value
-
-        if col == 1:  # Colonna "Mana" (numerica)
-            items.sort(key=lambda x: safe_int(x[col]))
-        elif col == 2:  # Colonna "Quantità" (numerica)
-            items.sort(key=lambda x: safe_int(x[col]))
-        else:  # Altre colonne (testuali)
-            items.sort(key=lambda x: x[col])
-
-        self.card_list.DeleteAllItems()
-        for item in items:
-            self.card_list.Append(item)
-
     def on_item_activated(self, event):
         """Gestisce il doppio clic su una riga per modificare la carta."""
         selected = self.card_list.GetFirstSelected()
@@ -210,6 +192,11 @@ class DeckViewFrame(ListView):
         wx.PostEvent(self, evt)
 
 
+    def suggest_names(self, text, limit):
+        """ Suggerisce i nomi delle sole carte del mazzo. """
+        return self.card_names.suggest(text, limit)
+
+
     def on_search_text_change(self, event):
         """Gestisce la ricerca in tempo reale mentre l'utente digita."""
 
@@ -221,6 +208,7 @@ class DeckViewFrame(ListView):
         # Avvia il timer per il debounce (es. 300 ms)
         self.timer.Stop()  # Ferma il timer precedente
         self.timer.Start(500, oneShot=True)
+        event.Skip()                        # Prosegue verso i suggerimenti della barra di ricerca
 
 
     def on_search_event(self, event):
@@ -232,8 +220,13 @@ class DeckViewFrame(ListView):
 
     def _add_card_to_list(self, card_data):
         """Aggiunge una singola carta alla lista."""
+        self.card_list.Append(self._format_card_row(card_data))
+
 
-        self.card_list.Append([
+    def _format_card_row(self, card_data):
+        """Restituisce la riga della lista per una carta del mazzo."""
+
+        return [
             card_data.get("name", "-"),
             str(card_data.get("mana_cost", "-")) if card_data.get("mana_cost") is not None else "-",
             str(card_data.get("quantity", "-")) if card_data.get("quantity") else "-",
@@ -245,7 +238,7 @@ class DeckViewFrame(ListView):
             str(card_data.get("durability", "-")) if card_data.get("durability") is not None else "-",
             card_data.get("rarity", "-") if card_data.get("rarity") else "-",
             card_data.get("expansion", "-") if card_data.get("expansion") else "-"
-        ])
+        ]
 
 
     def load_cards(self, filters=None):
@@ -268,22 +261,25 @@ class DeckViewFrame(ListView):
 
         # Recupera le carte dal mazzo
         cards = self.deck_content.get("cards", [])
+        self.card_names.sync(card_data["name"] for card_data in cards)
         if not cards:
             log.warning("Nessuna carta trovata nel mazzo.")
             return
 
-        # Filtra le carte in base ai criteri specificati
-        filtered_cards = []
-        for card_data in cards:
-            if filters and "name" in filters:
-                if filters["name"].lower() not in card_data["name"].lower():
-                    continue  # Salta le carte che non corrispondono al filtro
-
-            filtered_cards.append(card_data)
-
-        # Aggiunge le carte filtrate alla lista
-        for card_data in filtered_cards:
-            self._add_card_to_list(card_data)
+        # Filtra le carte in base ai criteri specificati: la lista virtuale riceve tutte le righe
+        # e le sole posizioni delle carte che corrispondono al filtro
+        positions = None
+        if filters and "name" in filters:
+            search_text = filters["name"].lower()
+            matches = lambda candidates: [position for position in candidates if search_text in cards[position]["name"].lower()]
+            positions = self.search_session.search(
+                search_text,
+                full_query=lambda: matches(range(len(cards))),
+                narrow=matches,     # Il testo estende il precedente: restringe le corrispondenze precedenti
+                context=tuple(card_data["name"] for card_data in cards)
+            )
+
+        self.card_list.set_rows([self._format_card_row(card_data) for card_data in cards], indices=positions)
 
         # Applica lo stile predefinito a tutte le righe
         self.cm.apply_default_style(self.card_list)
@@ -296,17 +292,35 @@ class DeckViewFrame(ListView):
         self.card_list.Refresh()
 
 
-    def refresh_card_list(self):
-        """Aggiorna la lista delle carte con i dati più recenti dal database."""
+    def refresh_card_list(self, on_loaded=None):
+        """
+        Aggiorna la lista delle carte con i dati più recenti dal database (in background).
+
+        Args:
+            on_loaded (callable): Chiamata quando la lista è stata aggiornata.
+        """
 
         log.debug("Aggiornamento della lista delle carte...")        
 
         # Ricarica il contenuto del mazzo dal database
-        self.deck_content = self.parent.controller.db_manager.get_deck(self.deck_name)
+        self.submit_load(
+            self.parent.controller.db_manager.get_deck, self.deck_name,
+            on_result=lambda deck_content, token: self.on_deck_loaded(deck_content, token, on_loaded=on_loaded)
+        )
+
+
+    def on_deck_loaded(self, deck_content, token, on_loaded=None):
+        """ Mostra il contenuto del mazzo ricaricato (sul thread dell'interfaccia). """
+
+        if not self or (token and token.cancelled):
+            return
+
+        self.deck_content = deck_content
 
          # Ricarica le carte nella lista
         self.load_cards()
         self.card_list.Refresh()
+        self.finish_loading(self.card_list.GetItemCount(), on_loaded=on_loaded)
         log.debug("Lista delle carte aggiornata.")
 
 
@@ -338,8 +352,9 @@ class DeckViewFrame(ListView):
             self.search_ctrl.SetValue("")  # Resetta la barra di ricerca
             self.load_cards()  # Ricarica la lista delle carte senza filtri
 
+        self.reset_sort()
         self.load_cards()  # Ricarica le carte senza filtri
-        self.sort_cards(1)  # Ordina per "Mana" (colonna 1)
+        self.sort_cards(1, reverse=False)  # Ordina per "Mana" (colonna 1)
         self.card_list.SetFocus()
         self.card_list.Select(0)
         self.card_list.Focus(0)
@@ -405,7 +420,7 @@ class DeckViewFrame(ListView):
     def _add_card_to_deck(self, card_name):
         """Aggiunge una nuova carta al mazzo."""
 
-        card = session.query(Card).filter_by(name=card_name).first()
+        card = self.card_catalog.get_by_name(card_name)
         if card:
             self.deck_content["cards"].append({
                 "name": card.name,
@@ -421,14 +436,12 @@ class DeckViewFrame(ListView):
     def _edit_card_in_deck(self, card_name):
         """Modifica la carta selezionata."""
 
-        card = session.query(Card).filter_by(name=card_name).first()
+        card = self.card_catalog.get_by_name(card_name)
         if card:
             dlg = CardEditDialog(self, card)
             if dlg.ShowModal() == wx.ID_OK:
-                self.load_cards()
-                self.refresh_card_list()
+                self.refresh_card_list(on_loaded=lambda: self.select_card_by_name(card_name))
                 wx.MessageBox(f"Carta '{card_name}' modificata con successo.", "Successo")
-                self.select_card_by_name(card_name)
 
             dlg.Destroy()
 
@@ -448,36 +461,10 @@ class DeckViewFrame(ListView):
         wx.MessageBox(f"Carta '{card_name}' eliminata dal mazzo.", "Successo")
 
 
-    def _sort_items(self, items, col):
-        """Ordina gli elementi in base alla colonna selezionata."""
-
-        def safe_int(value):
-            try:
-                return int(value)
-
-            except ValueError:
-                return float('inf') if value == "-" else value
-
-        if col == 1:  # Colonna "Mana" (numerica)
-            items.sort(key=lambda x: safe_int(x[col]))
-
-        else:  # Altre colonne (testuali)
-            items.sort(key=lambda x: x[col])
-
-
-    def sort_cards(self, col):
+    def sort_cards(self, col, reverse=None):
         """Ordina le carte in base alla colonna selezionata."""
 
-        items = []
-        for i in range(self.card_list.GetItemCount()):
-            item = [self.card_list.GetItemText(i, c) for c in range(self.card_list.GetColumnCount())]
-            items.append(item)
-
-        self._sort_items(items, col)
-
-        self.card_list.DeleteAllItems()
-        for item in items:
-            self.card_list.Append(item)
+        super().sort_cards(col, reverse=reverse)
 
         # Applica lo stile predefinito a tutte le righe
         self.cm.apply_default_style(self.card_list)
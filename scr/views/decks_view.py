@@ -28,11 +28,23 @@ from utyls import logger as log                             # Modulo per la gest
 # Creazione di un evento personalizzato per la ricerca con debounce
 SearchEvent, EVT_SEARCH_EVENT = wx.lib.newevent.NewEvent()
 
+# Formati di esportazione dei mazzi, nell'ordine dei filtri della finestra di salvataggio
+EXPORT_FORMATS = ("jsonl", "csv", "txt")
+EXPORT_WILDCARD = "JSON Lines (*.jsonl)|*.jsonl|CSV (*.csv)|*.csv|Testo di Hearthstone (*.txt)|*.txt"
+
+# Filtro per archetipo (gli archetipi sono calcolati in background, vedi scr/deck_archetypes.py)
+ARCHETYPE_COLUMN = 4
+MISSING_COPIES_COLUMN = 5       # Completata in background dopo il caricamento (vedi load_missing_copies)
+ALL_ARCHETYPES = "Tutti gli archetipi"
+
 
 
 class DecksViewFrame(ListView):
     """ Finestra di gestione dei mazzi. """
 
+    NUMERIC_COLUMNS = (3, 5)            # Carte Totali, Copie Mancanti
+    AUTOCOMPLETE_SOURCE = "decks"
+
     def __init__(self, parent=None, controller=None, container=None, **kwargs):
         super().__init__(parent=parent, title="Gestione Mazzi", size=(800, 600), container=container, **kwargs)
         self.mode = "decks"
@@ -50,6 +62,13 @@ class DecksViewFrame(ListView):
         """Inizializza gli elementi dell'interfaccia utente."""
         super().init_ui_elements()
 
+        # Filtro per archetipo tra la barra di ricerca e la lista; il clic su "Archetipo" raggruppa i mazzi
+        self.archetype_filter = wx.ComboBox(self.panel, choices=[ALL_ARCHETYPES], style=wx.CB_READONLY)
+        self.archetype_filter.SetSelection(0)
+        self.archetype_filter.Bind(wx.EVT_COMBOBOX, self.on_archetype_selected)
+        self.sizer.Insert(1, self.archetype_filter, 0, wx.EXPAND | wx.ALL, 5)
+        self.card_list.Bind(wx.EVT_LIST_COL_CLICK, self.on_column_click)
+
         # Aggiungi pulsanti specifici per la gestione dei mazzi
         btn_add = self.widget_factory.create_button(
             parent=self.panel,
@@ -87,6 +106,18 @@ class DecksViewFrame(ListView):
             event_handler=self.on_delete_deck
         )
 
+        btn_similar = self.widget_factory.create_button(
+            parent=self.panel,
+            label="Mazzi Simili",
+            event_handler=self.on_similar_decks
+        )
+
+        btn_export = self.widget_factory.create_button(
+            parent=self.panel,
+            label="Esporta Mazzi",
+            event_handler=self.on_export_decks
+        )
+
         btn_collection = self.widget_factory.create_button(
             parent=self.panel,
             label="Collezione Carte",
@@ -100,8 +131,8 @@ class DecksViewFrame(ListView):
         )
 
         # Layout pulsanti
-        btn_sizer = wx.GridSizer(rows=4, cols=2, hgap=10, vgap=10)
-        for btn in [btn_add, btn_copy, btn_view, btn_stats, btn_update, btn_delete, btn_collection, btn_exit]:
+        btn_sizer = wx.GridSizer(rows=5, cols=2, hgap=10, vgap=10)
+        for btn in [btn_add, btn_copy, btn_view, btn_stats, btn_update, btn_delete, btn_similar, btn_export, btn_collection, btn_exit]:
             self.bind_focus_events(btn)  # Collega gli eventi di focus
             btn_sizer.Add(btn, flag=wx.EXPAND | wx.ALL, border=5)
 
@@ -127,7 +158,7 @@ class DecksViewFrame(ListView):
         lbl_title = wx.StaticText(self.panel, label="Elenco Mazzi")
         self.card_list = self.widget_factory.create_list_ctrl(
             parent=self.panel,
-            columns=[("Mazzo", 600), ("Classe", 500), ("Formato", 300), ("Carte Totali", 300)]  # 
+            columns=[("Mazzo", 600), ("Classe", 500), ("Formato", 300), ("Carte Totali", 300), ("Archetipo", 500), ("Copie Mancanti", 300)]  # 
         )
 
         #self.card_list.Bind(wx.EVT_LIST_COL_CLICK, self.on_column_click)  # Ordina la lista per colonna
@@ -244,18 +275,75 @@ class DecksViewFrame(ListView):
         #self.Layout()
 
 
-    def load_decks(self):
-        """ Carica i mazzi dal database. """
+    def load_decks(self, on_loaded=None):
+        """
+        Carica i mazzi dal database in background.
 
-        # carichiamo i mazzi dal database usando db_session
-        #controller = self.parent.controller.decks_controller
-        if not self.controller.load_decks(self.card_list):
+        Args:
+            on_loaded (callable): Chiamata quando tutti i mazzi sono nella lista.
+        """
+
+        # carichiamo i mazzi tramite il DataService (una nuova richiesta annulla quella in corso)
+        self.search_session.reset()
+        self.load_rows_async(self.controller.db_manager.get_deck_summary_rows, on_loaded=lambda: self.on_decks_loaded(on_loaded))
+
+
+    def on_decks_loaded(self, on_loaded=None):
+        """ Completa il caricamento dei mazzi sul thread dell'interfaccia. """
+
+        if self.card_list.GetItemCount() == 0:
+            log.warning("Nessun mazzo trovato.")
             wx.MessageBox("Errore durante il caricamento dei mazzi.", "Errore")
             return
 
+        # Allinea i suggerimenti della barra di ricerca ai mazzi caricati (solo i nomi cambiati)
+        if self.autocomplete:
+            self.autocomplete.sync(self.AUTOCOMPLETE_SOURCE, [row[0] for row in self.card_list.provider.rows])
+
         # colora il mazzo selezionato nella lista
         self.controller.select_list_element(self)
 
+        # Prepara in background l'indice dei mazzi simili (solo i mazzi modificati, dopo il primo caricamento)
+        if self.data_service is not None:
+            self.data_service.submit((id(self), "similar"), self.controller.db_manager.prepare_similar_decks)
+        self.load_missing_copies()
+
+        if on_loaded:
+            on_loaded()
+
+
+    def load_missing_copies(self):
+        """ Calcola in background le copie mancanti di ogni mazzo e completa la colonna "Copie Mancanti". """
+
+        if self.data_service is None:
+            missing = self.controller.db_manager.get_missing_copies_by_deck()
+            self.on_missing_copies_loaded(missing, None)
+            return
+
+        self.data_service.submit(
+            (id(self), "missing_copies"),
+            self.controller.db_manager.get_missing_copies_by_deck,
+            on_result=self.on_missing_copies_loaded
+        )
+
+
+    def on_missing_copies_loaded(self, missing, token):
+        """ Inserisce le copie mancanti nelle righe già caricate, mantenendo filtro per archetipo e ordinamento. """
+
+        if not self or (token and token.cancelled):
+            return
+
+        provider = self.card_list.provider
+        rows = []
+        for row in provider.rows:
+            row = list(row) + [""] * (MISSING_COPIES_COLUMN + 1 - len(row))
+            row[MISSING_COPIES_COLUMN] = str(missing.get(row[0], ""))
+            rows.append(row)
+
+        # Stesse posizioni visibili: l'ordinamento corrente viene riapplicato (la colonna può esserne la chiave)
+        self.card_list.set_rows(rows, indices=provider.indices, tag=provider.tag)
+        self.controller.select_list_element(self)
+
 
     def update_status(self, message):
         """Aggiorna la barra di stato."""
@@ -269,33 +357,66 @@ class DecksViewFrame(ListView):
             ("Mazzo", 600),
             ("Classe", 500),
             ("Formato", 300),
-            ("Carte Totali", 300)
+            ("Carte Totali", 300),
+            ("Archetipo", 500),
+            ("Copie Mancanti", 300)
         ]
 
-    def sort_cards(self, col):
-        """Ordina i mazzi in base alla colonna selezionata, con logica specifica."""
-        log.debug(f"Ordinamento per colonna: {col}")
 
-        items = []
-        for i in range(self.card_list.GetItemCount()):
-            item = [self.card_list.GetItemText(i, c) for c in range(self.card_list.GetColumnCount())]
-            items.append(item)
+    def finish_loading(self, count, on_loaded=None):
+        """ Aggiorna le opzioni del filtro per archetipo e lo applica alle righe appena caricate. """
 
+        self.update_archetype_choices()
+        super().finish_loading(self.apply_archetype_filter(), on_loaded=on_loaded)
 
-        def safe_int(value):
-            try:
-                return int(value)
-            except ValueError:
-                return float('inf') if value == "-" else value
 
-        if col == 3:  # Colonna "Carte Totali" (numerica)
-            items.sort(key=lambda x: safe_int(x[col]))
-        else:  # Altre colonne (testuali)
-            items.sort(key=lambda x: x[col])
+    def refresh_decks_list(self):
+        """
+        Ricarica subito la lista dei mazzi (dopo un'aggiunta, una modifica o un'eliminazione),
+        aggiornando le opzioni del filtro per archetipo e riapplicandolo come dopo il caricamento in background.
+        """
+
+        self.controller.update_decks_list(self.card_list)
+        self.update_archetype_choices()
+        self.apply_archetype_filter()
+        self.load_missing_copies()
+
+
+    def update_archetype_choices(self):
+        """ Propone gli archetipi presenti nelle righe caricate, mantenendo la scelta corrente se ancora presente. """
+
+        if not hasattr(self, "archetype_filter"):
+            return
 
-        self.card_list.DeleteAllItems()
-        for item in items:
-            self.card_list.Append(item)
+        selected = self.archetype_filter.GetStringSelection()
+        archetypes = sorted({row[ARCHETYPE_COLUMN] for row in self.card_list.provider.rows if len(row) > ARCHETYPE_COLUMN and row[ARCHETYPE_COLUMN]})
+        self.archetype_filter.Set([ALL_ARCHETYPES] + archetypes)
+        self.archetype_filter.SetStringSelection(selected if selected in archetypes else ALL_ARCHETYPES)
+
+
+    def apply_archetype_filter(self):
+        """
+        Mostra solo i mazzi dell'archetipo scelto, sulle righe già caricate (nessuna query e nessun ricalcolo).
+
+        Returns:
+            int: Numero di mazzi visibili.
+        """
+
+        if not hasattr(self, "archetype_filter"):
+            return self.card_list.GetItemCount()
+
+        archetype = self.archetype_filter.GetStringSelection()
+        rows = self.card_list.provider.rows
+        if archetype and archetype != ALL_ARCHETYPES:
+            self.card_list.set_indices([position for position, row in enumerate(rows) if len(row) > ARCHETYPE_COLUMN and row[ARCHETYPE_COLUMN] == archetype])
+        else:
+            self.card_list.set_indices(None)
+        return self.card_list.GetItemCount()
+
+    def sort_cards(self, col, reverse=None):
+        """Ordina i mazzi in base alla colonna selezionata."""
+
+        super().sort_cards(col, reverse=reverse)
 
         # Applica lo stile predefinito a tutte le righe
         self.cm.apply_default_style(self.card_list)
@@ -337,6 +458,15 @@ class DecksViewFrame(ListView):
         self.sort_cards(col)
 
 
+    def on_archetype_selected(self, event):
+        """ Filtra la lista dei mazzi per l'archetipo scelto. """
+
+        count = self.apply_archetype_filter()
+        self.speak(f"{count} mazzi.")
+        if count:
+            self.controller.select_list_element(self)
+
+
     def on_item_activated(self, event):
         """Gestisce il doppio clic su una riga per visualizzare il mazzo."""
         selected = self.card_list.GetFirstSelected()
@@ -365,6 +495,7 @@ class DecksViewFrame(ListView):
         # Avvia il timer per il debounce (es. 500 ms)
         self.timer.Stop()  # Ferma il timer precedente
         self.timer.Start(500, oneShot=True)
+        event.Skip()                        # Prosegue verso i suggerimenti della barra di ricerca
 
 
     def on_search_event(self, event):
@@ -384,7 +515,8 @@ class DecksViewFrame(ListView):
             return
 
         if self.controller.add_deck():
-            self.controller.update_decks_list(self.card_list)
+            self.refresh_decks_list()
+            self.search_session.reset()     # I mazzi sono cambiati: la prossima ricerca riparte da zero
             self.controller.select_last_deck(self)
             wx.MessageBox("Mazzo aggiunto con successo.", "Successo")
         else:
@@ -421,7 +553,8 @@ class DecksViewFrame(ListView):
 
         deck_name = self.controller.get_selected_deck(self.card_list)
         if self.controller.upgrade_deck(deck_name):
-                self.controller.update_decks_list(self.card_list)
+                self.refresh_decks_list()
+                self.search_session.reset()     # I mazzi sono cambiati: la prossima ricerca riparte da zero
                 self.controller.select_and_focus_deck(frame=self, deck_name=deck_name)  # Seleziona e mette a fuoco il mazzo                
 
 
@@ -443,6 +576,90 @@ class DecksViewFrame(ListView):
             wx.MessageBox("Seleziona un mazzo prima di visualizzare le statistiche.", "Errore")
 
 
+    def on_similar_decks(self, event):
+        """ Cerca i mazzi più simili a quello selezionato; la ricerca avviene in background. """
+
+        deck_name = self.controller.get_selected_deck(self.card_list)
+        if not deck_name:
+            log.error("Nessun mazzo selezionato.")
+            wx.MessageBox("Seleziona un mazzo prima di cercare i mazzi simili.", "Errore")
+            return
+
+        if self.data_service is None:
+            self.on_similar_decks_found(self.controller.get_similar_decks(deck_name), deck_name)
+            return
+
+        self.data_service.submit(
+            (id(self), "similar"), self.controller.get_similar_decks, deck_name,
+            on_result=lambda similar_decks, token: self.on_similar_decks_found(similar_decks, deck_name),
+            on_error=lambda error, token: log.error(f"Errore durante la ricerca dei mazzi simili: {str(error)}")
+        )
+
+
+    def on_similar_decks_found(self, similar_decks, deck_name):
+        """ Mostra i mazzi simili; il mazzo scelto viene selezionato nella lista. """
+
+        if not self:
+            return      # Finestra chiusa durante la ricerca
+
+        if not similar_decks:
+            wx.MessageBox(f"Nessun mazzo simile a '{deck_name}'.", "Mazzi Simili")
+            return
+
+        choices = [
+            f"{deck['name']} ({deck['player_class']}, {deck['game_format']}): {deck['score']:.0%}"
+            for deck in similar_decks
+        ]
+        with wx.SingleChoiceDialog(self, f"Mazzi simili a '{deck_name}':", "Mazzi Simili", choices) as dialog:
+            if dialog.ShowModal() == wx.ID_OK:
+                self.controller.select_and_focus_deck(frame=self, deck_name=similar_decks[dialog.GetSelection()]["name"])
+
+
+    def on_export_decks(self, event):
+        """ Esporta tutti i mazzi in un file scelto dall'utente; la scrittura avviene in background. """
+
+        with wx.FileDialog(
+            self, "Esporta mazzi", wildcard=EXPORT_WILDCARD, defaultFile="mazzi.jsonl",
+            style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT
+        ) as dialog:
+            if dialog.ShowModal() != wx.ID_OK:
+                log.info("Esportazione annullata.")
+                return
+            path = dialog.GetPath()
+            export_format = EXPORT_FORMATS[dialog.GetFilterIndex()]
+
+        export = self.controller.db_manager.export_decks
+        if self.data_service is None:
+            try:
+                self.on_decks_exported(export(path, export_format), path)
+            except Exception as e:
+                self.on_export_error(e)
+            return
+
+        # Canale separato da quello dei caricamenti: una ricerca non annulla l'esportazione in corso
+        self.data_service.submit(
+            (id(self), "export"), export, path, export_format,
+            on_result=lambda count, token: self.on_decks_exported(count, path),
+            on_error=lambda error, token: self.on_export_error(error)
+        )
+
+
+    def on_decks_exported(self, count, path):
+        """ Comunica il termine dell'esportazione. """
+
+        if not self:
+            return      # Finestra chiusa durante l'esportazione
+        wx.MessageBox(f"{count} mazzi esportati in '{path}'.", "Successo")
+
+
+    def on_export_error(self, error):
+        """ Comunica un errore dell'esportazione. """
+
+        log.error(f"Errore durante l'esportazione dei mazzi: {str(error)}")
+        if self:
+            wx.MessageBox(f"Errore durante l'esportazione dei mazzi: {error}", "Errore")
+
+
     def on_view_collection(self, event):
         """Mostra la collezione delle carte."""
         self.win_controller.create_collection_window(parent=self)
@@ -456,7 +673,8 @@ class DecksViewFrame(ListView):
         if deck_name:
             if wx.MessageBox(f"Sei sicuro di voler eliminare '{deck_name}'?", "Conferma", wx.YES_NO) == wx.YES:
                 if self.controller.delete_deck(frame=self, deck_name=deck_name):
-                    self.controller.update_decks_list(self.card_list)
+                    self.refresh_decks_list()
+                    self.search_session.reset()     # I mazzi sono cambiati: la prossima ricerca riparte da zero
                     self.controller.select_last_deck(self)
                     wx.MessageBox(f"Mazzo '{deck_name}' eliminato con successo.", "Successo")
                     